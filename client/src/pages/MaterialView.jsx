@@ -73,7 +73,7 @@ const MaterialView = () => {
       const response = await api.post(`/llm/generate-quiz/${id}?num_mcq=${numMcq}&num_short=${numShort}`)
       setGeneratedData(prev => ({
         ...prev,
-        quiz_questions: JSON.stringify(response.data.quiz_questions)
+        quiz_questions: response.data.quiz_questions
       }))
       toast.success('Quiz generated successfully!')
       setShowQuizTaker(false)
@@ -91,7 +91,7 @@ const MaterialView = () => {
       const response = await api.post(`/llm/extract-concepts/${id}?max_concepts=${maxConcepts}`)
       setGeneratedData(prev => ({
         ...prev,
-        key_concepts: JSON.stringify(response.data.key_concepts)
+        key_concepts: response.data.key_concepts
       }))
       toast.success('Concepts extracted successfully!')
     } catch (error) {
@@ -297,8 +297,8 @@ const MaterialView = () => {
     )
   }
 
-  const quizQuestions = generatedData?.quiz_questions ? JSON.parse(generatedData.quiz_questions) : []
-  const keyConcepts = generatedData?.key_concepts ? JSON.parse(generatedData.key_concepts) : []
+  const quizQuestions = generatedData?.quiz_questions || []
+  const keyConcepts = generatedData?.key_concepts || []
 
   return (
     <div className="max-w-7xl mx-auto px-4 sm:px-6 lg:px-8 py-8 animate-fade-in">
@@ -97,13 +97,13 @@ describe('pdfGenerator', () => {
       }
 
       const generatedData = {
-        quiz_questions: JSON.stringify([
+        quiz_questions: [
           {
             question: 'What is 2+2?',
             options: ['3', '4', '5', '6'],
             correct_answer: '4'
           }
-        ])
+        ]
       }
 
       generatePDF(material, generatedData)
@@ -124,7 +124,7 @@ describe('pdfGenerator', () => {
       }
 
       const generatedData = {
-        key_concepts: JSON.stringify(['Concept 1', 'Concept 2', 'Concept 3'])
+        key_concepts: ['Concept 1', 'Concept 2', 'Concept 3']
       }
 
       generatePDF(material, generatedData)
@@ -136,7 +136,7 @@ describe('pdfGenerator', () => {
       )
     })
 
-    it('handles invalid JSON in quiz_questions gracefully', () => {
+    it('handles malformed quiz_questions gracefully', () => {
       const material = {
         title: 'Test Material',
         file_type: 'text',
@@ -152,7 +152,7 @@ describe('pdfGenerator', () => {
       expect(mockDoc.save).toHaveBeenCalled()
     })
 
-    it('handles invalid JSON in key_concepts gracefully', () => {
+    it('handles malformed key_concepts gracefully', () => {
       const material = {
         title: 'Test Material',
         file_type: 'text',
@@ -193,14 +193,14 @@ describe('pdfGenerator', () => {
 
       const generatedData = {
         summary: 'AI summary',
-        quiz_questions: JSON.stringify([
+        quiz_questions: [
           {
             question: 'Question 1?',
             options: ['A', 'B', 'C', 'D'],
             correct_answer: 'B'
           }
-        ]),
-        key_concepts: JSON.stringify(['Concept A', 'Concept B'])
+        ],
+        key_concepts: ['Concept A', 'Concept B']
       }
 
       generatePDF(material, generatedData)
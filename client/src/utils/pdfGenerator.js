@@ -54,8 +54,8 @@ export const generatePDF = (material, generatedData) => {
 
   // Add quiz questions
   if (generatedData?.quiz_questions) {
-    try {
-      const quizData = JSON.parse(generatedData.quiz_questions)
+    const quizData = generatedData.quiz_questions
+    if (Array.isArray(quizData)) {
       addText('QUIZ QUESTIONS', 16, true)
       addText('_'.repeat(50), 10)
       
@@ -75,23 +75,23 @@ export const generatePDF = (material, generatedData) => {
         
         yPosition += 5
       })
-    } catch (error) {
-      addText('Quiz questions data could not be parsed', 11)
+    } else {
+      addText('Quiz questions data could not be read', 11)
     }
   }
 
   // Add key concepts
   if (generatedData?.key_concepts) {
-    try {
-      const concepts = JSON.parse(generatedData.key_concepts)
+    const concepts = generatedData.key_concepts
+    if (Array.isArray(concepts)) {
       addText('KEY CONCEPTS', 16, true)
       addText('_'.repeat(50), 10)
       
       concepts.forEach((concept, index) => {
         addText(`${index + 1}. ${concept}`, 11)
       })
-    } catch (error) {
-      addText('Key concepts data could not be parsed', 11)
+    } else {
+      addText('Key concepts data could not be read', 11)
     }
   }
 
@@ -1,13 +1,17 @@
 import hashlib
-import secrets
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status, Request, Cookie
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from . import models, schemas
-from .database import get_db
+from .database import get_read_db
+from .services.password_hashing import password_hasher
+from .services.ttl_cache import TTLCache
+from .services.user_cache import cache_user, get_cached_user
 import os
 from dotenv import load_dotenv
 
@@ -17,21 +21,20 @@ JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
+# Verified tokens by SHA-256 digest; entries expire with the token (the TTL
+# here only caps tokens issued with a longer lifetime)
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+token_cache = TTLCache(TOKEN_CACHE_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
 security = HTTPBearer(auto_error=False)  # Don't auto-error, we'll handle cookies too
 
 def get_password_hash(password: str) -> str:
-    """Hash password using SHA-256 with salt."""
-    salt = secrets.token_hex(16)
-    password_hash = hashlib.sha256((password + salt).encode()).hexdigest()
-    return f"{salt}:{password_hash}"
+    """Hash password with bcrypt (blocking; use password_hasher.hash_async in handlers)."""
+    return password_hasher.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hash."""
-    try:
-        salt, password_hash = hashed_password.split(':')
-        return hashlib.sha256((plain_password + salt).encode()).hexdigest() == password_hash
-    except ValueError:
-        return False
+    """Verify password against a bcrypt or legacy salted SHA-256 hash (blocking)."""
+    return password_hasher.verify(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token."""
@@ -45,6 +48,52 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
     return encoded_jwt
 
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+def decode_token(token: str) -> Optional[schemas.TokenData]:
+    """
+    Verify a JWT and return its TokenData, or None if it is invalid or expired.
+    Verified tokens are cached by digest until their `exp`, so a token
+    presented again skips the signature check.
+    """
+    key = token_digest(token)
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        return token_data
+    
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except JWTError:
+        return None
+    subject = payload.get("sub")
+    if subject is None:
+        return None
+    # The subject is the user id; older tokens carry the email instead
+    if subject.isdigit():
+        token_data = schemas.TokenData(user_id=int(subject))
+    else:
+        token_data = schemas.TokenData(email=subject)
+    
+    expires_at = payload.get("exp")
+    token_cache.put(key, token_data, ttl_seconds=expires_at - time.time() if expires_at is not None else None)
+    return token_data
+
+def request_token(request: Request) -> Optional[str]:
+    """The bearer token sent with a request, else the access_token cookie."""
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return credentials
+    return request.cookies.get("access_token")
+
+def request_subject(request: Request) -> Optional[str]:
+    """Subject (user id, or email for older tokens) of a request's valid token, or None."""
+    token = request_token(request)
+    token_data = decode_token(token) if token else None
+    if token_data is None:
+        return None
+    return str(token_data.user_id) if token_data.user_id is not None else token_data.email
+
 def verify_token(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
@@ -66,23 +115,28 @@ def verify_token(
     if not token:
         raise credentials_exception
     
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = schemas.TokenData(email=email)
-    except JWTError:
+    token_data = decode_token(token)
+    if token_data is None:
         raise credentials_exception
     
     return token_data
 
-def get_current_user(
+async def get_current_user(
     token_data: schemas.TokenData = Depends(verify_token),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get current authenticated user."""
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
+    """
+    Get current authenticated user: from the user cache when possible, else by
+    primary key (on the read replica when one is configured).
+    """
+    if token_data.user_id is not None:
+        user = get_cached_user(token_data.user_id)
+        if user is None:
+            user = await db.get(models.User, token_data.user_id)
+            if user is not None:
+                user = cache_user(user)
+    else:
+        user = await get_user_by_email(db, token_data.email)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -90,11 +144,22 @@ def get_current_user(
         )
     return user
 
-def authenticate_user(db: Session, email: str, password: str):
-    """Authenticate user with email and password."""
-    user = db.query(models.User).filter(models.User.email == email).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[models.User]:
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def authenticate_user(db: AsyncSession, email: str, password: str):
+    """
+    Authenticate user with email and password. A legacy or outdated-cost hash
+    is replaced with a fresh bcrypt hash on success.
+    """
+    user = await get_user_by_email(db, email)
     if not user:
+        await password_hasher.verify_dummy_async(password)
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await password_hasher.verify_async(password, user.hashed_password):
         return False
-    return user
\ No newline at end of file
+    if password_hasher.needs_rehash(user.hashed_password):
+        user.hashed_password = await password_hasher.hash_async(password)
+        await db.commit()
+    return user
@@ -1,37 +1,132 @@
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
 import os
+import time
 from dotenv import load_dotenv
+from .services.pool_metrics import (
+    TimedAsyncQueuePool, TimedNullPool, TimedQueuePool, instrument_engine, pool_metrics
+)
+from .services.ttl_cache import TTLCache
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# Optional streaming replica for read-only endpoints (see get_read_db)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+# How long a client's reads stay on the primary after it writes, to cover replication lag
+READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_MAX_USERS = int(os.getenv("READ_YOUR_WRITES_MAX_USERS", "100000"))
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+# Users who wrote within READ_YOUR_WRITES_SECONDS, by token subject. Unlike the
+# cookie this also works when the frontend is on another site (browsers do not
+# send SameSite=Lax cookies on cross-site requests), but only within one worker
+recent_writers = TTLCache(READ_YOUR_WRITES_MAX_USERS, READ_YOUR_WRITES_SECONDS)
+# Engines that could not be created, by name; reported by the startup timings
+# instead of printed at import
+engine_errors = {}
+
+# Pool strategy. Every uvicorn worker has its own pools, so the most connections
+# one deployment can hold is workers x engines x (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+# DB_POOL_MODE=null opens a connection per checkout and closes it on checkin,
+# for when a transaction-mode pgbouncer (the Supabase pooler on 6543) does the pooling.
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # Supabase drops idle connections after 30 minutes
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def pool_options(is_async: bool = False, mode: str = None) -> dict:
+    """create_engine/create_async_engine keyword arguments for the configured pool strategy."""
+    mode = (mode or DB_POOL_MODE).lower()
+    if mode == "null":
+        return {"poolclass": TimedNullPool, "pool_pre_ping": False}
+    if mode != "queue":
+        raise ValueError(f"Unknown DB_POOL_MODE '{mode}', expected 'queue' or 'null'")
+    return {
+        "poolclass": TimedAsyncQueuePool if is_async else TimedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_pre_ping": DB_POOL_PRE_PING,  # Verify connections before use
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
 
 # Create engine with connection pooling and better configuration
 try:
     engine = create_engine(
         DATABASE_URL,
-        poolclass=QueuePool,
-        pool_size=5,         # Reduced for Supabase
-        max_overflow=10,     # Reduced for Supabase
-        pool_pre_ping=True,  # Verify connections before use
-        pool_recycle=1800,   # Recycle connections every 30 minutes (Supabase timeout)
         echo=False,          # Set to True for SQL debugging
         connect_args={
             "sslmode": "disable" if "localhost" in DATABASE_URL or "@db:" in DATABASE_URL else "require",
             "connect_timeout": 10,
             "application_name": "study_assistant"
-        }
+        },
+        **pool_options()
     )
-    print("✅ Database engine created successfully")
+    instrument_engine(engine, "primary")
 except Exception as e:
-    print(f"❌ Failed to create database engine: {e}")
+    engine_errors["primary"] = e
     engine = None
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def to_async_url(url: str) -> str:
+    """Map a sync database URL to its async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    url = make_url(url)
+    if url.drivername in ("postgres", "postgresql", "postgresql+psycopg2"):
+        # asyncpg takes SSL settings through connect_args, not the query string
+        return url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"]).render_as_string(hide_password=False)
+    if url.drivername in ("sqlite", "sqlite+pysqlite"):
+        return url.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url.render_as_string(hide_password=False)
+
+def create_async_db_engine(url: str):
+    """Async engine with the same pool and connection settings as the sync engine."""
+    connect_args = {
+        "ssl": False if "localhost" in url or "@db:" in url else "require",
+        "timeout": 10,
+        "server_settings": {"application_name": "study_assistant"}
+    }
+    if DB_POOL_MODE == "null":
+        # Transaction-mode pgbouncer can hand each transaction a different server
+        # connection, so asyncpg must not rely on prepared statements surviving
+        connect_args["statement_cache_size"] = 0
+    return create_async_engine(
+        to_async_url(url),
+        echo=False,
+        connect_args=connect_args,
+        **pool_options(is_async=True)
+    )
+
+# Async engine used by the request handlers; background tasks and scripts keep the sync engine
+try:
+    ASYNC_DATABASE_URL = to_async_url(DATABASE_URL)
+    async_engine = create_async_db_engine(DATABASE_URL)
+    instrument_engine(async_engine, "primary_async")
+except Exception as e:
+    engine_errors["primary_async"] = e
+    async_engine = None
+
+# expire_on_commit=False: attributes must stay readable after commit without lazy IO
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Separate pool on the replica; without one, reads use the primary
+replica_async_engine = None
+AsyncReadSessionLocal = None
+if DATABASE_REPLICA_URL:
+    try:
+        replica_async_engine = create_async_db_engine(DATABASE_REPLICA_URL)
+        instrument_engine(replica_async_engine, "replica_async")
+        AsyncReadSessionLocal = async_sessionmaker(bind=replica_async_engine, autoflush=False, expire_on_commit=False)
+    except Exception as e:
+        # Reads use the primary instead
+        engine_errors["replica_async"] = e
+
 Base = declarative_base()
 
 def get_db():
@@ -41,6 +136,57 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    """Whether this user or client wrote recently enough that the replica may not have its write yet."""
+    from .auth import request_subject
+    
+    subject = request_subject(request)
+    if subject is not None and recent_writers.get(subject) is not None:
+        return True
+    try:
+        return float(request.cookies.get(PRIMARY_STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+def mark_primary_sticky(request: Request, response, now: float = None):
+    """
+    Pin reads to the primary for READ_YOUR_WRITES_SECONDS after a write: for
+    the authenticated user, and for this client through a cookie (which also
+    covers other workers when the frontend is served from the same site).
+    """
+    from .auth import request_subject
+    
+    subject = request_subject(request)
+    if subject is not None:
+        recent_writers.put(subject, True)
+    until = (now or time.time()) + READ_YOUR_WRITES_SECONDS
+    response.set_cookie(
+        key=PRIMARY_STICKY_COOKIE,
+        value=f"{until:.3f}",
+        max_age=READ_YOUR_WRITES_SECONDS,
+        httponly=True,
+        secure=False,
+        samesite="lax"
+    )
+
+async def get_read_db(request: Request, primary: AsyncSession = Depends(get_async_db)):
+    """
+    Session for read-only endpoints: the replica when one is configured,
+    otherwise (or right after this client wrote) the primary session.
+    
+    The primary session is shared with the rest of the request and only
+    connects if it is used.
+    """
+    if AsyncReadSessionLocal is None or reads_pinned_to_primary(request):
+        yield primary
+        return
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 def test_database_connection():
     """Test database connection with detailed error reporting."""
     if not engine:
@@ -61,11 +207,7 @@ def test_database_connection():
                 "status": "connected", 
                 "test_result": test_value,
                 "database_version": version.split()[0:2],  # PostgreSQL version
-                "connection_info": {
-                    "pool_size": engine.pool.size(),
-                    "checked_out": engine.pool.checkedout(),
-                    "overflow": engine.pool.overflow(),
-                }
+                "connection_info": pool_metrics["primary"].pool_status()
             }
     except Exception as e:
         error_msg = str(e)
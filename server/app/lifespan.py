@@ -0,0 +1,116 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from . import database, models
+from .services.gemini_service import gemini_service
+from .services.password_hashing import password_hasher
+from .services.pdf_extraction import pdf_extraction_pool
+from .services.supabase_storage import supabase_storage
+
+load_dotenv()
+
+# Only "development" creates missing tables on startup; every other environment,
+# including an unset APP_ENV, relies on migrations (python -m scripts.migrate)
+APP_ENV = os.getenv("APP_ENV", "production").lower()
+
+
+class StartupTimings:
+    """How long each startup component took, and whether it failed."""
+
+    def __init__(self):
+        self.components: Dict[str, dict] = {}
+        self.import_started_at = None  # Set by app.main as its first statement
+        self.started_at = None
+        self.ready_at = None
+
+    def record(self, name: str, seconds: float, error: Exception = None):
+        self.components[name] = {
+            "ms": round(seconds * 1000, 1),
+            "status": "error" if error else "ok",
+            # Only the exception class; the message (URLs, hosts) stays in the logs
+            **({"error": type(error).__name__} if error else {})
+        }
+
+    def _ms(self, start, end):
+        return round((end - start) * 1000, 1) if start is not None and end is not None else None
+
+    def stats(self) -> dict:
+        return {
+            "environment": APP_ENV,
+            "import_ms": self._ms(self.import_started_at, self.started_at),
+            "components": self.components,
+            "startup_ms": self._ms(self.started_at, self.ready_at),
+            "import_to_ready_ms": self._ms(self.import_started_at, self.ready_at)
+        }
+
+
+startup_timings = StartupTimings()
+
+
+def create_schema():
+    """Create missing tables (development only)."""
+    models.Base.metadata.create_all(bind=database.engine)
+
+
+def check_database_engines():
+    """Report engines that failed to be created when app.database was imported."""
+    if database.engine_errors:
+        raise RuntimeError("; ".join(f"{name} engine: {error}" for name, error in database.engine_errors.items()))
+
+
+def startup_components() -> Dict[str, Callable[[], None]]:
+    """Blocking initializers, by name; they do not depend on each other."""
+    components = {
+        "database_engines": check_database_engines,
+        "gemini": gemini_service.initialize,
+        "storage": supabase_storage.initialize,
+    }
+    if APP_ENV == "development":
+        components["database_schema"] = create_schema
+    return components
+
+
+async def _timed(name: str, initialize: Callable[[], None]):
+    start = time.perf_counter()
+    try:
+        await run_in_threadpool(initialize)
+    except Exception as e:
+        # A failed component is reported rather than stopping the app; its
+        # endpoints fail (or the service retries on first use) instead
+        print(f"❌ Startup: {name} failed: {e}")
+        startup_timings.record(name, time.perf_counter() - start, e)
+    else:
+        startup_timings.record(name, time.perf_counter() - start)
+
+
+async def initialize_components(components: Dict[str, Callable[[], None]]):
+    """Run the initializers concurrently in the threadpool, timing each."""
+    startup_timings.started_at = time.perf_counter()
+    await asyncio.gather(*(_timed(name, initialize) for name, initialize in components.items()))
+    startup_timings.ready_at = time.perf_counter()
+    timings = ", ".join(f"{name} {timing['ms']} ms" for name, timing in startup_timings.components.items())
+    print(f"✅ Startup finished in {startup_timings.stats()['startup_ms']:.0f} ms ({timings})")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await initialize_components(startup_components())
+    # Shared, bounded process pool for large PDF extractions
+    pdf_extraction_pool.start()
+    # The storage HTTP client is pooled on this event loop
+    await supabase_storage.open()
+    yield
+    await supabase_storage.aclose()
+    # Close pooled connections so workers shut down cleanly
+    for engine in (database.async_engine, database.replica_async_engine):
+        if engine is not None:
+            await engine.dispose()
+    if database.engine is not None:
+        database.engine.dispose()
+    password_hasher.shutdown()
+    pdf_extraction_pool.shutdown()
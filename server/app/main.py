@@ -1,21 +1,27 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+from typing import Optional
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine
-from . import models
+from . import database
+from .lifespan import lifespan, startup_timings
 from .routers import auth, materials, llm
+import hmac
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
-
+# Importing the app has no side effects: the schema (in development) and the
+# external services are set up by the lifespan handler when the server starts
 app = FastAPI(
     title="Study Assistant API",
     description="LLM-Powered Study Assistant Backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+startup_timings.import_started_at = _import_started
 
 # Configure CORS - Read allowed origins from environment variable
 cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:5173,http://localhost:3000")
@@ -29,6 +35,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """After a successful write, keep this user's reads on the primary until the replica catches up."""
+    response = await call_next(request)
+    if (
+        database.AsyncReadSessionLocal is not None
+        and request.method not in ("GET", "HEAD", "OPTIONS")
+        and response.status_code < 400
+    ):
+        database.mark_primary_sticky(request, response)
+    return response
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(materials.router)
@@ -58,4 +76,36 @@ def storage_health_check():
     return {
         "storage_service": "supabase",
         "configuration": supabase_storage.get_configuration_status()
+    }
+
+# /metrics is internal: it only answers requests carrying METRICS_TOKEN in the
+# X-Metrics-Token header, and is disabled when METRICS_TOKEN is not set
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+def require_metrics_token(x_metrics_token: Optional[str] = Header(None)):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    if x_metrics_token is None or not hmac.compare_digest(x_metrics_token.encode(), METRICS_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+
+@app.get("/metrics", dependencies=[Depends(require_metrics_token)], include_in_schema=False)
+def metrics():
+    """Runtime counters for caches and pools."""
+    from .services.extraction_cache import extraction_cache
+    from .services.pool_metrics import pool_stats
+    from .services.rate_limit import rate_limiter
+    from .services.text_compression import compression_metrics
+    from .services.user_cache import user_cache_stats
+    from .auth import token_cache
+    from .services.supabase_storage import supabase_storage
+    
+    return {
+        "extraction_cache": extraction_cache.stats(),
+        "text_compression": compression_metrics.stats(),
+        "db_pools": pool_stats(),
+        "user_cache": user_cache_stats(),
+        "token_cache": token_cache.stats(),
+        "signed_url_cache": supabase_storage.signed_url_cache.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "startup": startup_timings.stats()
     }
\ No newline at end of file
@@ -1,7 +1,16 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, LargeBinary, Index, JSON, DDL, event, inspect
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import Session, deferred, object_session, relationship
+from sqlalchemy.sql import expression, func
 from .database import Base
+from .services.text_compression import CompressedText
+
+# JSONB on Postgres (GIN-indexable), JSON on SQLite; None is stored as SQL NULL
+JSONDocument = JSON(none_as_null=True).with_variant(JSONB(none_as_null=True), "postgresql")
+
+# Full-text search vector on Postgres; SQLite searches the materials_fts FTS5 table
+# instead and leaves this column empty
+SearchVector = Text().with_variant(TSVECTOR(), "postgresql")
 
 class User(Base):
     __tablename__ = "users"
@@ -21,25 +30,135 @@ class Material(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText, nullable=False)  # zlib-compressed at rest above a size threshold
     file_type = Column(String, nullable=False)  # 'pdf' or 'text'
     file_url = Column(String, nullable=True)  # S3 URL for PDF files
+    raw_char_count = Column(Integer, nullable=True)  # Extracted size before normalization
+    char_count = Column(Integer, nullable=True)  # Size of the stored (normalized) content
+    ingestion_status = Column(String, nullable=False, default="complete", server_default="complete")  # 'extracting', 'complete' or 'failed'
     uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Weighted title/concepts/summary/content vector, maintained by services.material_search; never loaded with the row
+    search_vector = deferred(Column(SearchVector, nullable=True))
     
-    # Relationships
+    # History and listing queries filter by user and page newest first by (uploaded_at, id)
+    __table_args__ = (
+        Index("ix_materials_user_id_uploaded_at", user_id, uploaded_at.desc(), id.desc()),
+        Index("ix_materials_search_vector", search_vector, postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
+    # Relationships (children are removed by ON DELETE CASCADE in the database)
     owner = relationship("User", back_populates="materials")
-    generated_data = relationship("GeneratedData", back_populates="material")
+    generated_data = relationship(
+        "GeneratedData", back_populates="material", uselist=False,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+    pages = relationship(
+        "MaterialPage", back_populates="material", order_by="MaterialPage.page_no",
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+
+class MaterialPage(Base):
+    __tablename__ = "material_pages"
+    
+    material_id = Column(Integer, ForeignKey("materials.id", ondelete="CASCADE"), primary_key=True)
+    page_no = Column(Integer, primary_key=True)  # 1-based PDF page number
+    text = Column(Text, nullable=False)
+    char_count = Column(Integer, nullable=False)
+    hash = Column(String(64), nullable=False)  # SHA-256 of the page text
+    
+    # Relationships
+    material = relationship("Material", back_populates="pages")
 
 class GeneratedData(Base):
     __tablename__ = "generated_data"
     
     id = Column(Integer, primary_key=True, index=True)
-    material_id = Column(Integer, ForeignKey("materials.id"), nullable=False)
+    material_id = Column(Integer, ForeignKey("materials.id", ondelete="CASCADE"), nullable=False, unique=True, index=True)  # One row per material
     summary = Column(Text)
-    quiz_questions = Column(Text)  # JSON string of questions
-    key_concepts = Column(Text)    # JSON string of concepts
+    quiz_questions = Column(JSONDocument)  # List of question objects
+    key_concepts = Column(JSONDocument)    # List of concept strings
+    is_preliminary = Column(Boolean, nullable=False, default=False, server_default=expression.false())  # Built from the leading pages only
     generated_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Containment (@>) lookups by question difficulty or concept; GIN is Postgres-only
+    __table_args__ = (
+        Index(
+            "ix_generated_data_quiz_questions", quiz_questions,
+            postgresql_using="gin", postgresql_ops={"quiz_questions": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_generated_data_key_concepts", key_concepts,
+            postgresql_using="gin", postgresql_ops={"key_concepts": "jsonb_path_ops"}
+        ).ddl_if(dialect="postgresql"),
+    )
+    
     # Relationships
-    material = relationship("Material", back_populates="generated_data")
\ No newline at end of file
+    material = relationship("Material", back_populates="generated_data")
+
+class ExtractionCacheEntry(Base):
+    __tablename__ = "extraction_cache"
+    
+    cache_key = Column(String, primary_key=True)  # PDF SHA-256 + extractor version
+    data = Column(LargeBinary, nullable=False)    # zlib-compressed JSON of extracted pages
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Full-text search index maintenance. Core bulk inserts bypass these listeners;
+# scripts.reindex_search indexes such rows afterwards.
+event.listen(Material.__table__, "after_create", DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS materials_fts "
+    "USING fts5(title, concepts, summary, content, tokenize='porter unicode61')"
+).execute_if(dialect="sqlite"))
+event.listen(Material.__table__, "before_drop", DDL("DROP TABLE IF EXISTS materials_fts").execute_if(dialect="sqlite"))
+
+def _changed(target, *attributes) -> bool:
+    state = inspect(target)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+@event.listens_for(Material, "after_insert")
+@event.listens_for(Material, "after_update")
+def index_material_on_write(mapper, connection, target):
+    if _changed(target, "title", "content"):
+        from .services.material_search import index_materials
+        unloaded = inspect(target).unloaded
+        if unloaded & {"title", "content"}:
+            index_materials(connection, [target.id])
+            return
+        # Build the document from the values just written instead of reading
+        # back and decompressing the content
+        generated = None if "generated_data" in unloaded else {target.id: target.generated_data}
+        index_materials(connection, [target.id], generated, materials={target.id: target})
+
+@event.listens_for(GeneratedData, "after_insert")
+@event.listens_for(GeneratedData, "after_update")
+def index_generated_data_on_write(mapper, connection, target):
+    if _changed(target, "summary", "key_concepts"):
+        from .services.material_search import index_materials
+        index_materials(connection, [target.material_id])
+
+@event.listens_for(Material, "after_delete")
+def remove_material_from_index(mapper, connection, target):
+    from .services.material_search import remove_from_index
+    remove_from_index(connection, [target.id])
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def invalidate_cached_user(mapper, connection, target):
+    from .services.user_cache import invalidate_users
+    invalidate_users([target.id])
+    # Again after commit, in case a concurrent request re-cached the old row
+    # between this flush and the commit
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("changed_user_ids", set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def invalidate_cached_users_after_commit(session):
+    user_ids = session.info.pop("changed_user_ids", None)
+    if user_ids:
+        from .services.user_cache import invalidate_users
+        invalidate_users(user_ids)
+
+@event.listens_for(Session, "after_rollback")
+def forget_changed_users(session):
+    session.info.pop("changed_user_ids", None)
@@ -1,9 +1,11 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_async_db
+from ..services.password_hashing import password_hasher
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
@@ -12,11 +14,12 @@ def auth_welcome():
     return "Welcome"
 
 @router.post("/register", response_model=schemas.User)
-def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user."""
-    db_user = db.query(models.User).filter(
+    result = await db.execute(select(models.User).where(
         (models.User.email == user.email) | (models.User.username == user.username)
-    ).first()
+    ))
+    db_user = result.scalars().first()
     
     if db_user:
         raise HTTPException(
@@ -24,7 +27,7 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
             detail="Email or username already registered"
         )
     
-    hashed_password = auth.get_password_hash(user.password)
+    hashed_password = await password_hasher.hash_async(user.password)
     db_user = models.User(
         email=user.email,
         username=user.username,
@@ -32,19 +35,19 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=schemas.Token)
-def login_user(
+async def login_user(
     user_credentials: schemas.UserLogin, 
     response: Response,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Login user and return access token with cookie."""
-    user = auth.authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await auth.authenticate_user(db, user_credentials.email, user_credentials.password)
     
     if not user:
         raise HTTPException(
@@ -55,7 +58,7 @@ def login_user(
     
     access_token_expires = timedelta(minutes=auth.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = auth.create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+        data={"sub": str(user.id)}, expires_delta=access_token_expires
     )
     
     # Set the JWT token as an HTTP-only cookie
@@ -1,28 +1,82 @@
-import json
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer
 from .. import models, schemas, auth
-from ..database import get_db
+from ..database import get_async_db
 from ..services.gemini_service import gemini_service
+from ..services.generated_data import upsert_generated_data
+from ..services.material_pages import get_page_range_text
+from ..services.rate_limit import analysis_cost, concepts_cost, llm_rate_limit, quiz_cost, summary_cost
 
 router = APIRouter(prefix="/llm", tags=["llm"])
 
+async def load_material_content(
+    db: AsyncSession,
+    material_id: int,
+    user_id: int,
+    start_page: Optional[int] = None,
+    end_page: Optional[int] = None
+):
+    """
+    Load a material and the text to process.
+    
+    Without a page range this is the full Material.content. With one, only the
+    requested pages are read from material_pages and the content column is
+    never loaded.
+    """
+    query = select(models.Material).where(
+        models.Material.id == material_id,
+        models.Material.user_id == user_id
+    )
+    
+    if start_page is None and end_page is None:
+        material = (await db.execute(query)).scalars().first()
+        check_ingested(material)
+        return material, material.content if material else None
+    
+    if start_page is not None and end_page is not None and end_page < start_page:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_page must be greater than or equal to start_page"
+        )
+    
+    material = (await db.execute(query.options(defer(models.Material.content)))).scalars().first()
+    if not material:
+        return None, None
+    check_ingested(material)
+    return material, await get_page_range_text(db, material_id, start_page, end_page)
+
+def check_ingested(material: Optional[models.Material]):
+    """Reject processing while a progressively ingested material is still extracting."""
+    if material is not None and material.ingestion_status == "extracting":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Material is still being extracted. Please try again shortly."
+        )
+
+def page_range_info(start_page: Optional[int], end_page: Optional[int]):
+    """Describe the requested page range for responses, or None for the whole document."""
+    if start_page is None and end_page is None:
+        return None
+    return {"start_page": start_page, "end_page": end_page}
+
 @router.post("/generate-summary/{material_id}")
-def generate_summary(
+async def generate_summary(
     material_id: int,
     max_length: Optional[int] = Query(300, description="Maximum length of summary in words"),
+    start_page: Optional[int] = Query(None, ge=1, description="First page to process (PDF materials only)"),
+    end_page: Optional[int] = Query(None, ge=1, description="Last page to process, inclusive"),
+    charge: Callable[[], Awaitable[None]] = Depends(llm_rate_limit("generate_summary", summary_cost)),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate summary for uploaded material using Gemini AI."""
-    # Get material
-    material = db.query(models.Material).filter(
-        models.Material.id == material_id,
-        models.Material.user_id == current_user.id
-    ).first()
-
-    print(material)
+    # Get material and the content to process (full document or a page range)
+    material, content = await load_material_content(db, material_id, current_user.id, start_page, end_page)
+    page_range = page_range_info(start_page, end_page)
     
     if not material:
         raise HTTPException(
@@ -30,15 +84,17 @@ def generate_summary(
             detail="Material not found"
         )
     
-    if not material.content or len(material.content.strip()) < 10:
+    if not content or len(content.strip()) < 10:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Material content is too short to generate a meaningful summary"
         )
     
+    await charge()
+    
     # Generate summary using Gemini AI
     try:
-        summary = gemini_service.generate_summary(material.content, max_length)
+        summary = await run_in_threadpool(gemini_service.generate_summary, content, max_length)
     except HTTPException:
         raise
     except Exception as e:
@@ -47,44 +103,35 @@ def generate_summary(
             detail=f"Failed to generate summary: {str(e)}"
         )
     
-    # Check if generated data already exists
-    generated_data = db.query(models.GeneratedData).filter(
-        models.GeneratedData.material_id == material_id
-    ).first()
-    
-    if generated_data:
-        generated_data.summary = summary
-    else:
-        generated_data = models.GeneratedData(
-            material_id=material_id,
-            summary=summary
-        )
-        db.add(generated_data)
-    
-    db.commit()
-    db.refresh(generated_data)
+    # Page-range results are returned but not stored, so they never replace
+    # artifacts generated from the whole document
+    if page_range is None:
+        await upsert_generated_data(db, material_id, summary=summary)
+        await db.commit()
     
     return {
         "summary": summary,
         "material_id": material_id,
         "material_title": material.title,
+        "page_range": page_range,
         "word_count": len(summary.split())
     }
 
 @router.post("/generate-quiz/{material_id}")
-def generate_quiz(
+async def generate_quiz(
     material_id: int,
     num_mcq: Optional[int] = Query(10, description="Number of multiple choice questions to generate"),
     num_short: Optional[int] = Query(5, description="Number of short answer questions to generate"),
+    start_page: Optional[int] = Query(None, ge=1, description="First page to process (PDF materials only)"),
+    end_page: Optional[int] = Query(None, ge=1, description="Last page to process, inclusive"),
+    charge: Callable[[], Awaitable[None]] = Depends(llm_rate_limit("generate_quiz", quiz_cost)),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Generate quiz questions for uploaded material using Gemini AI."""
-    # Get material
-    material = db.query(models.Material).filter(
-        models.Material.id == material_id,
-        models.Material.user_id == current_user.id
-    ).first()
+    # Get material and the content to process (full document or a page range)
+    material, content = await load_material_content(db, material_id, current_user.id, start_page, end_page)
+    page_range = page_range_info(start_page, end_page)
     
     if not material:
         raise HTTPException(
@@ -92,7 +139,7 @@ def generate_quiz(
             detail="Material not found"
         )
     
-    if not material.content or len(material.content.strip()) < 50:
+    if not content or len(content.strip()) < 50:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Material content is too short to generate meaningful quiz questions"
@@ -111,9 +158,11 @@ def generate_quiz(
             detail="Number of short answer questions must be between 1 and 20"
         )
     
+    await charge()
+    
     # Generate quiz using Gemini AI
     try:
-        quiz_questions = gemini_service.generate_quiz(material.content, num_mcq, num_short)
+        quiz_questions = await run_in_threadpool(gemini_service.generate_quiz, content, num_mcq, num_short)
     except HTTPException:
         raise
     except Exception as e:
@@ -122,46 +171,35 @@ def generate_quiz(
             detail=f"Failed to generate quiz: {str(e)}"
         )
     
-    quiz_json = json.dumps(quiz_questions)
-    
-    # Check if generated data already exists
-    generated_data = db.query(models.GeneratedData).filter(
-        models.GeneratedData.material_id == material_id
-    ).first()
-    
-    if generated_data:
-        generated_data.quiz_questions = quiz_json
-    else:
-        generated_data = models.GeneratedData(
-            material_id=material_id,
-            quiz_questions=quiz_json
-        )
-        db.add(generated_data)
-    
-    db.commit()
-    db.refresh(generated_data)
+    # Page-range results are returned but not stored, so they never replace
+    # artifacts generated from the whole document
+    if page_range is None:
+        await upsert_generated_data(db, material_id, quiz_questions=quiz_questions)
+        await db.commit()
     
     return {
         "quiz_questions": quiz_questions,
         "material_id": material_id,
         "material_title": material.title,
+        "page_range": page_range,
         "total_questions": len(quiz_questions),
         "question_types": list(set(q.get("type", "unknown") for q in quiz_questions))
     }
 
 @router.post("/extract-concepts/{material_id}")
-def extract_concepts(
+async def extract_concepts(
     material_id: int,
     max_concepts: Optional[int] = Query(10, description="Maximum number of concepts to extract"),
+    start_page: Optional[int] = Query(None, ge=1, description="First page to process (PDF materials only)"),
+    end_page: Optional[int] = Query(None, ge=1, description="Last page to process, inclusive"),
+    charge: Callable[[], Awaitable[None]] = Depends(llm_rate_limit("extract_concepts", concepts_cost)),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Extract key concepts from uploaded material using Gemini AI."""
-    # Get material
-    material = db.query(models.Material).filter(
-        models.Material.id == material_id,
-        models.Material.user_id == current_user.id
-    ).first()
+    # Get material and the content to process (full document or a page range)
+    material, content = await load_material_content(db, material_id, current_user.id, start_page, end_page)
+    page_range = page_range_info(start_page, end_page)
     
     if not material:
         raise HTTPException(
@@ -169,7 +207,7 @@ def extract_concepts(
             detail="Material not found"
         )
     
-    if not material.content or len(material.content.strip()) < 20:
+    if not content or len(content.strip()) < 20:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Material content is too short to extract meaningful concepts"
@@ -182,8 +220,10 @@ def extract_concepts(
             detail="Maximum concepts must be between 1 and 50"
         )
     
+    await charge()
+    
     try:
-        key_concepts = gemini_service.extract_concepts(material.content, max_concepts)
+        key_concepts = await run_in_threadpool(gemini_service.extract_concepts, content, max_concepts)
     except HTTPException:
         raise
     except Exception as e:
@@ -192,48 +232,37 @@ def extract_concepts(
             detail=f"Failed to extract concepts: {str(e)}"
         )
     
-    concepts_json = json.dumps(key_concepts)
-    
-    # Check if generated data already exists
-    generated_data = db.query(models.GeneratedData).filter(
-        models.GeneratedData.material_id == material_id
-    ).first()
-    
-    if generated_data:
-        generated_data.key_concepts = concepts_json
-    else:
-        generated_data = models.GeneratedData(
-            material_id=material_id,
-            key_concepts=concepts_json
-        )
-        db.add(generated_data)
-    
-    db.commit()
-    db.refresh(generated_data)
+    # Page-range results are returned but not stored, so they never replace
+    # artifacts generated from the whole document
+    if page_range is None:
+        await upsert_generated_data(db, material_id, key_concepts=key_concepts)
+        await db.commit()
     
     return {
         "key_concepts": key_concepts,
         "material_id": material_id,
         "material_title": material.title,
+        "page_range": page_range,
         "total_concepts": len(key_concepts)
     }
 
 @router.post("/analyze-material/{material_id}")
-def analyze_material(
+async def analyze_material(
     material_id: int,
     max_summary_length: Optional[int] = Query(300, description="Maximum length of summary in words"),
     num_mcq: Optional[int] = Query(10, description="Number of multiple choice questions to generate"),
     num_short: Optional[int] = Query(5, description="Number of short answer questions to generate"),
     max_concepts: Optional[int] = Query(10, description="Maximum number of concepts to extract"),
+    start_page: Optional[int] = Query(None, ge=1, description="First page to process (PDF materials only)"),
+    end_page: Optional[int] = Query(None, ge=1, description="Last page to process, inclusive"),
+    charge: Callable[[], Awaitable[None]] = Depends(llm_rate_limit("analyze_material", analysis_cost)),
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Comprehensive analysis: generate summary, quiz, and extract concepts in one call."""
-    # Get material
-    material = db.query(models.Material).filter(
-        models.Material.id == material_id,
-        models.Material.user_id == current_user.id
-    ).first()
+    # Get material and the content to process (full document or a page range)
+    material, content = await load_material_content(db, material_id, current_user.id, start_page, end_page)
+    page_range = page_range_info(start_page, end_page)
     
     if not material:
         raise HTTPException(
@@ -241,18 +270,20 @@ def analyze_material(
             detail="Material not found"
         )
     
-    if not material.content or len(material.content.strip()) < 50:
+    if not content or len(content.strip()) < 50:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Material content is too short for comprehensive analysis"
         )
     
+    await charge()
+    
     results = {}
     errors = {}
     
     # Generate summary
     try:
-        summary = gemini_service.generate_summary(material.content, max_summary_length)
+        summary = await run_in_threadpool(gemini_service.generate_summary, content, max_summary_length)
         results["summary"] = summary
     except Exception as e:
         errors["summary"] = str(e)
@@ -260,7 +291,7 @@ def analyze_material(
     
     # Generate quiz
     try:
-        quiz_questions = gemini_service.generate_quiz(material.content, num_mcq, num_short)
+        quiz_questions = await run_in_threadpool(gemini_service.generate_quiz, content, num_mcq, num_short)
         results["quiz_questions"] = quiz_questions
     except Exception as e:
         errors["quiz"] = str(e)
@@ -268,40 +299,24 @@ def analyze_material(
     
     # Extract concepts
     try:
-        key_concepts = gemini_service.extract_concepts(material.content, max_concepts)
+        key_concepts = await run_in_threadpool(gemini_service.extract_concepts, content, max_concepts)
         results["key_concepts"] = key_concepts
     except Exception as e:
         errors["concepts"] = str(e)
         results["key_concepts"] = []
     
-    # Save to database if at least one operation succeeded
-    if any(results.values()):
-        generated_data = db.query(models.GeneratedData).filter(
-            models.GeneratedData.material_id == material_id
-        ).first()
-        
-        if generated_data:
-            if results["summary"]:
-                generated_data.summary = results["summary"]
-            if results["quiz_questions"]:
-                generated_data.quiz_questions = json.dumps(results["quiz_questions"])
-            if results["key_concepts"]:
-                generated_data.key_concepts = json.dumps(results["key_concepts"])
-        else:
-            generated_data = models.GeneratedData(
-                material_id=material_id,
-                summary=results["summary"],
-                quiz_questions=json.dumps(results["quiz_questions"]) if results["quiz_questions"] else None,
-                key_concepts=json.dumps(results["key_concepts"]) if results["key_concepts"] else None
-            )
-            db.add(generated_data)
-        
-        db.commit()
-        db.refresh(generated_data)
+    # Save to database if at least one operation succeeded (whole-document runs only)
+    if page_range is None and any(results.values()):
+        # Only successful artifacts are written, so failures keep earlier results
+        await upsert_generated_data(db, material_id, **{
+            column: value for column, value in results.items() if value
+        })
+        await db.commit()
     
     response = {
         "material_id": material_id,
         "material_title": material.title,
+        "page_range": page_range,
         "analysis_results": results,
         "success_count": sum(1 for v in results.values() if v),
         "total_operations": 3
@@ -1,17 +1,37 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, BackgroundTasks
-from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer, joinedload
 from .. import models, schemas, auth
-from ..database import get_db
-from ..services.supabase_storage import supabase_storage
+from ..database import get_async_db, get_read_db
+from ..services.supabase_storage import run_storage_sync, supabase_storage
 from ..services.gemini_service import gemini_service
-import PyPDF2
-import io
-import json
+from ..services.pdf_extraction import ExtractedPage, join_pages, joined_length
+from ..services.material_pages import build_page_rows, page_range_query
+from ..services.generated_data import upsert_generated_data_sync
+from ..services.json_queries import json_array_contains, json_array_has_field, json_array_length
+from ..services.material_search import index_materials, remove_from_index, search_materials, search_terms
+from ..services.pagination import encode_cursor, decode_cursor
+from ..services.upload_spool import SpooledUpload, spool_multipart_file, MAX_UPLOAD_SIZE, MB
+from ..services.text_normalization import normalize_pages
+from ..services.progressive_ingestion import (
+    PROGRESSIVE_INGESTION_MIN_PAGES,
+    PROGRESSIVE_TOKEN_BUDGET,
+    notify_at_token_budget,
+    stream_pdf_pages
+)
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/materials", tags=["materials"])
 
+# Most materials one bulk-delete request removes
+BULK_DELETE_LIMIT = 1000
+
 # Pydantic model for text upload
 class TextUpload(BaseModel):
     title: str
@@ -70,15 +90,15 @@ def auto_process_with_llm_background(material_id: int, content: str, db_session)
         except Exception as e:
             print(f"❌ Failed to create quiz questions: {e}")
         
-        # Save all generated data to database
+        # Save all generated data to database, refining any preliminary results
         if summary or quiz_questions or key_concepts:
-            generated_data = models.GeneratedData(
-                material_id=material_id,
-                summary=summary,
-                quiz_questions=json.dumps(quiz_questions) if quiz_questions else None,
-                key_concepts=json.dumps(key_concepts) if key_concepts else None
-            )
-            db.add(generated_data)
+            values = {"summary": summary, "quiz_questions": quiz_questions, "key_concepts": key_concepts}
+            values = {column: value for column, value in values.items() if value}
+            # A preliminary row stays marked until both of its artifacts have
+            # been refined; a failed one keeps its preliminary value
+            if summary and key_concepts:
+                values["is_preliminary"] = False
+            upsert_generated_data_sync(db, material_id, **values)
             db.commit()
             print(f"💾 LLM data saved for material ID: {material_id}")
         else:
@@ -90,6 +110,144 @@ def auto_process_with_llm_background(material_id: int, content: str, db_session)
     finally:
         db.close()
 
+def preliminary_llm_background(material_id: int, content: str, abandoned: Optional[threading.Event] = None):
+    """
+    Generate a preliminary summary and key concepts from the leading pages of
+    a material that is still being extracted. auto_process_with_llm_background
+    refines them once the full content is available. Nothing is generated or
+    stored once `abandoned` is set (the ingestion failed).
+    """
+    from ..database import SessionLocal
+    
+    db = SessionLocal()
+    
+    try:
+        if not gemini_service.is_configured() or (abandoned is not None and abandoned.is_set()):
+            return
+        
+        print(f"⚡ Generating preliminary summary for material ID: {material_id} ({len(content)} characters)")
+        summary = None
+        key_concepts = None
+        
+        try:
+            summary = gemini_service.generate_summary(content, max_length=300)
+        except Exception as e:
+            print(f"❌ Failed to generate preliminary summary: {e}")
+        
+        try:
+            key_concepts = gemini_service.extract_concepts(content, max_concepts=10)
+        except Exception as e:
+            print(f"❌ Failed to extract preliminary key concepts: {e}")
+        
+        if abandoned is not None and abandoned.is_set():
+            print(f"⚠ Ingestion failed, discarding preliminary LLM data for material ID: {material_id}")
+        elif summary or key_concepts:
+            upsert_generated_data_sync(
+                db, material_id,
+                summary=summary,
+                key_concepts=key_concepts or None,
+                is_preliminary=True
+            )
+            db.commit()
+            print(f"💾 Preliminary LLM data saved for material ID: {material_id}")
+    
+    except Exception as e:
+        print(f"❌ Error in preliminary LLM processing: {e}")
+        db.rollback()
+    finally:
+        db.close()
+
+def progressive_ingest_pdf_background(
+    material_id: int,
+    spool: SpooledUpload,
+    extraction: Tuple[int, Iterator[ExtractedPage]],
+    file_name: str,
+    content_type: str,
+    user_id: int
+):
+    """
+    Background ingestion for large PDFs.
+    
+    Pages stream from the extractor through a generator pipeline, starting
+    from the `extraction` (page count, pages) the upload handler opened. As
+    soon as the leading pages reach PROGRESSIVE_TOKEN_BUDGET tokens a
+    preliminary summary and concept set is generated alongside the remaining
+    extraction. Once every page is extracted the material is completed and
+    the full LLM processing refines the preliminary results. If ingestion
+    fails, preliminary results are discarded. Takes ownership of `spool`.
+    """
+    from ..database import SessionLocal
+    
+    db = SessionLocal()
+    # One thread for the storage upload, one for the preliminary LLM calls
+    executor = ThreadPoolExecutor(max_workers=2)
+    preliminary = []
+    failed = threading.Event()
+    file_url = None
+    content = None
+    
+    def upload():
+        with spool.open() as upload_stream:
+            return run_storage_sync(supabase_storage.upload_file(
+                file_content=upload_stream,
+                file_name=file_name,
+                content_type=content_type,
+                user_id=user_id
+            ))
+    
+    def start_preliminary(leading_text: str):
+        print(f"⚡ Token budget reached for material ID: {material_id}, extraction continues")
+        preliminary.append(executor.submit(preliminary_llm_background, material_id, leading_text, failed))
+    
+    upload_future = executor.submit(upload)
+    try:
+        page_count, raw_pages = extraction
+        raw_pages = list(notify_at_token_budget(raw_pages, PROGRESSIVE_TOKEN_BUDGET, start_preliminary))
+        pages, stats = normalize_pages(raw_pages)
+        content = join_pages(pages, page_count)
+        file_url = upload_future.result()
+        # Preliminary results must be stored before the refinement replaces them
+        wait(preliminary)
+        
+        material = db.get(models.Material, material_id)
+        material.content = content
+        material.file_url = file_url
+        material.raw_char_count = joined_length(raw_pages, page_count)
+        material.char_count = len(content)
+        material.pages = build_page_rows(material_id, pages)
+        material.ingestion_status = "complete"
+        db.commit()
+        print(f"✅ Progressive ingestion finished for material ID: {material_id} ({page_count} pages, ~{stats['tokens_saved']} tokens saved per LLM call)")
+    except Exception as e:
+        print(f"❌ Progressive ingestion failed for material ID: {material_id}: {e}")
+        db.rollback()
+        content = None
+        # Stop preliminary calls that have not stored anything yet, then drop
+        # what was stored before the failure
+        failed.set()
+        wait(preliminary)
+        db.query(models.GeneratedData).filter(
+            models.GeneratedData.material_id == material_id,
+            models.GeneratedData.is_preliminary.is_(True)
+        ).delete(synchronize_session=False)
+        index_materials(db.connection(), [material_id])
+        wait([upload_future])
+        if file_url is None and upload_future.exception() is None:
+            file_url = upload_future.result()
+        if file_url:
+            run_storage_sync(supabase_storage.delete_file(file_url))
+        material = db.get(models.Material, material_id)
+        if material is not None:
+            material.ingestion_status = "failed"
+            db.commit()
+    finally:
+        executor.shutdown()
+        spool.close()
+        db.close()
+    
+    if content is not None:
+        auto_process_with_llm_background(material_id=material_id, content=content, db_session=None)
+
 async def auto_process_with_llm(material: models.Material, db: Session):
     """
     Legacy function - kept for compatibility.
@@ -132,15 +290,13 @@ async def auto_process_with_llm(material: models.Material, db: Session):
         
         # Save all generated data to database
         if summary or quiz_questions or key_concepts:
-            generated_data = models.GeneratedData(
-                material_id=material.id,
+            generated_data = upsert_generated_data_sync(
+                db, material.id,
                 summary=summary,
-                quiz_questions=json.dumps(quiz_questions) if quiz_questions else None,
-                key_concepts=json.dumps(key_concepts) if key_concepts else None
+                quiz_questions=quiz_questions or None,
+                key_concepts=key_concepts or None
             )
-            db.add(generated_data)
             db.commit()
-            db.refresh(generated_data)
             
             print(f"💾 All LLM-generated data saved to database for material: {material.title}")
             return generated_data
@@ -152,92 +308,247 @@ async def auto_process_with_llm(material: models.Material, db: Session):
         print(f"❌ Error in automatic LLM processing: {e}")
         return None
 
-@router.post("/upload-material", response_model=schemas.Material)
+async def store_and_extract_pdf(
+    spool: SpooledUpload,
+    file_name: str,
+    content_type: str,
+    user_id: int,
+    extraction: Optional[Tuple[int, Iterator[ExtractedPage]]] = None,
+    cancel_extraction: Optional[threading.Event] = None
+):
+    """
+    Upload a spooled PDF to storage while extracting its text.
+    
+    `extraction` is the (page count, pages) stream from stream_pdf_pages when
+    the caller already opened the PDF, with `cancel_extraction` as its cancel
+    event; otherwise the PDF is opened here.
+    
+    Returns (content, pages, raw_char_count, file_url) once both finish. Pages
+    are normalized at ingestion so every later LLM call reads the cleaned text;
+    raw_char_count is the size before normalization. If either side fails, the
+    extraction is cancelled and any uploaded object is deleted, so a failed
+    upload never leaves an orphaned file behind.
+    """
+    cancel_extraction = cancel_extraction or threading.Event()
+    
+    async def upload():
+        # Stream the upload from the spool rather than an in-memory copy
+        with spool.open() as upload_stream:
+            return await supabase_storage.upload_file(
+                file_content=upload_stream,
+                file_name=file_name,
+                content_type=content_type,
+                user_id=user_id
+            )
+    
+    def extract():
+        # Cached by PDF hash; on a miss large PDFs are sharded across worker processes
+        page_count, raw_pages = extraction or stream_pdf_pages(spool.source(), spool.sha256, cancel_extraction)
+        raw_pages = list(raw_pages)
+        pages, stats = normalize_pages(raw_pages)
+        print(
+            f"🧹 Normalized {stats['raw_chars']} -> {stats['normalized_chars']} characters "
+            f"({stats['boilerplate_lines']} boilerplate lines, ~{stats['tokens_saved']} tokens saved per LLM call)"
+        )
+        return page_count, pages, joined_length(raw_pages, page_count)
+    
+    upload_task = asyncio.ensure_future(upload())
+    extract_task = asyncio.ensure_future(run_in_threadpool(extract))
+    
+    async def cleanup_upload(task):
+        if not task.cancelled() and task.exception() is None:
+            print(f"🧹 Removing uploaded file after failed upload: {task.result()}")
+            await supabase_storage.delete_file(task.result())
+    
+    try:
+        await asyncio.wait({upload_task, extract_task}, return_when=asyncio.FIRST_EXCEPTION)
+    except asyncio.CancelledError:
+        # Request cancelled: stop extracting and clean up once the upload returns
+        cancel_extraction.set()
+        loop = asyncio.get_running_loop()
+        upload_task.add_done_callback(lambda task: loop.create_task(cleanup_upload(task)))
+        raise
+    
+    # asyncio.wait returns once both succeeded or as soon as one raised
+    failed = [task for task in (upload_task, extract_task) if task.done() and task.exception() is not None]
+    if not failed:
+        page_count, pages, raw_char_count = extract_task.result()
+        file_url = upload_task.result()
+        print(f"PDF uploaded successfully: {file_url}")
+        return join_pages(pages, page_count), pages, raw_char_count, file_url
+    
+    cancel_extraction.set()
+    await asyncio.gather(upload_task, extract_task, return_exceptions=True)
+    await cleanup_upload(upload_task)
+    
+    upload_error = upload_task.exception()
+    if upload_error is not None:
+        if isinstance(upload_error, HTTPException):
+            raise upload_error
+        print(f"File upload error: {upload_error}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to upload PDF file: {str(upload_error)}"
+        )
+    
+    extract_error = extract_task.exception()
+    print(f"PDF extraction error: {extract_error}")
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail=f"Failed to extract text from PDF: {str(extract_error)}"
+    )
+
+# The body is parsed by spool_multipart_file rather than File(...), so the
+# multipart schema is declared here to keep it in the API docs
+UPLOAD_MATERIAL_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}}
+                }
+            }
+        }
+    }
+}
+
+@router.post("/upload-material", response_model=schemas.Material, openapi_extra=UPLOAD_MATERIAL_BODY)
 async def upload_material(
+    request: Request,
     background_tasks: BackgroundTasks,
     title: str,
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Upload study material (PDF or text file). AI processing happens in background for instant response."""
     content = ""
     file_type = ""
     file_url = None
+    pages = []
+    raw_char_count = None
     
-    # Read file content
-    file_content = await file.read()
+    # Reject oversized requests before streaming anything
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE + MB:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum upload size is {MAX_UPLOAD_SIZE // MB} MB."
+        )
     
-    # Process file based on type
-    if file.content_type == "application/pdf":
-        file_type = "pdf"
-        
-        # Extract text content from PDF with better formatting preservation
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-        for page_num, page in enumerate(pdf_reader.pages):
-            page_text = page.extract_text()
-            if page_text.strip():  # Only add non-empty pages
-                content += page_text
-                # Add page separator for multi-page PDFs
-                if page_num < len(pdf_reader.pages) - 1:
-                    content += "\n\n--- Page {} ---\n\n".format(page_num + 2)
-        
-        # Upload PDF to Supabase Storage
-        if not supabase_storage.supabase:
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Storage service is not configured. Please check Supabase settings."
-            )
-        
-        try:
-            file_url = supabase_storage.upload_file(
-                file_content=file_content,
-                file_name=file.filename or f"{title}.pdf",
-                content_type=file.content_type,
-                user_id=current_user.id
-            )
-            print(f"PDF uploaded successfully: {file_url}")
+    # Stream the file part into a bounded spool as the body arrives
+    spool = await spool_multipart_file(request)
+    spool_handed_off = False
+    
+    try:
+        # Process file based on type
+        if spool.content_type == "application/pdf":
+            file_type = "pdf"
             
-        except HTTPException:
-            raise  # Re-raise HTTP exceptions
-        except Exception as e:
-            print(f"File upload error: {e}")
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload PDF file: {str(e)}"
+            # Upload PDF to Supabase Storage
+            if not supabase_storage.is_configured():
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Storage service is not configured. Please check Supabase settings."
+                )
+            
+            # The PDF is opened once: its page count picks the path and the
+            # same page stream is extracted (cached extractions are replayed)
+            cancel_extraction = threading.Event()
+            try:
+                extraction = await run_in_threadpool(stream_pdf_pages, spool.source(), spool.sha256, cancel_extraction)
+            except Exception:
+                extraction = None  # Unreadable PDFs are reported by the extraction below
+            page_count = extraction[0] if extraction else 0
+            
+            if page_count >= PROGRESSIVE_INGESTION_MIN_PAGES:
+                # Large PDFs: respond now and extract in the background, so
+                # preliminary results arrive before the last page is extracted
+                db_material = models.Material(
+                    title=title,
+                    content="",
+                    file_type=file_type,
+                    file_url=None,
+                    ingestion_status="extracting",
+                    user_id=current_user.id
+                )
+                db.add(db_material)
+                await db.commit()
+                await db.refresh(db_material)
+                
+                background_tasks.add_task(
+                    progressive_ingest_pdf_background,
+                    material_id=db_material.id,
+                    spool=spool,
+                    extraction=extraction,
+                    file_name=spool.filename or f"{title}.pdf",
+                    content_type=spool.content_type,
+                    user_id=current_user.id
+                )
+                spool_handed_off = True
+                
+                print(f"✅ Large PDF ({page_count} pages) accepted. Progressive ingestion queued in background.")
+                return db_material
+            
+            # Storage upload and text extraction run concurrently from the same spool
+            content, pages, raw_char_count, file_url = await store_and_extract_pdf(
+                spool,
+                file_name=spool.filename or f"{title}.pdf",
+                content_type=spool.content_type,
+                user_id=current_user.id,
+                extraction=extraction,
+                cancel_extraction=cancel_extraction
             )
             
-    elif file.content_type == "text/plain":
-        file_type = "text"
-        # Try different encodings to preserve original formatting
-        try:
-            content = file_content.decode("utf-8")
-        except UnicodeDecodeError:
+        elif spool.content_type == "text/plain":
+            file_type = "text"
+            file_content = spool.read_bytes()
+            # Try different encodings to preserve original formatting
             try:
-                content = file_content.decode("utf-8-sig")  # UTF-8 with BOM
+                content = file_content.decode("utf-8")
             except UnicodeDecodeError:
                 try:
-                    content = file_content.decode("latin-1")
+                    content = file_content.decode("utf-8-sig")  # UTF-8 with BOM
                 except UnicodeDecodeError:
-                    content = file_content.decode("utf-8", errors="replace")
-        
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unsupported file type. Please upload PDF or text files only."
-        )
+                    try:
+                        content = file_content.decode("latin-1")
+                    except UnicodeDecodeError:
+                        content = file_content.decode("utf-8", errors="replace")
+            
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unsupported file type. Please upload PDF or text files only."
+            )
+    
+    finally:
+        if not spool_handed_off:
+            spool.close()
     
     db_material = models.Material(
         title=title,
         content=content,
         file_type=file_type,
         file_url=file_url,
+        raw_char_count=len(content) if raw_char_count is None else raw_char_count,
+        char_count=len(content),
         user_id=current_user.id
     )
+    # Per-page rows for lazy loading and page-range operations
+    db_material.pages = build_page_rows(None, pages)
     
-    db.add(db_material)
-    db.commit()
-    db.refresh(db_material)
+    try:
+        db.add(db_material)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        # Don't leave an uploaded object without a material row
+        if file_url:
+            await supabase_storage.delete_file(file_url)
+        raise
+    await db.refresh(db_material)
     
     # Process with LLM in background for instant response
     background_tasks.add_task(
@@ -255,7 +566,7 @@ async def upload_material(
 async def upload_text(
     background_tasks: BackgroundTasks,
     text_data: TextUpload,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     """Upload text content directly."""
@@ -285,12 +596,14 @@ async def upload_text(
         content=text_data.content,  # Don't strip content to preserve formatting
         file_type="text",
         file_url=None,  # No file URL for direct text input
+        raw_char_count=len(text_data.content),
+        char_count=len(text_data.content),
         user_id=current_user.id
     )
     
     db.add(db_material)
-    db.commit()
-    db.refresh(db_material)
+    await db.commit()
+    await db.refresh(db_material)
     
     # Process with LLM in background for instant response
     background_tasks.add_task(
@@ -305,39 +618,162 @@ async def upload_text(
     return db_material
 
 @router.get("/get-history", response_model=List[schemas.MaterialWithGenerated])
-def get_user_history(
+async def get_user_history(
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get user's material upload history."""
-    materials = db.query(models.Material).filter(
+    # Generated data is joined into the same query instead of one query per material
+    result = await db.execute(select(models.Material).options(
+        joinedload(models.Material.generated_data)
+    ).where(
         models.Material.user_id == current_user.id
-    ).order_by(models.Material.uploaded_at.desc()).all()
+    ).order_by(models.Material.uploaded_at.desc()))
+    materials = result.scalars().all()
     
-    result = []
-    for material in materials:
-        generated_data = db.query(models.GeneratedData).filter(
-            models.GeneratedData.material_id == material.id
-        ).first()
-        
-        result.append({
+    return [
+        {
             "material": material,
-            "generated_data": generated_data
-        })
+            "generated_data": material.generated_data
+        }
+        for material in materials
+    ]
+
+@router.get("", response_model=schemas.MaterialList)
+async def list_materials(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of materials per response"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous response"),
+    concept: Optional[str] = Query(None, description="Only materials whose key concepts include this concept"),
+    difficulty: Optional[str] = Query(None, description="Only materials with a quiz question of this difficulty"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """List the user's materials newest first, without content or generated text."""
+    generated = models.GeneratedData
+    dialect = db.get_bind().dialect.name
+    query = select(
+        models.Material,
+        # Content is stored compressed, so its length comes from char_count (backfilled by migration 0007)
+        func.coalesce(models.Material.char_count, 0).label("content_length"),
+        generated.summary.isnot(None).label("has_summary"),
+        generated.quiz_questions.isnot(None).label("has_quiz"),
+        generated.key_concepts.isnot(None).label("has_key_concepts"),
+        json_array_length(generated.quiz_questions, dialect).label("question_count")
+    ).options(
+        # Content is never loaded for list items; accessing it would raise
+        defer(models.Material.content, raiseload=True)
+    ).outerjoin(
+        generated, generated.material_id == models.Material.id
+    ).where(
+        models.Material.user_id == current_user.id
+    )
+    
+    if concept:
+        query = query.where(json_array_contains(generated.key_concepts, concept, dialect))
+    if difficulty:
+        query = query.where(json_array_has_field(generated.quiz_questions, "difficulty", difficulty, dialect))
+    
+    if cursor:
+        uploaded_at, last_id = decode_cursor(cursor)
+        # Compare against the stored timestamp of the last row so the database's
+        # own datetime representation is used; fall back to the cursor value if
+        # that row has since been deleted
+        anchor = func.coalesce(
+            select(models.Material.uploaded_at).where(models.Material.id == last_id).scalar_subquery(),
+            uploaded_at
+        )
+        query = query.where(or_(
+            models.Material.uploaded_at < anchor,
+            and_(models.Material.uploaded_at == anchor, models.Material.id < last_id)
+        ))
+    
+    # Fetch one extra row to know whether another page follows
+    result = await db.execute(query.order_by(
+        models.Material.uploaded_at.desc(),
+        models.Material.id.desc()
+    ).limit(limit + 1))
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1].Material
+        next_cursor = encode_cursor(last.uploaded_at, last.id)
+    
+    items = [
+        {
+            "id": row.Material.id,
+            "title": row.Material.title,
+            "file_type": row.Material.file_type,
+            "uploaded_at": row.Material.uploaded_at,
+            "content_length": row.content_length or 0,
+            "ingestion_status": row.Material.ingestion_status,
+            "has_summary": bool(row.has_summary),
+            "has_quiz": bool(row.has_quiz),
+            "has_key_concepts": bool(row.has_key_concepts),
+            "question_count": row.question_count or 0
+        }
+        for row in rows
+    ]
+    
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/search", response_model=schemas.MaterialSearchResults)
+async def search_user_materials(
+    q: str = Query(..., min_length=1, max_length=200, description="Words to search for in titles, content, summaries and key concepts"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results per response"),
+    offset: int = Query(0, ge=0, le=1000, description="next_offset from the previous response"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Full-text search over the user's materials, best matches first, with highlighted snippets."""
+    if not search_terms(q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Search query must contain at least one word"
+        )
+    
+    items, has_more = await search_materials(db, current_user.id, q, limit, offset)
+    
+    return {"items": items, "next_offset": offset + limit if has_more else None}
+
+@router.get("/download-urls", response_model=schemas.MaterialDownloadUrls)
+async def get_download_urls(
+    ids: List[int] = Query(..., min_length=1, max_length=100, description="Material ids, e.g. the items of a listing page"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get download URLs for several materials, signed with one storage call. Materials without a file are left out."""
+    result = await db.execute(select(models.Material.id, models.Material.file_url).where(
+        models.Material.id.in_(ids),
+        models.Material.user_id == current_user.id,
+        models.Material.file_url.isnot(None)
+    ))
+    file_urls = dict(result.all())
+    
+    download_urls = {file_url: file_url for file_url in file_urls.values()}
+    if supabase_storage.is_configured():
+        download_urls = await supabase_storage.generate_presigned_urls(list(download_urls))
     
-    return result
+    return {
+        "items": [
+            {"id": material_id, "download_url": download_urls[file_urls[material_id]]}
+            for material_id in dict.fromkeys(ids) if material_id in file_urls
+        ]
+    }
 
 @router.get("/{material_id}", response_model=schemas.MaterialWithGenerated)
-def get_material(
+async def get_material(
     material_id: int,
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get specific material by ID."""
-    material = db.query(models.Material).filter(
+    result = await db.execute(select(models.Material).where(
         models.Material.id == material_id,
         models.Material.user_id == current_user.id
-    ).first()
+    ))
+    material = result.scalars().first()
     
     if not material:
         raise HTTPException(
@@ -345,26 +781,75 @@ def get_material(
             detail="Material not found"
         )
     
-    generated_data = db.query(models.GeneratedData).filter(
+    result = await db.execute(select(models.GeneratedData).where(
         models.GeneratedData.material_id == material.id
-    ).first()
+    ))
+    generated_data = result.scalars().first()
     
     return {
         "material": material,
         "generated_data": generated_data
     }
 
+@router.get("/{material_id}/pages", response_model=schemas.MaterialPageRange)
+async def get_material_pages(
+    material_id: int,
+    start_page: int = Query(1, ge=1, description="First page number to return"),
+    end_page: Optional[int] = Query(None, ge=1, description="Last page number to return (inclusive)"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of pages per response"),
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Get a range of a material's pages without loading the full content."""
+    result = await db.execute(select(models.Material.id).where(
+        models.Material.id == material_id,
+        models.Material.user_id == current_user.id
+    ))
+    material_exists = result.first()
+    
+    if not material_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Material not found"
+        )
+    
+    if end_page is not None and end_page < start_page:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_page must be greater than or equal to start_page"
+        )
+    
+    # Fetch one extra row to know whether another page follows
+    result = await db.execute(page_range_query(material_id, start_page, end_page).limit(limit + 1))
+    pages = result.scalars().all()
+    next_page = None
+    if len(pages) > limit:
+        next_page = pages[limit].page_no
+        pages = pages[:limit]
+    
+    total_pages = await db.scalar(select(func.count(models.MaterialPage.page_no)).where(
+        models.MaterialPage.material_id == material_id
+    ))
+    
+    return {
+        "material_id": material_id,
+        "total_pages": total_pages,
+        "pages": pages,
+        "next_page": next_page
+    }
+
 @router.delete("/{material_id}")
-def delete_material(
+async def delete_material(
     material_id: int,
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a material and its associated file."""
-    material = db.query(models.Material).filter(
+    result = await db.execute(select(models.Material).where(
         models.Material.id == material_id,
         models.Material.user_id == current_user.id
-    ).first()
+    ))
+    material = result.scalars().first()
     
     if not material:
         raise HTTPException(
@@ -373,9 +858,9 @@ def delete_material(
         )
     
     # Delete file from Supabase Storage if it exists
-    if material.file_url and supabase_storage.supabase:
+    if material.file_url and supabase_storage.is_configured():
         try:
-            success = supabase_storage.delete_file(material.file_url)
+            success = await supabase_storage.delete_file(material.file_url)
             if success:
                 print(f"File deleted successfully: {material.file_url}")
             else:
@@ -383,27 +868,98 @@ def delete_material(
         except Exception as e:
             print(f"Error deleting file: {e}")
     
-    db.query(models.GeneratedData).filter(
-        models.GeneratedData.material_id == material_id
-    ).delete()
-    
-    # Delete material
-    db.delete(material)
-    db.commit()
+    # Generated data and pages are removed by ON DELETE CASCADE
+    await db.delete(material)
+    await db.commit()
     
     return {"message": "Material deleted successfully"}
 
+@router.post("/bulk-delete", response_model=schemas.MaterialBulkDeleteResponse)
+async def bulk_delete_materials(
+    selection: schemas.MaterialBulkDelete,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Delete many materials, selected by id and/or upload date, in one transaction.
+    
+    Stored files are removed in batches after the rows are gone. A date filter
+    deletes at most BULK_DELETE_LIMIT materials per request (oldest first);
+    has_more says to repeat the request.
+    """
+    if selection.ids is None and selection.uploaded_before is None and selection.uploaded_after is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide ids or an upload date filter"
+        )
+    
+    query = select(models.Material.id, models.Material.file_url).where(
+        models.Material.user_id == current_user.id
+    )
+    if selection.ids is not None:
+        query = query.where(models.Material.id.in_(selection.ids))
+    if selection.uploaded_before is not None:
+        query = query.where(models.Material.uploaded_at < selection.uploaded_before)
+    if selection.uploaded_after is not None:
+        query = query.where(models.Material.uploaded_at >= selection.uploaded_after)
+    
+    # Fetch one extra row to know whether more materials match
+    result = await db.execute(query.order_by(
+        models.Material.uploaded_at, models.Material.id
+    ).limit(BULK_DELETE_LIMIT + 1))
+    rows = result.all()
+    has_more = len(rows) > BULK_DELETE_LIMIT
+    rows = rows[:BULK_DELETE_LIMIT]
+    file_urls = {row.id: row.file_url for row in rows}
+    
+    if file_urls:
+        # Generated data and pages are removed by ON DELETE CASCADE; the
+        # search entries are not rows of materials, so they go explicitly
+        await db.execute(
+            delete(models.Material).where(
+                models.Material.id.in_(file_urls),
+                models.Material.user_id == current_user.id
+            ).execution_options(synchronize_session=False)
+        )
+        await db.run_sync(lambda session: remove_from_index(session.connection(), list(file_urls)))
+        await db.commit()
+    
+    # Files are removed only once the rows are committed, so a failed
+    # transaction never leaves materials pointing at deleted files
+    stored = [file_url for file_url in file_urls.values() if file_url]
+    files_deleted = {}
+    if stored and supabase_storage.is_configured():
+        files_deleted = await supabase_storage.delete_files(stored)
+    
+    results = [
+        {
+            "id": material_id,
+            "status": "deleted",
+            "file_deleted": files_deleted.get(file_url, False) if file_url else None
+        }
+        for material_id, file_url in file_urls.items()
+    ]
+    results += [
+        {"id": material_id, "status": "not_found"}
+        for material_id in dict.fromkeys(selection.ids or []) if material_id not in file_urls
+    ]
+    
+    print(f"🗑️ Bulk deleted {len(file_urls)} materials ({len(files_deleted)} stored files) for user {current_user.id}")
+    
+    return {"results": results, "deleted": len(file_urls), "has_more": has_more}
+
 @router.get("/download/{material_id}")
-def get_download_url(
+async def get_download_url(
     material_id: int,
     current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get download URL for a material file."""
-    material = db.query(models.Material).filter(
+    result = await db.execute(select(models.Material).where(
         models.Material.id == material_id,
         models.Material.user_id == current_user.id
-    ).first()
+    ))
+    material = result.scalars().first()
     
     if not material:
         raise HTTPException(
@@ -417,11 +973,11 @@ def get_download_url(
             detail="No file associated with this material"
         )
     
-    if not supabase_storage.supabase:
+    if not supabase_storage.is_configured():
         return {"download_url": material.file_url}
     
     try:
-        download_url = supabase_storage.generate_presigned_url(material.file_url)
+        download_url = await supabase_storage.generate_presigned_url(material.file_url)
         return {"download_url": download_url}
     except Exception as e:
         print(f"Error generating download URL: {e}")
@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 import re
+from .services.text_normalization import estimate_tokens
 
 # User Schemas
 class UserBase(BaseModel):
@@ -29,7 +30,8 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
-    email: Optional[str] = None
+    user_id: Optional[int] = None
+    email: Optional[str] = None  # Tokens issued before the subject became the user id
 
 # Material Schemas
 class MaterialBase(BaseModel):
@@ -45,18 +47,95 @@ class Material(MaterialBase):
     id: int
     uploaded_at: datetime
     user_id: int
+    raw_char_count: Optional[int] = None
+    char_count: Optional[int] = None
+    ingestion_status: str = "complete"
+    
+    @computed_field
+    @property
+    def tokens_saved(self) -> int:
+        """Estimated LLM input tokens saved per call by ingestion-time normalization."""
+        if self.raw_char_count is None or self.char_count is None:
+            return 0
+        return max(0, estimate_tokens(self.raw_char_count) - estimate_tokens(self.char_count))
     
     class Config:
         from_attributes = True
 
+class MaterialPage(BaseModel):
+    page_no: int
+    text: str
+    char_count: int
+    hash: str
+    
+    class Config:
+        from_attributes = True
+
+class MaterialPageRange(BaseModel):
+    material_id: int
+    total_pages: int
+    pages: List[MaterialPage]
+    next_page: Optional[int] = None  # First page of the next batch, if any
+
+class MaterialListItem(BaseModel):
+    id: int
+    title: str
+    file_type: str
+    uploaded_at: datetime
+    content_length: int
+    ingestion_status: str = "complete"
+    has_summary: bool = False
+    has_quiz: bool = False
+    has_key_concepts: bool = False
+    question_count: int = 0
+
+class MaterialList(BaseModel):
+    items: List[MaterialListItem]
+    next_cursor: Optional[str] = None  # Pass as `cursor` to get the next page
+
+class MaterialDownloadUrl(BaseModel):
+    id: int
+    download_url: str
+
+class MaterialDownloadUrls(BaseModel):
+    items: List[MaterialDownloadUrl]
+
+class MaterialSearchResult(BaseModel):
+    id: int
+    title: str
+    file_type: str
+    uploaded_at: datetime
+    rank: float
+    snippet: str  # HTML-escaped text with matches wrapped in <mark>
+
+class MaterialSearchResults(BaseModel):
+    items: List[MaterialSearchResult]
+    next_offset: Optional[int] = None  # Pass as `offset` to get the next page
+
+class MaterialBulkDelete(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=1000)
+    uploaded_before: Optional[datetime] = None  # Materials uploaded before this time
+    uploaded_after: Optional[datetime] = None   # Materials uploaded at or after this time
+
+class MaterialBulkDeleteResult(BaseModel):
+    id: int
+    status: str  # 'deleted' or 'not_found'
+    file_deleted: Optional[bool] = None  # None when the material had no stored file
+
+class MaterialBulkDeleteResponse(BaseModel):
+    results: List[MaterialBulkDeleteResult]
+    deleted: int
+    has_more: bool = False  # A date filter matched more than one request deletes
+
 class GeneratedDataBase(BaseModel):
     summary: Optional[str] = None
-    quiz_questions: Optional[str] = None
-    key_concepts: Optional[str] = None
+    quiz_questions: Optional[List[Dict[str, Any]]] = None
+    key_concepts: Optional[List[str]] = None
 
 class GeneratedData(GeneratedDataBase):
     id: int
     material_id: int
+    is_preliminary: bool = False
     generated_at: datetime
     
     class Config:
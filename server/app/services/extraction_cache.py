@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zlib
+from typing import Callable, List, Optional, Tuple
+import PyPDF2
+from dotenv import load_dotenv
+from .. import database, models
+
+load_dotenv()
+
+# Bump the suffix when extraction output changes for the same PyPDF2 version
+EXTRACTOR_VERSION = f"pypdf2-{PyPDF2.__version__}/1"
+
+EXTRACTION_CACHE_DIR = os.getenv(
+    "EXTRACTION_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "study_assistant_extraction_cache")
+)
+EXTRACTION_CACHE_MAX_MB = int(os.getenv("EXTRACTION_CACHE_MAX_MB", "512"))
+EXTRACTION_CACHE_DB = os.getenv("EXTRACTION_CACHE_DB", "false").lower() == "true"
+
+ExtractionResult = Tuple[int, List[Tuple[int, str]]]
+
+
+def _encode(result: ExtractionResult) -> bytes:
+    page_count, pages = result
+    return zlib.compress(json.dumps({"page_count": page_count, "pages": pages}).encode("utf-8"))
+
+
+def _decode(data: bytes) -> ExtractionResult:
+    payload = json.loads(zlib.decompress(data).decode("utf-8"))
+    return payload["page_count"], [(page_num, text) for page_num, text in payload["pages"]]
+
+
+class ExtractionCache:
+    """
+    Cache of extracted per-page PDF text keyed by the SHA-256 of the PDF bytes
+    and the extractor version.
+
+    Entries are zlib-compressed JSON files on local disk, evicted least
+    recently used first once the directory exceeds `max_bytes`. When `use_db`
+    is set, entries are also written to the extraction_cache table so other
+    upload nodes can reuse them.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, use_db: bool = None):
+        self.directory = directory or EXTRACTION_CACHE_DIR
+        self.max_bytes = EXTRACTION_CACHE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.use_db = EXTRACTION_CACHE_DB if use_db is None else use_db
+        self.hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None  # Computed on first write
+
+    def cache_key(self, digest: str) -> str:
+        version = hashlib.sha256(EXTRACTOR_VERSION.encode()).hexdigest()[:12]
+        return f"{digest}-{version}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.z")
+
+    def get(self, digest: str) -> Optional[ExtractionResult]:
+        """Return the cached extraction for a PDF digest, or None."""
+        key = self.cache_key(digest)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Mark as recently used for LRU eviction
+            result = _decode(data)
+            with self._lock:
+                self.hits += 1
+            return result
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, zlib.error) as e:
+            print(f"⚠ Dropping unreadable extraction cache entry {key}: {e}")
+            self._remove(path)
+
+        if self.use_db:
+            data = self._db_get(key)
+            if data is not None:
+                self._write_file(key, data)
+                with self._lock:
+                    self.hits += 1
+                    self.db_hits += 1
+                return _decode(data)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, digest: str, result: ExtractionResult):
+        """Store an extraction result for a PDF digest."""
+        key = self.cache_key(digest)
+        data = _encode(result)
+        self._write_file(key, data)
+        if self.use_db:
+            self._db_put(key, data)
+
+    def get_or_extract(self, digest: str, extract: Callable[..., ExtractionResult], *args, **kwargs) -> ExtractionResult:
+        """Return the cached extraction for `digest`, running `extract(*args, **kwargs)` on a miss."""
+        result = self.get(digest)
+        if result is not None:
+            return result
+        result = extract(*args, **kwargs)
+        try:
+            self.put(digest, result)
+        except Exception as e:
+            # A cache write failure must never fail the upload
+            print(f"⚠ Failed to store extraction cache entry: {e}")
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "extractor_version": EXTRACTOR_VERSION,
+                "hits": self.hits,
+                "db_hits": self.db_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "db_enabled": self.use_db
+            }
+
+    def _write_file(self, key: str, data: bytes):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+
+        with self._lock:
+            # Rewriting an entry replaces its old file rather than adding to the total
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            os.replace(tmp_path, path)  # Atomic, so readers never see partial entries
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        """Cache entries as (mtime, size, path), least recently used first."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".json.z"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits. Caller holds the lock."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _db_get(self, key: str) -> Optional[bytes]:
+        db = database.SessionLocal()
+        try:
+            entry = db.get(models.ExtractionCacheEntry, key)
+            return entry.data if entry else None
+        except Exception as e:
+            print(f"⚠ Extraction cache DB read failed: {e}")
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, data: bytes):
+        db = database.SessionLocal()
+        try:
+            db.merge(models.ExtractionCacheEntry(cache_key=key, data=data))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"⚠ Extraction cache DB write failed: {e}")
+        finally:
+            db.close()
+
+
+# Create a singleton instance
+extraction_cache = ExtractionCache()
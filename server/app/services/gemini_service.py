@@ -1,15 +1,38 @@
 import os
 import json
+import threading
 from typing import List, Dict, Any
-import google.generativeai as genai
 from fastapi import HTTPException, status
 from dotenv import load_dotenv
+from .text_normalization import collapse_whitespace
 
 load_dotenv()
 
 class GeminiService:
     def __init__(self):
+        # Models are probed with network requests, so that happens in
+        # initialize() (at startup, or on first use) rather than on import
         self.api_key = os.getenv("GEMINI_API_KEY")
+        self._model = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+    
+    @property
+    def model(self):
+        if not self._initialized:
+            self.initialize()
+        return self._model
+    
+    def initialize(self):
+        """Configure the SDK and pick the first model that answers a test request. Runs once."""
+        with self._init_lock:
+            if not self._initialized:
+                self._model = self._select_model()
+                self._initialized = True
+    
+    def _select_model(self):
+        # The SDK takes most of a second to import, so it is loaded here rather than with the app
+        import google.generativeai as genai
         
         try:
             genai.configure(api_key=self.api_key)
@@ -21,7 +44,6 @@ class GeminiService:
                      
             ]
             
-            self.model = None
             for model_name in model_names:
                 try:
                     print(f"Trying to initialize model: {model_name}")
@@ -30,9 +52,8 @@ class GeminiService:
                     # Test the model with a simple request to ensure it works
                     test_response = test_model.generate_content("Hello")
                     if test_response and hasattr(test_response, 'text'):
-                        self.model = test_model
                         print(f"✓ Successfully initialized and tested Gemini model: {model_name}")
-                        break
+                        return test_model
                     else:
                         print(f"⚠ Model {model_name} initialized but test failed")
                         continue
@@ -41,14 +62,14 @@ class GeminiService:
                     print(f"⚠ Failed to initialize {model_name}: {str(model_error)}")
                     continue
             
-            if not self.model:
-                print("❌ Failed to initialize any Gemini model")
-                print("Listing available models for debugging:")
-                self.list_available_models()
+            print("❌ Failed to initialize any Gemini model")
+            print("Listing available models for debugging:")
+            self.list_available_models()
+            return None
                 
         except Exception as e:
             print(f"⚠ Failed to configure Gemini AI: {e}")
-            self.model = None
+            return None
     
     def is_configured(self) -> bool:
         """Check if Gemini AI is properly configured."""
@@ -61,6 +82,8 @@ class GeminiService:
                 print("No API key configured")
                 return
             
+            import google.generativeai as genai
+            
             genai.configure(api_key=self.api_key)
             models = genai.list_models()
             print("Available Gemini models:")
@@ -74,7 +97,9 @@ class GeminiService:
     def reinitialize_model(self):
         """Reinitialize the model if there are issues."""
         print("Reinitializing Gemini model...")
-        self.__init__()  # Reinitialize the service
+        with self._init_lock:
+            self._model = self._select_model()
+            self._initialized = True
     
     def generate_summary(self, content: str, max_length: int = 300) -> str:
         """Generate an intelligent, content-focused summary for personalized learning."""
@@ -182,10 +207,8 @@ Write only the final summary (approximately {max_length} words) with no titles,
             content_preview = content[:1500] + "\n\n[...content continues...]\n\n" + content[-1500:]
         else:
             content_preview = content
-        
-        # Clean up the content preview
-        content_preview = content_preview.replace('\n\n\n', '\n\n')  # Remove excessive line breaks
-        content_preview = ' '.join(content_preview.split())  # Normalize whitespace but preserve structure
+        # PDF content is normalized once at ingestion; this only changes text uploads
+        content_preview = collapse_whitespace(content_preview)
         
         # Try up to 2 times to get good content-specific questions
         for attempt in range(2):
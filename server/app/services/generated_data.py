@@ -0,0 +1,54 @@
+from typing import Any, Dict
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from .material_search import SEARCHED_GENERATED_COLUMNS, index_materials
+
+# Columns an upsert may set; material_id is the conflict target
+UPSERT_COLUMNS = {"summary", "quiz_questions", "key_concepts", "is_preliminary"}
+
+
+def upsert_statement(dialect: str, material_id: int, values: Dict[str, Any]):
+    """
+    INSERT ... ON CONFLICT (material_id) DO UPDATE SET <values> RETURNING the row.
+
+    Only the columns in `values` are written when the row already exists, so
+    concurrent writers of different artifacts do not overwrite each other.
+    """
+    unknown = set(values) - UPSERT_COLUMNS
+    if unknown:
+        raise ValueError(f"Cannot upsert generated data columns: {', '.join(sorted(unknown))}")
+    if not values:
+        raise ValueError("Nothing to upsert")
+
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(models.GeneratedData).values(material_id=material_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[models.GeneratedData.material_id],
+        set_={column: stmt.excluded[column] for column in values}
+    )
+    return stmt.returning(models.GeneratedData)
+
+
+async def upsert_generated_data(db: AsyncSession, material_id: int, **values) -> models.GeneratedData:
+    """
+    Create or update a material's generated data in one statement, and its
+    search entry when the summary or concepts change. The caller commits.
+    """
+    stmt = upsert_statement(db.get_bind().dialect.name, material_id, values)
+    # populate_existing refreshes a GeneratedData already in the session from the returned row
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    generated = result.scalars().one()
+    if SEARCHED_GENERATED_COLUMNS & values.keys():
+        await db.run_sync(lambda session: index_materials(session.connection(), [material_id], {material_id: generated}))
+    return generated
+
+
+def upsert_generated_data_sync(db: Session, material_id: int, **values) -> models.GeneratedData:
+    """upsert_generated_data for the sync sessions used by background tasks."""
+    stmt = upsert_statement(db.get_bind().dialect.name, material_id, values)
+    generated = db.execute(stmt, execution_options={"populate_existing": True}).scalars().one()
+    if SEARCHED_GENERATED_COLUMNS & values.keys():
+        index_materials(db.connection(), [material_id], {material_id: generated})
+    return generated
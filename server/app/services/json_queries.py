@@ -0,0 +1,33 @@
+"""
+Dialect-aware expressions over the JSON columns of generated_data.
+
+Postgres stores them as JSONB and answers containment with the GIN indexes;
+SQLite (tests, local development) walks the arrays with json_each.
+"""
+from sqlalchemy import exists, func, select, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+
+
+def json_array_length(column, dialect: str):
+    """Number of elements in a JSON array column (NULL for NULL)."""
+    if dialect == "postgresql":
+        return func.jsonb_array_length(column)
+    return func.json_array_length(column)
+
+
+def json_array_contains(column, value, dialect: str):
+    """Whether a JSON array of strings contains `value`."""
+    if dialect == "postgresql":
+        return type_coerce(column, JSONB).contains([value])
+    elements = func.json_each(column).table_valued("value")
+    return exists(select(1).select_from(elements).where(elements.c.value == value))
+
+
+def json_array_has_field(column, field: str, value, dialect: str):
+    """Whether a JSON array of objects has an element whose `field` equals `value`."""
+    if dialect == "postgresql":
+        return type_coerce(column, JSONB).contains([{field: value}])
+    elements = func.json_each(column).table_valued("value")
+    return exists(select(1).select_from(elements).where(
+        func.json_extract(elements.c.value, f"$.{field}") == value
+    ))
@@ -0,0 +1,64 @@
+import hashlib
+from typing import AsyncIterator, List, Optional, Tuple
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from .pdf_extraction import PAGE_SEPARATOR
+
+
+def build_page_rows(material_id: Optional[int], pages: List[Tuple[int, str]]) -> List[models.MaterialPage]:
+    """Build MaterialPage rows from extracted (page_index, text) pairs."""
+    rows = []
+    for page_index, page_text in pages:
+        rows.append(models.MaterialPage(
+            material_id=material_id,
+            page_no=page_index + 1,
+            text=page_text,
+            char_count=len(page_text),
+            hash=hashlib.sha256(page_text.encode("utf-8")).hexdigest()
+        ))
+    return rows
+
+
+def page_range_query(material_id: int, start_page: Optional[int] = None, end_page: Optional[int] = None) -> Select:
+    """Select a material's stored pages within [start_page, end_page], in page order."""
+    query = select(models.MaterialPage).where(models.MaterialPage.material_id == material_id)
+    if start_page is not None:
+        query = query.where(models.MaterialPage.page_no >= start_page)
+    if end_page is not None:
+        query = query.where(models.MaterialPage.page_no <= end_page)
+    return query.order_by(models.MaterialPage.page_no)
+
+
+async def iter_page_range(
+    db: AsyncSession,
+    material_id: int,
+    start_page: Optional[int] = None,
+    end_page: Optional[int] = None,
+    batch_size: int = 50
+) -> AsyncIterator[models.MaterialPage]:
+    """Stream pages in batches so long ranges are never loaded at once."""
+    last_page = (start_page - 1) if start_page else 0
+    while True:
+        result = await db.execute(page_range_query(material_id, last_page + 1, end_page).limit(batch_size))
+        batch = result.scalars().all()
+        if not batch:
+            return
+        for page in batch:
+            yield page
+        last_page = batch[-1].page_no
+
+
+async def get_page_range_text(
+    db: AsyncSession,
+    material_id: int,
+    start_page: Optional[int] = None,
+    end_page: Optional[int] = None
+) -> str:
+    """Text of a page range, joined with the same `--- Page N ---` markers as Material.content."""
+    parts = []
+    async for page in iter_page_range(db, material_id, start_page, end_page):
+        if parts:
+            parts.append(PAGE_SEPARATOR.format(page.page_no))
+        parts.append(page.text)
+    return "".join(parts)
@@ -0,0 +1,252 @@
+import html
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+from dotenv import load_dotenv
+from sqlalchemy import Integer, LargeBinary, Text, bindparam, column, delete, func, insert, literal_column, select, table, type_coerce, update, values
+from sqlalchemy.dialects.postgresql import to_tsvector, ts_headline, websearch_to_tsquery
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models
+from .text_compression import decompress_text_prefix
+
+load_dotenv()
+
+# Postgres text search configuration (stemming and stop words)
+SEARCH_LANGUAGE = os.getenv("SEARCH_LANGUAGE", "english")
+# Only the start of very long content is indexed; a tsvector is capped at 1 MB
+SEARCH_INDEX_MAX_CHARS = int(os.getenv("SEARCH_INDEX_MAX_CHARS", "200000"))
+# Snippets are highlighted within the summary and the start of the content only
+SEARCH_SNIPPET_MAX_CHARS = int(os.getenv("SEARCH_SNIPPET_MAX_CHARS", "5000"))
+
+# Highlight markers used inside the database. Snippets are HTML-escaped and
+# the markers replaced with <mark> afterwards, so stored text is never markup.
+MARK_START = "\ue000"
+MARK_END = "\ue001"
+HEADLINE_OPTIONS = f'StartSel="{MARK_START}", StopSel="{MARK_END}", MaxFragments=2, MaxWords=24, MinWords=10, FragmentDelimiter=" … "'
+
+# SQLite FTS5 index with rowid = materials.id (created alongside the materials table, see models)
+FTS_TABLE = "materials_fts"
+materials_fts = table(
+    FTS_TABLE,
+    column("rowid", Integer),
+    column("title", Text),
+    column("concepts", Text),
+    column("summary", Text),
+    column("content", Text)
+)
+
+# GeneratedData columns that are part of a material's search document
+SEARCHED_GENERATED_COLUMNS = {"summary", "key_concepts"}
+
+
+def search_terms(q: str) -> List[str]:
+    return re.findall(r"\w+", q)
+
+
+def fts_query(q: str) -> str:
+    """FTS5 MATCH expression requiring every word of `q`; words are quoted so user input is never FTS syntax."""
+    return " ".join(f'"{term}"' for term in search_terms(q))
+
+
+def render_snippet(snippet: Optional[str]) -> str:
+    return html.escape(snippet or "", quote=False).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+def _documents(
+    connection,
+    material_ids: List[int],
+    generated: Optional[Dict[int, Optional[models.GeneratedData]]] = None,
+    materials: Optional[Dict[int, models.Material]] = None
+) -> List[dict]:
+    """
+    Search documents for materials: title, concepts, summary and (truncated) content.
+
+    `generated` supplies summary and concepts the caller already holds, so
+    generated_data is not read again; `materials` likewise supplies materials
+    with title and content loaded, so the compressed content is not read back
+    and decompressed.
+    """
+    material = models.Material
+    if materials is not None:
+        rows = [materials[material_id] for material_id in material_ids if material_id in materials]
+        if generated is None:
+            generated_data = models.GeneratedData
+            generated = {
+                row.material_id: row for row in connection.execute(
+                    select(generated_data.material_id, generated_data.summary, generated_data.key_concepts)
+                    .where(generated_data.material_id.in_(material_ids))
+                )
+            }
+    else:
+        query = select(material.id, material.title, material.content).where(material.id.in_(material_ids))
+        if generated is None:
+            query = query.add_columns(
+                models.GeneratedData.summary, models.GeneratedData.key_concepts
+            ).outerjoin(models.GeneratedData, models.GeneratedData.material_id == material.id)
+        rows = connection.execute(query)
+
+    documents = []
+    for row in rows:
+        source = generated.get(row.id) if generated is not None else row
+        documents.append({
+            "doc_id": row.id,
+            "doc_title": row.title or "",
+            "doc_concepts": " ".join(str(concept) for concept in getattr(source, "key_concepts", None) or []),
+            "doc_summary": getattr(source, "summary", None) or "",
+            "doc_content": (row.content or "")[:SEARCH_INDEX_MAX_CHARS]
+        })
+    return documents
+
+
+def _weighted(key: str, weight: str):
+    return func.setweight(to_tsvector(SEARCH_LANGUAGE, bindparam(key, type_=Text)), literal_column(f"'{weight}'"))
+
+
+def index_materials(
+    connection,
+    material_ids: Iterable[int],
+    generated: Optional[Dict[int, Optional[models.GeneratedData]]] = None,
+    materials: Optional[Dict[int, models.Material]] = None
+) -> int:
+    """
+    Rebuild the search entries of materials on `connection`; returns how many
+    were indexed. See _documents for `generated` and `materials`.
+
+    Postgres stores a weighted tsvector in materials.search_vector (title A,
+    concepts and summary B, content C). SQLite keeps the same fields in the
+    materials_fts FTS5 table.
+    """
+    material_ids = list(material_ids)
+    if not material_ids:
+        return 0
+    documents = _documents(connection, material_ids, generated, materials)
+    if not documents:
+        return 0
+
+    if connection.dialect.name == "postgresql":
+        vector = (
+            _weighted("doc_title", "A")
+            .op("||")(_weighted("doc_concepts", "B"))
+            .op("||")(_weighted("doc_summary", "B"))
+            .op("||")(_weighted("doc_content", "C"))
+        )
+        materials = models.Material.__table__
+        connection.execute(
+            update(materials).where(materials.c.id == bindparam("doc_id")).values(search_vector=vector),
+            documents
+        )
+    else:
+        remove_from_index(connection, [document["doc_id"] for document in documents])
+        connection.execute(insert(materials_fts), [
+            {
+                "rowid": document["doc_id"],
+                "title": document["doc_title"],
+                "concepts": document["doc_concepts"],
+                "summary": document["doc_summary"],
+                "content": document["doc_content"]
+            }
+            for document in documents
+        ])
+    return len(documents)
+
+
+def remove_from_index(connection, material_ids: Iterable[int]):
+    """Drop FTS5 entries of materials; on Postgres the vector is deleted with its row."""
+    if connection.dialect.name != "postgresql":
+        connection.execute(delete(materials_fts).where(materials_fts.c.rowid.in_(list(material_ids))))
+
+
+def unindexed_filter(dialect: str):
+    """Where-clause for materials without a search entry."""
+    if dialect == "postgresql":
+        return models.Material.search_vector.is_(None)
+    return ~select(materials_fts.c.rowid).where(materials_fts.c.rowid == models.Material.id).exists()
+
+
+def search_statement(dialect: str, user_id: int, q: str):
+    """
+    Ranked matches among a user's materials, best first.
+
+    Rows have id, title, file_type, uploaded_at and rank (higher is better);
+    on SQLite also a highlighted snippet.
+    """
+    material = models.Material
+    columns = [material.id, material.title, material.file_type, material.uploaded_at]
+
+    if dialect == "postgresql":
+        query = websearch_to_tsquery(SEARCH_LANGUAGE, q)
+        # Normalization 1 divides by 1 + log(document length) so long uploads do not dominate
+        rank = func.ts_rank_cd(material.search_vector, query, 1)
+        return select(*columns, rank.label("rank")).where(
+            material.user_id == user_id,
+            material.search_vector.op("@@")(query)
+        ).order_by(rank.desc(), material.id.desc())
+
+    fts = literal_column(FTS_TABLE)
+    # bm25 is lower-is-better; weights follow the column order title, concepts, summary, content
+    rank = -func.bm25(fts, 10.0, 4.0, 4.0, 1.0)
+    snippet = func.snippet(fts, -1, MARK_START, MARK_END, " … ", 24)
+    return select(*columns, rank.label("rank"), snippet.label("snippet")).join(
+        materials_fts, materials_fts.c.rowid == material.id
+    ).where(
+        material.user_id == user_id,
+        fts.op("MATCH")(fts_query(q))
+    ).order_by(rank.desc(), material.id.desc())
+
+
+async def _postgres_snippets(db: AsyncSession, q: str, material_ids: List[int]) -> Dict[int, str]:
+    """ts_headline over the start of each material's summary and content, for the page of results only."""
+    # Only a prefix of the stored (possibly compressed) content is fetched and
+    # inflated, so snippet cost does not grow with the document
+    stored_prefix = func.substr(
+        type_coerce(models.Material.content, LargeBinary), 1, SEARCH_SNIPPET_MAX_CHARS * 4 + 1, type_=LargeBinary
+    )
+    rows = (await db.execute(
+        select(
+            models.Material.id,
+            stored_prefix.label("content_prefix"),
+            func.substr(models.GeneratedData.summary, 1, SEARCH_SNIPPET_MAX_CHARS).label("summary")
+        )
+        .outerjoin(models.GeneratedData, models.GeneratedData.material_id == models.Material.id)
+        .where(models.Material.id.in_(material_ids))
+    )).all()
+    documents = values(column("id", Integer), column("doc", Text), name="documents").data([
+        (row.id, "\n".join(part for part in (
+            row.summary,
+            decompress_text_prefix(row.content_prefix, SEARCH_SNIPPET_MAX_CHARS) if row.content_prefix else None
+        ) if part))
+        for row in rows
+    ])
+    headlines = await db.execute(select(
+        documents.c.id,
+        ts_headline(SEARCH_LANGUAGE, documents.c.doc, websearch_to_tsquery(SEARCH_LANGUAGE, q), HEADLINE_OPTIONS)
+    ))
+    return dict(headlines.all())
+
+
+async def search_materials(db: AsyncSession, user_id: int, q: str, limit: int, offset: int = 0) -> Tuple[List[dict], bool]:
+    """A page of ranked results with rendered snippets, and whether more results follow."""
+    dialect = db.get_bind().dialect.name
+    # Fetch one extra row to know whether another page follows
+    result = await db.execute(search_statement(dialect, user_id, q).offset(offset).limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if dialect == "postgresql":
+        snippets = await _postgres_snippets(db, q, [row.id for row in rows]) if rows else {}
+    else:
+        snippets = {row.id: row.snippet for row in rows}
+
+    items = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "file_type": row.file_type,
+            "uploaded_at": row.uploaded_at,
+            "rank": round(float(row.rank or 0), 6),
+            "snippet": render_snippet(snippets.get(row.id))
+        }
+        for row in rows
+    ]
+    return items, has_more
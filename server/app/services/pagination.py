@@ -0,0 +1,24 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+
+
+def encode_cursor(uploaded_at: datetime, material_id: int) -> str:
+    """Opaque keyset cursor for the (uploaded_at, id) position of the last item returned."""
+    payload = json.dumps({"t": uploaded_at.isoformat(), "id": material_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from encode_cursor, raising 400 if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
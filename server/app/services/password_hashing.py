@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import bcrypt
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# bcrypt cost: each step doubles the work (12 is about 250 ms per hash on one core)
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+# bcrypt releases the GIL, so hashes run in parallel up to one per core; more
+# workers would only queue on the CPU
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+# bcrypt only reads the first 72 bytes of a password (and bcrypt>=5 raises
+# instead of ignoring the rest)
+BCRYPT_MAX_BYTES = 72
+
+
+def _password_bytes(password: str) -> bytes:
+    return password.encode("utf-8")[:BCRYPT_MAX_BYTES]
+
+
+def is_legacy_hash(hashed_password: str) -> bool:
+    """Hashes from before bcrypt: `salt:sha256hex`."""
+    return not hashed_password.startswith("$2")
+
+
+def _verify_legacy(password: str, hashed_password: str) -> bool:
+    try:
+        salt, password_hash = hashed_password.split(":")
+    except ValueError:
+        return False
+    expected = hashlib.sha256((password + salt).encode()).hexdigest()
+    return hmac.compare_digest(expected, password_hash)
+
+
+class PasswordHasher:
+    """
+    bcrypt password hashing on a dedicated, bounded thread pool, so a burst of
+    logins queues there instead of occupying the event loop or the threadpool
+    that serves sync endpoints. Also verifies legacy salted SHA-256 hashes so
+    they can be upgraded on login.
+    """
+
+    def __init__(self, rounds: int = None, workers: int = None):
+        self.rounds = PASSWORD_HASH_ROUNDS if rounds is None else rounds
+        self.workers = PASSWORD_HASH_WORKERS if workers is None else workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # Verified against when the user does not exist, so unknown emails
+        # take as long to reject as wrong passwords
+        self._dummy_hash: Optional[str] = None
+
+    def hash(self, password: str) -> str:
+        return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds=self.rounds)).decode("ascii")
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        if is_legacy_hash(hashed_password):
+            return _verify_legacy(password, hashed_password)
+        try:
+            return bcrypt.checkpw(_password_bytes(password), hashed_password.encode("ascii"))
+        except ValueError:
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True for legacy hashes and bcrypt hashes made with a different cost."""
+        if is_legacy_hash(hashed_password):
+            return True
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def verify_dummy(self, password: str) -> bool:
+        if self._dummy_hash is None:
+            self._dummy_hash = self.hash("not a real password")
+        self.verify(password, self._dummy_hash)
+        return False
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(self.hash, password)
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify, password, hashed_password)
+
+    async def verify_dummy_async(self, password: str) -> bool:
+        return await self._run(self.verify_dummy, password)
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
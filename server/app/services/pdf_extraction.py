@@ -0,0 +1,240 @@
+import io
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple, Union
+import PyPDF2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Parallel extraction settings
+PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "64"))
+PDF_SHARDS_PER_WORKER = int(os.getenv("PDF_SHARDS_PER_WORKER", "4"))
+# Forking the multithreaded server is unsafe, so workers start from a fork server (or spawn)
+PDF_EXTRACTION_START_METHOD = os.getenv(
+    "PDF_EXTRACTION_START_METHOD",
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+PAGE_SEPARATOR = "\n\n--- Page {} ---\n\n"
+
+PdfSource = Union[bytes, str]
+ExtractedPage = Tuple[int, str]
+
+
+class ExtractionCancelled(Exception):
+    """Raised when an extraction is cancelled through its cancel event."""
+
+
+def _open_reader(source: PdfSource) -> PyPDF2.PdfReader:
+    """Open a PdfReader over raw bytes or a file path."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return PyPDF2.PdfReader(io.BytesIO(source))
+    # Pass a file handle: PdfReader(path) would load the whole file into memory
+    return PyPDF2.PdfReader(open(source, "rb"))
+
+
+def _page_has_content(page) -> bool:
+    """Cheap check for a content stream, so blank pages skip text extraction."""
+    contents = page.get("/Contents")
+    if contents is None:
+        return False
+    contents = contents.get_object()
+    if isinstance(contents, PyPDF2.generic.ArrayObject) and len(contents) == 0:
+        return False
+    return True
+
+
+def _iter_range(
+    reader: PyPDF2.PdfReader,
+    start: int,
+    end: int,
+    cancel: Optional[threading.Event] = None
+) -> Iterator[ExtractedPage]:
+    """Yield non-empty pages in [start, end) as (page_index, text) pairs."""
+    for page_num in range(start, end):
+        if cancel is not None and cancel.is_set():
+            raise ExtractionCancelled()
+        page = reader.pages[page_num]
+        if not _page_has_content(page):
+            continue
+        page_text = page.extract_text()
+        if page_text.strip():
+            yield page_num, page_text
+
+
+def _extract_shard(path: str, start: int, end: int) -> List[ExtractedPage]:
+    """Runs in a worker process: extract pages [start, end) of the PDF at `path`."""
+    with open(path, "rb") as stream:
+        return list(_iter_range(PyPDF2.PdfReader(stream), start, end))
+
+
+class PdfExtractionPool:
+    """
+    One process pool shared by every extraction, so concurrent uploads queue
+    their shards on at most `workers` processes instead of each starting a
+    pool of their own. Created on first use (or by the lifespan) and shut
+    down with the app.
+    """
+
+    def __init__(self, workers: int = None, start_method: str = None):
+        self.workers = PDF_EXTRACTION_WORKERS if workers is None else workers
+        self.start_method = start_method or PDF_EXTRACTION_START_METHOD
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max(1, self.workers),
+                    mp_context=multiprocessing.get_context(self.start_method)
+                )
+            return self._executor
+
+    def start(self):
+        """Create the pool; processes are started when the first shard is submitted."""
+        self.executor
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+pdf_extraction_pool = PdfExtractionPool()
+
+
+def _split_shards(page_count: int, num_shards: int) -> List[Tuple[int, int]]:
+    """Split [0, page_count) into contiguous, roughly equal ranges."""
+    num_shards = max(1, min(num_shards, page_count))
+    base, extra = divmod(page_count, num_shards)
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + base + (1 if i < extra else 0)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def iter_pdf_pages(
+    source: PdfSource,
+    max_workers: Optional[int] = None,
+    cancel: Optional[threading.Event] = None
+) -> Tuple[int, Iterator[ExtractedPage]]:
+    """
+    Open a PDF and stream its text page by page.
+
+    Returns the total page count and an iterator over the non-empty pages as
+    (page_index, text) pairs in page order, so callers can start working on
+    the leading pages while the rest are still being extracted. Large
+    documents are split into shards and extracted across worker processes.
+    Setting `cancel` stops extraction between pages (or shards) with
+    ExtractionCancelled.
+    """
+    reader = _open_reader(source)
+    try:
+        page_count = len(reader.pages)
+    except BaseException:
+        reader.stream.close()
+        raise
+    workers = max_workers if max_workers is not None else PDF_EXTRACTION_WORKERS
+
+    if workers <= 1 or page_count < PDF_PARALLEL_MIN_PAGES:
+        return page_count, _iter_serial(reader, page_count, cancel)
+
+    reader.stream.close()
+    return page_count, _iter_sharded(source, page_count, workers, cancel)
+
+
+def _iter_serial(reader: PyPDF2.PdfReader, page_count: int, cancel: Optional[threading.Event]) -> Iterator[ExtractedPage]:
+    try:
+        yield from _iter_range(reader, 0, page_count, cancel)
+    finally:
+        reader.stream.close()
+
+
+def _iter_sharded(
+    source: PdfSource,
+    page_count: int,
+    workers: int,
+    cancel: Optional[threading.Event]
+) -> Iterator[ExtractedPage]:
+    shards = _split_shards(page_count, workers * PDF_SHARDS_PER_WORKER)
+    # Workers open the document by path; raw bytes are written to a temporary
+    # file once rather than pickled into every shard
+    path, temporary = source, False
+    if not isinstance(source, str):
+        fd, path = tempfile.mkstemp(prefix="extract_", suffix=".pdf")
+        with os.fdopen(fd, "wb") as spool:
+            spool.write(source)
+        temporary = True
+
+    futures = []
+    try:
+        executor = pdf_extraction_pool.executor
+        futures = [executor.submit(_extract_shard, path, start, end) for start, end in shards]
+        # Results are consumed in submission order, so pages stay ordered
+        for future in futures:
+            if cancel is not None and cancel.is_set():
+                raise ExtractionCancelled()
+            yield from future.result()
+    finally:
+        # Also runs when the consumer stops early (GeneratorExit); other
+        # extractions keep the shared pool
+        for future in futures:
+            future.cancel()
+        if temporary:
+            os.unlink(path)
+
+
+def extract_pdf_pages(
+    source: PdfSource,
+    max_workers: Optional[int] = None,
+    cancel: Optional[threading.Event] = None
+) -> Tuple[int, List[ExtractedPage]]:
+    """
+    Extract text from every page of a PDF.
+
+    `source` is the raw PDF bytes or a path to a spooled file. Returns the
+    total page count and the non-empty pages as (page_index, text) pairs in
+    page order. See iter_pdf_pages for the streaming variant.
+    """
+    page_count, pages = iter_pdf_pages(source, max_workers=max_workers, cancel=cancel)
+    return page_count, list(pages)
+
+
+def join_pages(pages: List[ExtractedPage], page_count: int) -> str:
+    """Join extracted pages with the `--- Page N ---` separators used for stored content."""
+    parts = []
+    for page_num, page_text in pages:
+        parts.append(page_text)
+        # Add page separator for multi-page PDFs
+        if page_num < page_count - 1:
+            parts.append(PAGE_SEPARATOR.format(page_num + 2))
+    return "".join(parts)
+
+
+def joined_length(pages: List[ExtractedPage], page_count: int) -> int:
+    """len(join_pages(pages, page_count)) without building the string."""
+    return sum(
+        len(page_text) + (len(PAGE_SEPARATOR.format(page_num + 2)) if page_num < page_count - 1 else 0)
+        for page_num, page_text in pages
+    )
+
+
+def extract_pdf_text(
+    source: PdfSource,
+    max_workers: Optional[int] = None,
+    cancel: Optional[threading.Event] = None
+) -> str:
+    """Extract a PDF's text as a single string with page separators."""
+    page_count, pages = extract_pdf_pages(source, max_workers=max_workers, cancel=cancel)
+    return join_pages(pages, page_count)
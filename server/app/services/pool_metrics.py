@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+load_dotenv()
+
+# Checkouts that wait longer than this are logged
+DB_POOL_SLOW_CHECKOUT_MS = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is unbounded
+CHECKOUT_WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Connection record info key holding how long opening its connection took,
+# until the checkout that opened it collects it
+_CONNECT_SECONDS = "pool_metrics_connect_seconds"
+
+
+class PoolMetrics:
+    """
+    Checkout wait histogram and live connection ages for one engine's pool.
+
+    The wait is time spent queueing for a pooled connection; time spent
+    opening a new connection is recorded separately as connect time, so
+    NullPool (which opens one per checkout) does not look like contention.
+    Each worker process has its own pools, so these describe one worker.
+    """
+
+    def __init__(self, name: str, slow_checkout_ms: Optional[float] = None):
+        self.name = name
+        self.slow_checkout_ms = DB_POOL_SLOW_CHECKOUT_MS if slow_checkout_ms is None else slow_checkout_ms
+        self.pool = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.slow_checkouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(CHECKOUT_WAIT_BUCKETS_MS) + 1)
+        self.connects = 0
+        self.connect_seconds_total = 0.0
+        self.connect_seconds_max = 0.0
+        self.connections_opened = 0
+        self.connections_closed = 0
+        self._opened_at: Dict[int, float] = {}
+
+    def record_checkout(self, wait_seconds: float, failed: bool = False, connect_seconds: float = 0.0):
+        """Record a checkout: `wait_seconds` queueing for a connection plus `connect_seconds` opening one."""
+        wait_ms = wait_seconds * 1000
+        bucket = next(
+            (i for i, bound in enumerate(CHECKOUT_WAIT_BUCKETS_MS) if wait_ms <= bound),
+            len(CHECKOUT_WAIT_BUCKETS_MS)
+        )
+        with self._lock:
+            self.checkouts += 1
+            self.failed_checkouts += int(failed)
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.wait_buckets[bucket] += 1
+            if connect_seconds:
+                self.connects += 1
+                self.connect_seconds_total += connect_seconds
+                self.connect_seconds_max = max(self.connect_seconds_max, connect_seconds)
+            slow = wait_ms > self.slow_checkout_ms
+            self.slow_checkouts += int(slow)
+        if slow:
+            print(
+                f"⚠️ Slow database checkout on '{self.name}' pool: waited {wait_ms:.1f} ms"
+                f"{' and failed' if failed else ''} ({self.pool_status()})"
+            )
+
+    def connection_opened(self, key: int):
+        with self._lock:
+            self.connections_opened += 1
+            self._opened_at[key] = time.monotonic()
+
+    def connection_closed(self, key: int):
+        with self._lock:
+            if self._opened_at.pop(key, None) is not None:
+                self.connections_closed += 1
+
+    def pool_status(self) -> dict:
+        """Current size, checked-out and overflow counts (NullPool keeps no connections, so it has none)."""
+        pool = self.pool
+        status = {"class": type(pool).__name__ if pool is not None else None}
+        for key in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, key, None)
+            if callable(method):
+                status[key] = method()
+        return status
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            ages = [now - opened for opened in self._opened_at.values()]
+            buckets = {f"le_{bound}ms": count for bound, count in zip(CHECKOUT_WAIT_BUCKETS_MS, self.wait_buckets)}
+            buckets["inf"] = self.wait_buckets[-1]
+            return {
+                "pool": self.pool_status(),
+                "checkouts": self.checkouts,
+                "failed_checkouts": self.failed_checkouts,
+                "slow_checkouts": self.slow_checkouts,
+                "slow_checkout_ms": self.slow_checkout_ms,
+                "checkout_wait_ms": {
+                    "mean": round(self.wait_seconds_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                    "max": round(self.wait_seconds_max * 1000, 3),
+                    "buckets": buckets
+                },
+                "connect_ms": {
+                    "count": self.connects,
+                    "mean": round(self.connect_seconds_total / self.connects * 1000, 3) if self.connects else 0.0,
+                    "max": round(self.connect_seconds_max * 1000, 3)
+                },
+                "connections": {
+                    "open": len(ages),
+                    "opened": self.connections_opened,
+                    "closed": self.connections_closed,
+                    "max_age_seconds": round(max(ages), 1) if ages else 0.0,
+                    "mean_age_seconds": round(sum(ages) / len(ages), 1) if ages else 0.0
+                }
+            }
+
+
+class TimedPoolMixin:
+    """
+    Times Pool.connect(), i.e. how long a caller waited for a connection.
+    Time spent opening a new connection (measured by the connect event, see
+    instrument_engine) is subtracted from the wait and reported on its own.
+    """
+
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        start = time.perf_counter()
+        connection = None
+        try:
+            connection = super().connect()
+            return connection
+        finally:
+            if self.metrics is not None:
+                elapsed = time.perf_counter() - start
+                record = getattr(connection, "_connection_record", None)
+                connect_seconds = record.info.pop(_CONNECT_SECONDS, 0.0) if record is not None else 0.0
+                self.metrics.record_checkout(
+                    max(0.0, elapsed - connect_seconds),
+                    failed=connection is None,
+                    connect_seconds=connect_seconds
+                )
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(TimedPoolMixin, NullPool):
+    pass
+
+
+# Metrics for every instrumented engine, by name
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrument_engine(engine, name: str, slow_checkout_ms: Optional[float] = None) -> PoolMetrics:
+    """
+    Start collecting PoolMetrics for an engine (sync or async) under `name`.
+
+    Checkout waits are only timed for the Timed* pool classes; connection
+    ages are tracked for any pool.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    metrics = PoolMetrics(name, slow_checkout_ms=slow_checkout_ms)
+    metrics.pool = sync_engine.pool
+    if isinstance(sync_engine.pool, TimedPoolMixin):
+        sync_engine.pool.metrics = metrics
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.connection_opened(id(dbapi_connection))
+        if connection_record is not None:
+            # The record sets starttime right before opening the connection
+            connection_record.info[_CONNECT_SECONDS] = max(0.0, time.time() - connection_record.starttime)
+
+    @event.listens_for(sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        metrics.connection_closed(id(dbapi_connection))
+
+    @event.listens_for(sync_engine, "close_detached")
+    def on_close_detached(dbapi_connection):
+        metrics.connection_closed(id(dbapi_connection))
+
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def pool_stats() -> dict:
+    return {name: metrics.stats() for name, metrics in pool_metrics.items()}
@@ -0,0 +1,76 @@
+import os
+import threading
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+from dotenv import load_dotenv
+from .pdf_extraction import ExtractedPage, PdfSource, iter_pdf_pages
+from .extraction_cache import extraction_cache
+from .text_normalization import estimate_tokens, normalize_page
+
+load_dotenv()
+
+# PDFs with at least this many pages are ingested progressively
+PROGRESSIVE_INGESTION_MIN_PAGES = int(os.getenv("PROGRESSIVE_INGESTION_MIN_PAGES", "100"))
+# Leading tokens collected before the preliminary summary and concepts are generated
+PROGRESSIVE_TOKEN_BUDGET = int(os.getenv("PROGRESSIVE_TOKEN_BUDGET", "2000"))
+
+
+def stream_pdf_pages(
+    source: PdfSource,
+    digest: str,
+    cancel: Optional[threading.Event] = None
+) -> Tuple[int, Iterator[ExtractedPage]]:
+    """
+    Stream a PDF's raw pages through the extraction cache.
+
+    Cached extractions are replayed from the cache. On a miss pages are
+    yielded as they are extracted and the complete result is cached once the
+    last page has been read.
+    """
+    cached = extraction_cache.get(digest)
+    if cached is not None:
+        page_count, pages = cached
+        return page_count, iter(pages)
+
+    page_count, pages = iter_pdf_pages(source, cancel=cancel)
+    return page_count, _cache_when_complete(digest, page_count, pages)
+
+
+def _cache_when_complete(digest: str, page_count: int, pages: Iterator[ExtractedPage]) -> Iterator[ExtractedPage]:
+    extracted = []
+    for page in pages:
+        extracted.append(page)
+        yield page
+    try:
+        extraction_cache.put(digest, (page_count, extracted))
+    except Exception as e:
+        # A cache write failure must never fail the upload
+        print(f"⚠ Failed to store extraction cache entry: {e}")
+
+
+def notify_at_token_budget(
+    pages: Iterable[ExtractedPage],
+    token_budget: int,
+    on_budget: Callable[[str], None]
+) -> Iterator[ExtractedPage]:
+    """
+    Pass pages through unchanged, calling `on_budget` with the normalized
+    leading text once it reaches `token_budget` tokens.
+
+    `on_budget` is called at most once, and not at all when the whole
+    document is smaller than the budget.
+    """
+    leading: List[str] = []
+    leading_chars = 0
+    notified = False
+
+    for page_num, text in pages:
+        if not notified:
+            page_text = normalize_page(text)
+            if page_text:
+                leading.append(page_text)
+                leading_chars += len(page_text)
+            if estimate_tokens(leading_chars) >= token_budget:
+                on_budget("\n\n".join(leading))
+                notified = True
+                leading = []
+        yield page_num, text
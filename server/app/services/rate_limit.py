@@ -0,0 +1,242 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Awaitable, Callable, Tuple
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, Request, status
+from .. import auth, models
+
+load_dotenv()
+
+# Per-user token buckets for the Gemini-backed endpoints. Costs are in units
+# of roughly one model round trip (see the *_cost functions below); a user can
+# spend LLM_RATE_LIMIT_CAPACITY units at once, refilled at
+# LLM_RATE_LIMIT_REFILL_PER_MINUTE units per minute
+LLM_RATE_LIMIT_ENABLED = os.getenv("LLM_RATE_LIMIT_ENABLED", "true").lower() == "true"
+LLM_RATE_LIMIT_CAPACITY = float(os.getenv("LLM_RATE_LIMIT_CAPACITY", "20"))
+LLM_RATE_LIMIT_REFILL_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_REFILL_PER_MINUTE", "10"))
+# Share buckets between workers through Redis (or anything speaking its
+# protocol and EVAL); without it each worker limits on its own
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL")
+RATE_LIMIT_MAX_TRACKED_USERS = int(os.getenv("RATE_LIMIT_MAX_TRACKED_USERS", "100000"))
+
+# (allowed, tokens left, seconds until the request would be allowed)
+Decision = Tuple[bool, float, float]
+
+
+def _refill_and_take(tokens: float, updated_at: float, now: float, capacity: float, rate: float, cost: float):
+    """Token bucket step: returns (tokens after, allowed, retry_after)."""
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate)
+    if tokens >= cost:
+        return tokens - cost, True, 0.0
+    return tokens, False, (cost - tokens) / rate
+
+
+class MemoryBucketBackend:
+    """Buckets in this process, by key, kept in least recently used order."""
+
+    name = "memory"
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_tracked: int = None):
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.max_tracked = RATE_LIMIT_MAX_TRACKED_USERS if max_tracked is None else max_tracked
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float) -> Decision:
+        with self._lock:
+            now = self._clock()
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            tokens, allowed, retry_after = _refill_and_take(tokens, updated_at, now, capacity, rate, cost)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_tracked:
+                self._forget_full(now, capacity, rate)
+            return allowed, tokens, retry_after
+
+    def _forget_full(self, now: float, capacity: float, rate: float):
+        """
+        Drop buckets that have refilled completely: they behave like new ones.
+        Only the least recently used end is checked, stopping at the first
+        bucket that is not full yet, so each bucket is dropped at most once
+        instead of rescanning all of them. Caller holds the lock.
+        """
+        while self._buckets:
+            key, (tokens, updated_at) = next(iter(self._buckets.items()))
+            if tokens + (now - updated_at) * rate < capacity:
+                break
+            del self._buckets[key]
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Atomic refill-and-take on a hash {tokens, updated_at}, timed by the Redis
+# clock so workers with skewed clocks agree. Numbers are returned as strings
+# because Redis truncates Lua numbers to integers
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class RedisBucketBackend:
+    """Buckets in Redis, shared by every worker. `client` is a redis.asyncio client (or stand-in)."""
+
+    name = "redis"
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBucketBackend":
+        # Optional dependency: only needed when RATE_LIMIT_REDIS_URL is set
+        import redis.asyncio
+
+        return cls(redis.asyncio.Redis.from_url(url))
+
+    async def take(self, key: str, capacity: float, rate: float, cost: float) -> Decision:
+        allowed, tokens, retry_after = await self.client.eval(
+            TOKEN_BUCKET_SCRIPT, 1, self.prefix + key, repr(capacity), repr(rate), repr(cost)
+        )
+        return bool(int(allowed)), float(tokens), float(retry_after)
+
+
+class RateLimiter:
+    """
+    Per-user token buckets with weighted costs. Limited requests get 429 with
+    Retry-After. If the shared backend fails, requests are allowed (and
+    counted) rather than failing every LLM endpoint with it.
+    """
+
+    def __init__(self, backend=None, capacity: float = None, refill_per_minute: float = None, enabled: bool = None):
+        self.backend = backend or MemoryBucketBackend()
+        self.capacity = LLM_RATE_LIMIT_CAPACITY if capacity is None else capacity
+        self.refill_per_minute = LLM_RATE_LIMIT_REFILL_PER_MINUTE if refill_per_minute is None else refill_per_minute
+        self.enabled = LLM_RATE_LIMIT_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._counters = defaultdict(lambda: {"allowed": 0, "limited": 0, "cost_allowed": 0.0, "cost_limited": 0.0})
+        self.backend_errors = 0
+
+    async def check(self, user_id: int, endpoint: str, cost: float):
+        """Spend `cost` from the user's bucket or raise 429."""
+        if not self.enabled:
+            return
+        # A request bigger than the bucket would never fit; it costs the whole bucket instead
+        cost = min(cost, self.capacity)
+        try:
+            allowed, _, retry_after = await self.backend.take(
+                f"user:{user_id}", self.capacity, self.refill_per_minute / 60, cost
+            )
+        except Exception as e:
+            print(f"⚠ Rate limit backend {self.backend.name} failed, allowing request: {e}")
+            with self._lock:
+                self.backend_errors += 1
+            return
+
+        with self._lock:
+            counters = self._counters[endpoint]
+            counters["allowed" if allowed else "limited"] += 1
+            counters["cost_allowed" if allowed else "cost_limited"] += cost
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many AI requests. Please wait before trying again.",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+            )
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self.backend_errors = 0
+        if hasattr(self.backend, "reset"):
+            self.backend.reset()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "backend": self.backend.name,
+                "capacity": self.capacity,
+                "refill_per_minute": self.refill_per_minute,
+                "backend_errors": self.backend_errors,
+                "endpoints": {
+                    endpoint: {**counters, "cost_allowed": round(counters["cost_allowed"], 2),
+                               "cost_limited": round(counters["cost_limited"], 2)}
+                    for endpoint, counters in self._counters.items()
+                }
+            }
+
+
+def _create_backend():
+    if RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisBucketBackend.from_url(RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            print("⚠ RATE_LIMIT_REDIS_URL is set but the redis package is not installed; limiting per worker")
+    return MemoryBucketBackend()
+
+
+rate_limiter = RateLimiter(_create_backend())
+
+
+def _int_param(request: Request, name: str, default: int) -> int:
+    try:
+        return max(0, int(request.query_params.get(name, default)))
+    except ValueError:
+        return default
+
+
+# Costs, in model round trips: generation time grows with the requested
+# output (summary words, quiz questions)
+def summary_cost(request: Request) -> float:
+    return 1 + _int_param(request, "max_length", 300) / 500
+
+
+def quiz_cost(request: Request) -> float:
+    return 1 + (_int_param(request, "num_mcq", 10) + _int_param(request, "num_short", 5)) / 10
+
+
+def concepts_cost(request: Request) -> float:
+    return 1.0
+
+
+def analysis_cost(request: Request) -> float:
+    summary = 1 + _int_param(request, "max_summary_length", 300) / 500
+    return summary + quiz_cost(request) + concepts_cost(request)
+
+
+def llm_rate_limit(endpoint: str, cost: Callable[[Request], float]):
+    """
+    Route dependency returning a `charge()` coroutine function that spends
+    `cost(request)` from the current user's bucket. Routes call it after
+    looking up the material and validating parameters, right before the
+    model call, so requests rejected with 4xx cost nothing.
+    """
+    def limit(request: Request, current_user: models.User = Depends(auth.get_current_user)) -> Callable[[], Awaitable[None]]:
+        async def charge():
+            await rate_limiter.check(current_user.id, endpoint, cost(request))
+        return charge
+    return limit
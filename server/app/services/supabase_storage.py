@@ -1,57 +1,122 @@
+import asyncio
 import os
+import threading
 import uuid
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional
-from supabase import create_client, Client
+from typing import AsyncIterator, BinaryIO, Coroutine, Dict, List, Optional, Union
+import httpx
 from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
+from .ttl_cache import TTLCache
+
 load_dotenv()
 
+# Paths per remove request when deleting many files
+STORAGE_DELETE_BATCH_SIZE = int(os.getenv("STORAGE_DELETE_BATCH_SIZE", "100"))
+# One pooled client serves every request: connections are kept alive and
+# reused, and multiplexed over HTTP/2 when the h2 package is installed
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "100"))
+STORAGE_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("STORAGE_MAX_KEEPALIVE_CONNECTIONS", "20"))
+STORAGE_HTTP2 = os.getenv("STORAGE_HTTP2", "true").lower() == "true"
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", "60"))
+STORAGE_CONNECT_TIMEOUT_SECONDS = float(os.getenv("STORAGE_CONNECT_TIMEOUT_SECONDS", "5"))
+# Bytes per read when streaming an upload from a file
+STORAGE_UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Paths per sign request when signing many files
+STORAGE_SIGN_BATCH_SIZE = int(os.getenv("STORAGE_SIGN_BATCH_SIZE", "100"))
+# Signed URLs are reused until they have less than SIGNED_URL_MIN_REMAINING_SECONDS
+# left, so a client always gets at least that long to use one; 0 entries disables the cache
+SIGNED_URL_CACHE_SIZE = int(os.getenv("SIGNED_URL_CACHE_SIZE", "10000"))
+SIGNED_URL_MIN_REMAINING_SECONDS = int(os.getenv("SIGNED_URL_MIN_REMAINING_SECONDS", "600"))
+# Upper bound on how long any signed URL stays cached
+SIGNED_URL_CACHE_MAX_TTL_SECONDS = 7 * 24 * 3600
+
+# Clients opened by run_storage_sync() when no app loop is running, per
+# service. They live for one call and never replace the shared client.
+_call_clients: ContextVar[Optional[Dict["SupabaseStorageService", httpx.AsyncClient]]] = ContextVar("storage_call_clients", default=None)
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _file_chunks(file: BinaryIO) -> AsyncIterator[bytes]:
+    # Disk reads happen in the threadpool so the event loop keeps serving
+    while True:
+        chunk = await run_in_threadpool(file.read, STORAGE_UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
 class SupabaseStorageService:
-    def __init__(self):
+    """
+    Supabase Storage over its REST API, with an httpx.AsyncClient shared by
+    every request. Methods that talk to storage are coroutines; code running
+    in worker threads calls them through run_storage_sync().
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport = None):
         self.supabase_url = os.getenv("SUPABASE_URL")
         self.supabase_anon_key = os.getenv("SUPABASE_ANON_KEY")
         self.supabase_service_role_key = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
         self.bucket_name = os.getenv("SUPABASE_STORAGE_BUCKET", "study-materials")
         self.storage_url = os.getenv("SUPABASE_STORAGE_URL")
-        
-        # Validate configuration
+        self.transport = transport  # A stand-in server in tests and benchmarks
+        self._configured = False
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        # The HTTP client belongs to the event loop that opened it
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        # Signed URLs by (object path, expiration); the expirations in use are
+        # tracked so every entry for a path can be dropped when it is deleted
+        self.signed_url_cache = TTLCache(SIGNED_URL_CACHE_SIZE, SIGNED_URL_CACHE_MAX_TTL_SECONDS)
+        self._signed_expirations = set()
+
+    @property
+    def api_key(self) -> Optional[str]:
+        # Service role key for admin operations, when available
+        return self.supabase_service_role_key or self.supabase_anon_key
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.supabase_url.rstrip('/')}/storage/v1"
+
+    def initialize(self):
+        """Validate the configuration. Runs once."""
+        with self._init_lock:
+            if not self._initialized:
+                self._configured = self._check_configuration()
+                self._initialized = True
+
+    def _check_configuration(self) -> bool:
         if not self.supabase_url:
             print("⚠ SUPABASE_URL not configured. Storage will be disabled.")
-            self.supabase = None
-            return
-        
+            return False
         if not self.storage_url:
             print("⚠ SUPABASE_STORAGE_URL not configured. Storage will be disabled.")
-            self.supabase = None
-            return
-        
-        # Initialize Supabase client with service role key for admin operations
-        try:
-            if self.supabase_service_role_key:
-                self.supabase: Client = create_client(
-                    self.supabase_url, 
-                    self.supabase_service_role_key
-                )
-                print("✓ Supabase client initialized with service role key")
-            elif self.supabase_anon_key:
-                self.supabase: Client = create_client(
-                    self.supabase_url, 
-                    self.supabase_anon_key
-                )
-                print("✓ Supabase client initialized with anon key")
-            else:
-                print("⚠ No Supabase keys found. Storage will be disabled.")
-                self.supabase = None
-        except Exception as e:
-            print(f"⚠ Failed to initialize Supabase client: {e}")
-            self.supabase = None
-    
+            return False
+        if not self.api_key:
+            print("⚠ No Supabase keys found. Storage will be disabled.")
+            return False
+        key_type = "service role" if self.supabase_service_role_key else "anon"
+        print(f"✓ Supabase storage configured with {key_type} key")
+        return True
+
     def is_configured(self) -> bool:
         """Check if Supabase storage is properly configured."""
-        return self.supabase is not None
-    
+        if not self._initialized:
+            self.initialize()
+        return self._configured
+
     def get_configuration_status(self) -> dict:
         """Get detailed configuration status for debugging."""
         return {
@@ -60,191 +125,287 @@ class SupabaseStorageService:
             "supabase_service_role_key": bool(self.supabase_service_role_key),
             "bucket_name": self.bucket_name,
             "storage_url": bool(self.storage_url),
-            "client_initialized": bool(self.supabase),
+            "client_initialized": self._http_client is not None,
+            "http2": self._http_client is not None and self._http2,
             "is_configured": self.is_configured()
         }
-    
-    def upload_file(self, file_content: bytes, file_name: str, content_type: str, user_id: int) -> str:
-        """Upload file to Supabase Storage and return the public URL."""
-        if not self.supabase:
+
+    @property
+    def _http2(self) -> bool:
+        return STORAGE_HTTP2 and self.transport is None and _http2_available()
+
+    async def open(self):
+        """Create the pooled HTTP client on the running event loop (called at startup)."""
+        self.loop = asyncio.get_running_loop()
+        if self._http_client is None and self.is_configured():
+            self._http_client = self._new_client()
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.api_url,
+            headers={"Authorization": f"Bearer {self.api_key}", "apikey": self.api_key},
+            timeout=httpx.Timeout(STORAGE_TIMEOUT_SECONDS, connect=STORAGE_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=STORAGE_MAX_CONNECTIONS, max_keepalive_connections=STORAGE_MAX_KEEPALIVE_CONNECTIONS),
+            http2=self._http2,
+            transport=self.transport
+        )
+
+    async def aclose(self):
+        """Close the HTTP client and its connections (called at shutdown)."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+        self._http_client = None
+        self.loop = None
+
+    async def _http(self) -> httpx.AsyncClient:
+        call_clients = _call_clients.get()
+        if call_clients is not None:
+            # Inside run_storage_sync() on a loop of its own
+            if self not in call_clients:
+                call_clients[self] = self._new_client()
+            return call_clients[self]
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # A client opened on another (finished) loop cannot be reused
+            if self.loop is not None and not self.loop.is_closed() and self.loop.is_running():
+                raise RuntimeError("Storage client belongs to another running event loop; use run_storage_sync()")
+            self._http_client = None
+        await self.open()
+        return self._http_client
+
+    def _object_path(self, file_url: str) -> Optional[str]:
+        """Object path of one of our storage URLs, or None for other URLs."""
+        if self.storage_url and self.storage_url in file_url:
+            return file_url.replace(f"{self.storage_url}/", "")
+        return None
+
+    async def upload_file(self, file_content: Union[bytes, BinaryIO], file_name: str, content_type: str, user_id: int) -> str:
+        """
+        Upload file to Supabase Storage and return the public URL.
+
+        `file_content` may be bytes or an open binary file; files are streamed
+        in chunks instead of being read into memory.
+        """
+        if not self.is_configured():
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
                 detail="Storage service is not configured"
             )
-        
-        try:
-            # Generate unique file path
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            unique_id = str(uuid.uuid4())[:8]
-            file_extension = file_name.split('.')[-1] if '.' in file_name else 'pdf'
-            file_path = f"user_{user_id}/{timestamp}_{unique_id}.{file_extension}"
-            
-            print(f"Uploading file to path: {file_path}")
-            
-            # Upload to Supabase Storage
-            # Convert bytes to the format expected by Supabase
+
+        # Generate unique file path
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        unique_id = str(uuid.uuid4())[:8]
+        file_extension = file_name.split('.')[-1] if '.' in file_name else 'pdf'
+        file_path = f"user_{user_id}/{timestamp}_{unique_id}.{file_extension}"
+
+        headers = {"Content-Type": content_type, "x-upsert": "false"}
+        if isinstance(file_content, bytes):
+            body = file_content
+        else:
             try:
-                response = self.supabase.storage.from_(self.bucket_name).upload(
-                    path=file_path,
-                    file=file_content,
-                    file_options={
-                        "content-type": content_type,
-                        "upsert": "false"  # Changed from False to "false" string
-                    }
-                )
-            except Exception as upload_error:
-                print(f"Upload exception: {upload_error}")
-                print(f"Exception type: {type(upload_error)}")
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Upload failed: {str(upload_error)}"
-                )
-            
-            print(f"Upload response type: {type(response)}")
-            print(f"Upload response: {response}")
-            
-            # Check if upload was successful
-            # Handle different Supabase response formats
-            upload_successful = False
-            error_message = None
-            
-            # Handle boolean response (newer Supabase client versions)
-            if isinstance(response, bool):
-                if response:
-                    print(f"Upload successful (boolean response)")
-                    upload_successful = True
-                else:
-                    error_message = "Upload returned False"
-            elif hasattr(response, 'data') and response.data is not None:
-                # Upload successful - has data
-                print(f"Upload successful with data: {response.data}")
-                upload_successful = True
-            elif hasattr(response, 'error') and response.error is not None:
-                # Upload failed - has error
-                error_message = str(response.error)
-                print(f"Supabase upload error: {error_message}")
-            elif isinstance(response, dict):
-                # Handle dict response
-                if 'error' in response and response['error'] is not None:
-                    error_message = str(response['error'])
-                    print(f"Supabase upload error (dict): {error_message}")
-                elif 'data' in response:
-                    print(f"Upload successful (dict): {response['data']}")
-                    upload_successful = True
-                else:
-                    # Assume success if no error
-                    print(f"Upload response (dict, assuming success): {response}")
-                    upload_successful = True
-            elif response is not None:
-                # Some other response format, assume success if not None
-                print(f"Upload response (unknown format, assuming success): {response}")
-                upload_successful = True
+                size = os.fstat(file_content.fileno()).st_size - file_content.tell()
+            except (AttributeError, OSError, ValueError):
+                body = file_content.read()  # In-memory buffer: already in memory
             else:
-                error_message = "Upload returned None response"
-            
-            if error_message:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=f"Failed to upload file: {error_message}"
-                )
-            
-            if not upload_successful:
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail="Upload failed with unknown response format"
-                )
-            
-            # Generate public URL
-            public_url = f"{self.storage_url}/{file_path}"
-            print(f"✓ File uploaded to Supabase: {public_url}")
-            
-            return public_url
-            
-        except HTTPException:
-            raise
-        except Exception as e:
-            print(f"Supabase upload error: {e}")
-            print(f"Error type: {type(e)}")
+                headers["Content-Length"] = str(size)
+                body = _file_chunks(file_content)
+
+        print(f"Uploading file to path: {file_path}")
+        try:
+            client = await self._http()
+            response = await client.post(f"/object/{self.bucket_name}/{file_path}", content=body, headers=headers)
+        except httpx.HTTPError as e:
+            print(f"Supabase upload error: {e!r}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Failed to upload file to storage: {str(e)}"
+                detail=f"Failed to upload file to storage: {str(e) or type(e).__name__}"
             )
-    
-    def delete_file(self, file_url: str) -> bool:
+
+        if response.is_error:
+            print(f"Supabase upload error: {response.status_code} {response.text}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to upload file: {response.status_code} {response.text}"
+            )
+
+        public_url = f"{self.storage_url}/{file_path}"
+        print(f"✓ File uploaded to Supabase: {public_url}")
+        return public_url
+
+    async def delete_file(self, file_url: str) -> bool:
         """Delete file from Supabase Storage."""
-        if not self.supabase:
-            return False
-        
-        try:
-            # Extract file path from URL
-            if self.storage_url in file_url:
-                file_path = file_url.replace(f"{self.storage_url}/", "")
-            else:
+        return (await self.delete_files([file_url]))[file_url]
+
+    async def delete_files(self, file_urls: List[str], batch_size: int = None) -> Dict[str, bool]:
+        """
+        Delete files from Supabase Storage with one remove request per batch
+        of paths, the batches sent concurrently. Returns whether each URL was
+        deleted.
+        """
+        results = {file_url: False for file_url in file_urls}
+        if not self.is_configured():
+            return results
+        batch_size = batch_size or STORAGE_DELETE_BATCH_SIZE
+
+        urls_by_path = {}
+        for file_url in file_urls:
+            path = self._object_path(file_url)
+            if path is None:
                 print(f"Invalid file URL format: {file_url}")
-                return False
-            
-            response = self.supabase.storage.from_(self.bucket_name).remove([file_path])
-            
-            print(f"Delete response: {response}")
-            
-            # Check if deletion was successful
-            if hasattr(response, 'data') and response.data:
-                print(f"✓ File deleted from Supabase: {file_path}")
-                return True
-            elif hasattr(response, 'error') and response.error:
-                print(f"Failed to delete file: {response.error}")
-                return False
-            elif isinstance(response, list) and len(response) > 0:
-                # Sometimes returns a list of deleted files
-                print(f"✓ File deleted from Supabase: {file_path}")
-                return True
             else:
-                print(f"Unexpected delete response: {response}")
-                return False
-                
-        except Exception as e:
-            print(f"Supabase delete error: {e}")
-            return False
-    
-    def generate_presigned_url(self, file_url: str, expiration: int = 3600) -> str:
-        """Generate a signed URL for private file access."""
-        if not self.supabase:
+                urls_by_path[path] = file_url
+
+        paths = list(urls_by_path)
+        self.invalidate_signed_urls(paths)
+        batches = [paths[start:start + batch_size] for start in range(0, len(paths), batch_size)]
+        for removed in await asyncio.gather(*(self._remove(batch) for batch in batches)):
+            for name in removed:
+                if name in urls_by_path:
+                    results[urls_by_path[name]] = True
+        return results
+
+    async def _remove(self, paths: List[str]) -> List[str]:
+        """Remove objects; returns the names that were removed (missing paths are left out)."""
+        try:
+            client = await self._http()
+            response = await client.request("DELETE", f"/object/{self.bucket_name}", json={"prefixes": paths})
+            response.raise_for_status()
+            removed = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Supabase delete error for {len(paths)} files: {e}")
+            return []
+
+        if not isinstance(removed, list):
+            print(f"Unexpected delete response: {removed}")
+            return []
+        print(f"✓ Deleted {len(removed)} of {len(paths)} files from Supabase")
+        return [item.get("name") for item in removed if isinstance(item, dict)]
+
+    def _cache_signed_url(self, file_path: str, expiration: int, signed_url: str):
+        # Cached only while the URL still has the minimum remaining lifetime left
+        self._signed_expirations.add(expiration)
+        self.signed_url_cache.put((file_path, expiration), signed_url, expiration - SIGNED_URL_MIN_REMAINING_SECONDS)
+
+    def invalidate_signed_urls(self, file_paths: List[str]):
+        """Forget cached signed URLs for these object paths."""
+        for file_path in file_paths:
+            for expiration in tuple(self._signed_expirations):
+                self.signed_url_cache.invalidate((file_path, expiration))
+
+    async def generate_presigned_url(self, file_url: str, expiration: int = 3600) -> str:
+        """
+        Generate a signed URL for private file access (the original URL if
+        signing fails). A URL signed earlier for the same path and expiration
+        is returned while it has at least SIGNED_URL_MIN_REMAINING_SECONDS left.
+        """
+        if not self.is_configured():
             return file_url
-        
+        file_path = self._object_path(file_url)
+        if file_path is None:
+            return file_url  # Return original URL if format is unexpected
+
+        cached = self.signed_url_cache.get((file_path, expiration))
+        if cached is not None:
+            return cached
+
         try:
-            # Extract file path from URL
-            if self.storage_url in file_url:
-                file_path = file_url.replace(f"{self.storage_url}/", "")
-            else:
-                return file_url  # Return original URL if format is unexpected
-            
-            # Create signed URL
-            response = self.supabase.storage.from_(self.bucket_name).create_signed_url(
-                path=file_path,
-                expires_in=expiration
-            )
-            
-            if response.get('signedURL'):
-                return response['signedURL']
-            else:
-                print(f"Failed to create signed URL: {response}")
-                return file_url
-                
-        except Exception as e:
+            client = await self._http()
+            response = await client.post(f"/object/sign/{self.bucket_name}/{file_path}", json={"expiresIn": expiration})
+            response.raise_for_status()
+            signed_url = response.json().get("signedURL")
+        except (httpx.HTTPError, ValueError) as e:
             print(f"Signed URL error: {e}")
-            return file_url  # Return original URL on error
-    
+            return file_url
+
+        if not signed_url:
+            print(f"Failed to create signed URL: {response.text}")
+            return file_url
+        signed_url = f"{self.api_url}{signed_url}"
+        self._cache_signed_url(file_path, expiration, signed_url)
+        return signed_url
+
+    async def generate_presigned_urls(self, file_urls: List[str], expiration: int = 3600, batch_size: int = None) -> Dict[str, str]:
+        """
+        Signed URLs for many files, from the cache where possible and with one
+        sign request per batch of the remaining paths, the batches sent
+        concurrently. Files that cannot be signed map to their original URL.
+        """
+        results = {file_url: file_url for file_url in file_urls}
+        if not self.is_configured():
+            return results
+        batch_size = batch_size or STORAGE_SIGN_BATCH_SIZE
+
+        urls_by_path = {}
+        for file_url in file_urls:
+            file_path = self._object_path(file_url)
+            if file_path is None:
+                continue
+            cached = self.signed_url_cache.get((file_path, expiration))
+            if cached is not None:
+                results[file_url] = cached
+            else:
+                urls_by_path[file_path] = file_url
+
+        paths = list(urls_by_path)
+        batches = [paths[start:start + batch_size] for start in range(0, len(paths), batch_size)]
+        for signed in await asyncio.gather(*(self._sign(batch, expiration) for batch in batches)):
+            for file_path, signed_url in signed.items():
+                if file_path in urls_by_path:
+                    signed_url = f"{self.api_url}{signed_url}"
+                    self._cache_signed_url(file_path, expiration, signed_url)
+                    results[urls_by_path[file_path]] = signed_url
+        return results
+
+    async def _sign(self, paths: List[str], expiration: int) -> Dict[str, str]:
+        """Sign objects; returns the signed URL path of each object that was signed."""
+        try:
+            client = await self._http()
+            response = await client.post(f"/object/sign/{self.bucket_name}", json={"expiresIn": expiration, "paths": paths})
+            response.raise_for_status()
+            signed = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Signed URL error for {len(paths)} files: {e}")
+            return {}
+
+        if not isinstance(signed, list):
+            print(f"Unexpected sign response: {signed}")
+            return {}
+        return {
+            item["path"]: item["signedURL"]
+            for item in signed
+            if isinstance(item, dict) and item.get("path") and item.get("signedURL")
+        }
+
     def get_public_url(self, file_path: str) -> str:
         """Get public URL for a file."""
-        if not self.supabase:
-            return ""
-        
-        try:
-            response = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
-            return response.get('publicURL', '')
-        except Exception as e:
-            print(f"Public URL error: {e}")
+        if not self.is_configured():
             return ""
+        return f"{self.api_url}/object/public/{self.bucket_name}/{file_path}"
 
 # Create a singleton instance
-supabase_storage = SupabaseStorageService()
\ No newline at end of file
+supabase_storage = SupabaseStorageService()
+
+
+def run_storage_sync(coroutine: Coroutine):
+    """
+    Run a storage coroutine from a worker thread (background tasks, executor
+    jobs) on the event loop that owns the shared client, and wait for it.
+
+    Without a running app loop it runs in a fresh loop with a short-lived
+    client of its own, closed afterwards; the shared client is left alone, so
+    concurrent callers in other threads cannot close each other's pools.
+    """
+    loop = supabase_storage.loop
+    if loop is not None and loop.is_running():
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+    async def run_with_own_client():
+        clients = {}
+        _call_clients.set(clients)
+        try:
+            return await coroutine
+        finally:
+            for client in clients.values():
+                await client.aclose()
+
+    return asyncio.run(run_with_own_client())
@@ -0,0 +1,147 @@
+import os
+import threading
+import time
+import zlib
+from typing import Optional, Union
+from dotenv import load_dotenv
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+load_dotenv()
+
+# Values smaller than this (UTF-8 bytes) are stored uncompressed
+TEXT_COMPRESSION_MIN_BYTES = int(os.getenv("TEXT_COMPRESSION_MIN_BYTES", "1024"))
+TEXT_COMPRESSION_LEVEL = int(os.getenv("TEXT_COMPRESSION_LEVEL", "6"))
+
+# First byte of every stored value. A new codec gets a new header value so
+# rows written by older code stay readable.
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+
+
+class CompressionMetrics:
+    """Counters for stored size and the CPU time spent encoding and decoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.encoded_values = 0
+        self.compressed_values = 0
+        self.decoded_values = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.encode_cpu_seconds = 0.0
+        self.decode_cpu_seconds = 0.0
+
+    def record_encode(self, raw_bytes: int, stored_bytes: int, compressed: bool, cpu_seconds: float):
+        with self._lock:
+            self.encoded_values += 1
+            self.compressed_values += int(compressed)
+            self.raw_bytes += raw_bytes
+            self.stored_bytes += stored_bytes
+            self.encode_cpu_seconds += cpu_seconds
+
+    def record_decode(self, cpu_seconds: float):
+        with self._lock:
+            self.decoded_values += 1
+            self.decode_cpu_seconds += cpu_seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "encoded_values": self.encoded_values,
+                "compressed_values": self.compressed_values,
+                "decoded_values": self.decoded_values,
+                "raw_bytes": self.raw_bytes,
+                "stored_bytes": self.stored_bytes,
+                "compression_ratio": round(self.raw_bytes / self.stored_bytes, 3) if self.stored_bytes else 0.0,
+                "encode_cpu_ms": round(self.encode_cpu_seconds * 1000, 3),
+                "decode_cpu_ms": round(self.decode_cpu_seconds * 1000, 3),
+                "min_bytes": TEXT_COMPRESSION_MIN_BYTES,
+                "level": TEXT_COMPRESSION_LEVEL
+            }
+
+
+def compress_text(value: str, min_bytes: Optional[int] = None, level: Optional[int] = None) -> bytes:
+    """Encode text as a header byte followed by UTF-8, zlib-compressed when large enough to pay off."""
+    min_bytes = TEXT_COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    level = TEXT_COMPRESSION_LEVEL if level is None else level
+
+    start = time.thread_time()
+    raw = value.encode("utf-8")
+    data = bytes([FORMAT_RAW]) + raw
+    compressed = False
+    if len(raw) >= min_bytes:
+        candidate = bytes([FORMAT_ZLIB]) + zlib.compress(raw, level)
+        # Already-dense text can grow under zlib; keep whichever is smaller
+        if len(candidate) < len(data):
+            data = candidate
+            compressed = True
+    compression_metrics.record_encode(len(raw), len(data), compressed, time.thread_time() - start)
+    return data
+
+
+def decompress_text(data: Union[bytes, memoryview]) -> str:
+    """Decode a value written by compress_text."""
+    start = time.thread_time()
+    data = bytes(data)
+    if not data:
+        raise ValueError("Compressed text value is missing its header byte")
+    header, body = data[0], data[1:]
+    if header == FORMAT_RAW:
+        value = body.decode("utf-8")
+    elif header == FORMAT_ZLIB:
+        value = zlib.decompress(body).decode("utf-8")
+    else:
+        raise ValueError(f"Unknown compressed text format {header:#04x}")
+    compression_metrics.record_decode(time.thread_time() - start)
+    return value
+
+
+def decompress_text_prefix(data: Union[bytes, memoryview], max_chars: int) -> str:
+    """
+    Decode at most the first `max_chars` characters of a value written by
+    compress_text. Only the leading part of a compressed body is inflated, and
+    `data` may itself be a truncated prefix of the stored value.
+    """
+    data = bytes(data)
+    if not data:
+        raise ValueError("Compressed text value is missing its header byte")
+    header, body = data[0], data[1:]
+    max_bytes = max_chars * 4  # Upper bound on UTF-8 bytes per character
+    if header == FORMAT_RAW:
+        raw = body[:max_bytes]
+    elif header == FORMAT_ZLIB:
+        raw = zlib.decompressobj().decompress(body, max_bytes)
+    else:
+        raise ValueError(f"Unknown compressed text format {header:#04x}")
+    # The cut can land inside a multi-byte character
+    return raw.decode("utf-8", errors="ignore")[:max_chars]
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column stored as binary, zlib-compressed above TEXT_COMPRESSION_MIN_BYTES.
+
+    Python code reads and writes plain strings. Values are decompressed when
+    the column is loaded, so queries that defer the column skip both the
+    transfer and the decompression.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
+# Create a singleton instance
+compression_metrics = CompressionMetrics()
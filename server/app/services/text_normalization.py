@@ -0,0 +1,146 @@
+import math
+import re
+from collections import Counter
+from typing import Iterator, List, Set, Tuple
+
+# Lines at the top and bottom of each page checked for running headers/footers
+EDGE_LINES = 3
+# A line is boilerplate when it appears on at least this share of pages (and 3+ pages)
+BOILERPLATE_PAGE_RATIO = 0.5
+BOILERPLATE_MIN_PAGES = 3
+
+# Rough average for English text with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_DIGITS = re.compile(r"\d+")
+_BLANK_RUNS = re.compile(r"\n{3,}")
+_PAGE_NUMBER = re.compile(r"^[-\u2013 ]*(page\s*)?\d{1,5}(\s*(of|/)\s*\d{1,5})?[-\u2013 ]*$", re.IGNORECASE)
+
+ExtractedPage = Tuple[int, str]
+
+
+def estimate_tokens(chars: int) -> int:
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+
+def _signature(line: str) -> str:
+    """Compare header/footer lines ignoring case, spacing and page numbers."""
+    return _DIGITS.sub("#", _SPACES.sub(" ", line).strip().lower())
+
+
+def _edge_indexes(lines: List[str]) -> Set[int]:
+    """
+    Indexes of the first and last EDGE_LINES non-empty lines of a page. Short
+    pages (slides) get fewer edge lines so their body is never treated as a
+    header or footer.
+    """
+    non_empty = [i for i, line in enumerate(lines) if line.strip()]
+    edge = min(EDGE_LINES, len(non_empty) // 3)
+    if not edge:
+        return set()
+    return set(non_empty[:edge] + non_empty[-edge:])
+
+
+def find_boilerplate(pages_lines: List[List[str]]) -> Set[str]:
+    """Signatures of header/footer lines that repeat across pages."""
+    if len(pages_lines) < BOILERPLATE_MIN_PAGES:
+        return set()
+
+    edge_counts = Counter()
+    body_counts = Counter()
+    for lines in pages_lines:
+        edges = _edge_indexes(lines)
+        edge_counts.update({_signature(lines[i]) for i in edges})
+        body_counts.update({_signature(line) for i, line in enumerate(lines) if i not in edges})
+
+    # Lines that also repeat in page bodies (numbered steps, table rows) are content
+    threshold = max(BOILERPLATE_MIN_PAGES, math.ceil(len(pages_lines) * BOILERPLATE_PAGE_RATIO))
+    return {
+        signature for signature, count in edge_counts.items()
+        if signature and count >= threshold and body_counts[signature] < threshold
+    }
+
+
+def _clean_lines(lines: List[str], boilerplate: Set[str]) -> Iterator[str]:
+    """Drop boilerplate and page-number lines at the page edges and collapse whitespace."""
+    edges = _edge_indexes(lines)
+    for i, line in enumerate(lines):
+        line = _SPACES.sub(" ", line).strip()
+        if i in edges and (_signature(line) in boilerplate or _PAGE_NUMBER.match(line)):
+            continue
+        yield line
+
+
+def normalize_page(text: str, boilerplate: Set[str] = frozenset()) -> str:
+    """
+    Normalize one page in a single pass: remove boilerplate lines, join words
+    hyphenated across line breaks and collapse runs of whitespace and blank lines.
+    """
+    lines = text.splitlines()
+    out: List[str] = []
+    previous_blank = True  # Also drops leading blank lines
+
+    for line in _clean_lines(lines, boilerplate):
+        if not line:
+            if not previous_blank:
+                out.append("")
+            previous_blank = True
+            continue
+
+        last = out[-1] if out else ""
+        if (
+            not previous_blank
+            and len(last) > 1
+            and last.endswith("-")
+            and last[-2].isalpha()
+            and line[0].islower()
+        ):
+            # "exam-" + "ple continues" -> "example continues"
+            out[-1] = last[:-1] + line
+        else:
+            out.append(line)
+        previous_blank = False
+
+    while out and not out[-1]:
+        out.pop()
+    return "\n".join(out)
+
+
+def collapse_whitespace(text: str) -> str:
+    """
+    Collapse runs of spaces and blank lines, keeping line breaks. Cheap enough
+    to run per LLM call on text that is not normalized at ingestion (text
+    uploads keep their formatting); normalized PDF text comes back unchanged.
+    """
+    lines = (_SPACES.sub(" ", line).strip() for line in text.splitlines())
+    return _BLANK_RUNS.sub("\n\n", "\n".join(lines)).strip()
+
+
+def normalize_pages(pages: List[ExtractedPage]) -> Tuple[List[ExtractedPage], dict]:
+    """
+    Normalize extracted PDF pages at ingestion.
+
+    Returns the non-empty normalized pages and size statistics, including the
+    estimated number of LLM input tokens saved.
+    """
+    pages_lines = [text.splitlines() for _, text in pages]
+    boilerplate = find_boilerplate(pages_lines)
+
+    normalized = []
+    raw_chars = 0
+    normalized_chars = 0
+    for page_num, text in pages:
+        raw_chars += len(text)
+        page_text = normalize_page(text, boilerplate)
+        if page_text:
+            normalized.append((page_num, page_text))
+            normalized_chars += len(page_text)
+
+    stats = {
+        "raw_chars": raw_chars,
+        "normalized_chars": normalized_chars,
+        "boilerplate_lines": len(boilerplate),
+        "tokens_saved": estimate_tokens(raw_chars) - estimate_tokens(normalized_chars)
+    }
+    return normalized, stats
@@ -0,0 +1,228 @@
+import hashlib
+import io
+import os
+import tempfile
+from typing import BinaryIO, List, Optional, Union
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, parse_options_header
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MB = 1024 * 1024
+
+# Upload limits
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE_MB", "100")) * MB
+UPLOAD_SPOOL_MEMORY = int(os.getenv("UPLOAD_SPOOL_MEMORY_MB", "2")) * MB
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File too large. Maximum upload size is {max_size // MB} MB."
+    )
+
+
+class SpooledUpload:
+    """
+    Upload body spooled in memory up to `max_memory` bytes, then rolled over
+    to a named temporary file on disk. Writes beyond `max_size` are rejected.
+    The SHA-256 of the body is computed while streaming.
+    """
+
+    def __init__(self, max_size: int = None, max_memory: int = None):
+        self.max_size = MAX_UPLOAD_SIZE if max_size is None else max_size
+        self.max_memory = UPLOAD_SPOOL_MEMORY if max_memory is None else max_memory
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self.path: Optional[str] = None
+        self._buffer: Optional[io.BytesIO] = io.BytesIO()
+        self._file: BinaryIO = self._buffer
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+
+    def write(self, chunk: bytes):
+        """Append a chunk, enforcing the size limit before anything is written."""
+        if self.size + len(chunk) > self.max_size:
+            raise _too_large(self.max_size)
+        if self.path is None and self.size + len(chunk) > self.max_memory:
+            self._rollover()
+        self._file.write(chunk)
+        self._digest.update(chunk)
+        self.size += len(chunk)
+
+    def _rollover(self):
+        """Move the in-memory buffer to a temporary file on disk."""
+        fd, self.path = tempfile.mkstemp(prefix="upload_", suffix=".spool", dir=UPLOAD_SPOOL_DIR)
+        self._file = os.fdopen(fd, "w+b")
+        self._file.write(self._buffer.getbuffer())
+        self._buffer.close()
+        self._buffer = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+    
+    @property
+    def sha256(self) -> str:
+        """Hex SHA-256 of everything written so far."""
+        return self._digest.hexdigest()
+
+    def finish(self):
+        """Flush pending writes so readers see the whole body."""
+        self._file.flush()
+
+    def source(self) -> Union[bytes, str]:
+        """PDF extraction source: the bytes while in memory, otherwise the spool file path."""
+        if self.in_memory:
+            return self._buffer.getvalue()
+        return self.path
+
+    def open(self) -> BinaryIO:
+        """Open an independent reader positioned at the start of the body."""
+        if self.in_memory:
+            return io.BytesIO(self._buffer.getvalue())
+        return open(self.path, "rb")
+
+    def read_bytes(self) -> bytes:
+        """Read the whole body into memory."""
+        with self.open() as reader:
+            return reader.read()
+
+    def close(self):
+        self._file.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class _FilePartCollector:
+    """MultipartParser callbacks that keep the headers and data of one file field."""
+
+    def __init__(self, field_name: str):
+        self.field_name = field_name
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.found = False
+        self.pending: List[bytes] = []
+        self._headers = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._capturing = False
+
+    def on_part_begin(self):
+        self._headers = {}
+        self._capturing = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", errors="replace")
+        # Only the first part with the expected field name is kept
+        if name != self.field_name or self.found:
+            return
+        self.found = True
+        self._capturing = True
+        self.filename = options.get(b"filename", b"").decode("utf-8", errors="replace") or None
+        content_type, _ = parse_options_header(self._headers.get(b"content-type", b""))
+        self.content_type = content_type.decode("latin-1") or None
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._capturing:
+            self.pending.append(data[start:end])
+
+    def on_part_end(self):
+        self._capturing = False
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+
+async def spool_multipart_file(request: Request, field_name: str = "file", max_size: int = None) -> SpooledUpload:
+    """
+    Parse a multipart/form-data request body as it streams in and write the
+    `field_name` file part straight into a SpooledUpload.
+
+    The size limit is enforced while the body is being received, so oversized
+    uploads (including chunked ones without a Content-Length) are rejected
+    without reading the rest of the body. The part's filename and content type
+    are set on the returned spool.
+    """
+    spool = SpooledUpload(max_size=max_size)
+    # Allow some room for the multipart framing and any small form fields
+    max_body = spool.max_size + MB
+    
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        spool.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data upload."
+        )
+    
+    collector = _FilePartCollector(field_name)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise _too_large(spool.max_size)
+            parser.write(chunk)
+            for data in collector.pending:
+                if spool.in_memory and spool.size + len(data) <= spool.max_memory:
+                    spool.write(data)
+                else:
+                    # Disk writes go to the threadpool to keep the event loop free
+                    await run_in_threadpool(spool.write, data)
+            collector.pending.clear()
+        parser.finalize()
+        
+        if not collector.found:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Missing file field '{field_name}'."
+            )
+        spool.filename = collector.filename
+        spool.content_type = collector.content_type
+        spool.finish()
+    except MultipartParseError as parse_error:
+        spool.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed multipart body: {parse_error}"
+        )
+    except BaseException:
+        spool.close()
+        raise
+    return spool
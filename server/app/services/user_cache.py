@@ -0,0 +1,51 @@
+import os
+from typing import Iterable, Optional
+from dotenv import load_dotenv
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from .. import models
+from .ttl_cache import TTLCache
+
+load_dotenv()
+
+# Authenticated user records, keyed by user id (the access token subject).
+# The TTL bounds how long another worker's change can go unnoticed: each
+# process invalidates only the changes made through its own sessions
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+
+user_cache = TTLCache(USER_CACHE_SIZE, USER_CACHE_TTL_SECONDS)
+
+
+def _snapshot(user: models.User) -> models.User:
+    """
+    A detached copy of a loaded user's column values, safe to share between
+    requests: it belongs to no session, so no request can expire or modify it.
+    """
+    copy = models.User(**{
+        attribute.key: getattr(user, attribute.key)
+        for attribute in inspect(models.User).column_attrs
+    })
+    make_transient_to_detached(copy)
+    return copy
+
+
+def get_cached_user(user_id: int) -> Optional[models.User]:
+    return user_cache.get(user_id)
+
+
+def cache_user(user: models.User) -> models.User:
+    """Cache a user loaded from the database; returns the cached copy."""
+    copy = _snapshot(user)
+    user_cache.put(user.id, copy)
+    return copy
+
+
+def invalidate_users(user_ids: Iterable[int]):
+    for user_id in user_ids:
+        user_cache.invalidate(user_id)
+
+
+def user_cache_stats() -> dict:
+    # Every hit is one users query get_current_user did not run
+    return {**user_cache.stats(), "queries_saved": user_cache.hits}
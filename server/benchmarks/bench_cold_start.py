@@ -0,0 +1,87 @@
+"""
+Benchmark cold start: import of app.main to the first served request.
+
+Each run is a fresh interpreter that imports the app, runs the lifespan
+startup (through TestClient) and sends GET /health, timing each phase. The
+per-component startup timings come from /metrics. The "sequential" column
+is the sum of the components, i.e. what startup costs when they run one
+after another as they did at import time.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_cold_start
+    python -m benchmarks.bench_cold_start --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child interpreter; prints one JSON line of timings
+CHILD = """
+import time
+start = time.perf_counter()
+import json
+import os
+from fastapi.testclient import TestClient
+from app.main import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    ready = time.perf_counter()
+    assert client.get("/health").status_code == 200
+    first_request = time.perf_counter()
+    startup = client.get("/metrics", headers={"X-Metrics-Token": os.environ["METRICS_TOKEN"]}).json()["startup"]
+print("BENCH " + json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (ready - imported) * 1000,
+    "first_request_ms": (first_request - ready) * 1000,
+    "total_ms": (first_request - start) * 1000,
+    "components": {name: timing["ms"] for name, timing in startup["components"].items()}
+}))
+"""
+
+
+def measure_once(env: dict) -> dict:
+    server_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=server_dir, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith("BENCH "))
+    return json.loads(line[len("BENCH "):])
+
+
+def run(runs: int):
+    env = dict(os.environ)
+    # The benchmark needs no database: skip create_all unless explicitly asked for
+    env.setdefault("APP_ENV", "benchmark")
+    env.setdefault("METRICS_TOKEN", "benchmark")
+    results = [measure_once(env) for _ in range(runs)]
+
+    def median(key):
+        return statistics.median(result[key] for result in results)
+
+    components = sorted({name for result in results for name in result["components"]})
+    print(f"{runs} cold starts (APP_ENV={env['APP_ENV']}), median ms")
+    print(f"{'import':>8} {'startup':>8} {'1st req':>8} {'total':>8} {'sequential':>11}  components")
+    sequential = statistics.median(sum(result["components"].values()) for result in results)
+    component_medians = ", ".join(
+        f"{name} {statistics.median(result['components'].get(name, 0) for result in results):.0f}"
+        for name in components
+    )
+    print(
+        f"{median('import_ms'):>8.0f} {median('startup_ms'):>8.0f} {median('first_request_ms'):>8.0f}"
+        f" {median('total_ms'):>8.0f} {sequential:>11.0f}  {component_medians}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+    run(args.runs)
+
+
+if __name__ == "__main__":
+    main()
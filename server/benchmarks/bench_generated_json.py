@@ -0,0 +1,135 @@
+"""
+Benchmark JSON columns against JSON-encoded strings for generated data.
+
+Writes and reads realistic quiz questions and key concepts stored both ways:
+as Text holding json.dumps output (parsed in Python on every read) and as the
+JSONB/JSON column type used by GeneratedData. Also times finding the rows
+with a "hard" question, which the string encoding can only do in Python.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_generated_json
+    python -m benchmarks.bench_generated_json --rows 5000 --url postgresql://localhost/bench
+"""
+import argparse
+import json
+import time
+
+from sqlalchemy import Column, Integer, MetaData, Table, Text, create_engine, func, insert, select
+
+DEFAULT_ROWS = 2000
+DIFFICULTIES = ["easy", "medium", "hard"]
+
+
+def sample_generated(i: int):
+    """Nine quiz questions and ten concepts, shaped like gemini_service output."""
+    quiz = [
+        {
+            "question": f"Question {i}.{n}: which statement about gradient descent is correct?",
+            "type": "mcq" if n < 6 else "short",
+            "options": [f"Option {letter}" for letter in "ABCD"] if n < 6 else None,
+            "correct_answer": "Option B" if n < 6 else "The weights move against the gradient.",
+            "difficulty": DIFFICULTIES[(i + n) % 3] if i % 4 else "easy",
+            "explanation": "Each step subtracts the learning rate times the gradient of the loss."
+        }
+        for n in range(9)
+    ]
+    concepts = [f"Concept {i % 50}.{n}" for n in range(10)]
+    return quiz, concepts
+
+
+def build_tables(metadata):
+    from app.models import JSONDocument
+
+    as_text = Table(
+        "bench_generated_text", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("quiz_questions", Text),
+        Column("key_concepts", Text)
+    )
+    as_json = Table(
+        "bench_generated_json", metadata,
+        Column("id", Integer, primary_key=True),
+        Column("quiz_questions", JSONDocument),
+        Column("key_concepts", JSONDocument)
+    )
+    return as_text, as_json
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def run(url: str, rows: int):
+    from app.services.json_queries import json_array_has_field
+
+    engine = create_engine(url)
+    metadata = MetaData()
+    as_text, as_json = build_tables(metadata)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    dialect = engine.dialect.name
+    samples = [sample_generated(i) for i in range(rows)]
+
+    def write_text():
+        with engine.begin() as conn:
+            conn.execute(insert(as_text), [
+                {"id": i, "quiz_questions": json.dumps(quiz), "key_concepts": json.dumps(concepts)}
+                for i, (quiz, concepts) in enumerate(samples)
+            ])
+
+    def write_json():
+        with engine.begin() as conn:
+            conn.execute(insert(as_json), [
+                {"id": i, "quiz_questions": quiz, "key_concepts": concepts}
+                for i, (quiz, concepts) in enumerate(samples)
+            ])
+
+    def read_text():
+        with engine.connect() as conn:
+            return [
+                (json.loads(row.quiz_questions), json.loads(row.key_concepts))
+                for row in conn.execute(select(as_text))
+            ]
+
+    def read_json():
+        with engine.connect() as conn:
+            return [(row.quiz_questions, row.key_concepts) for row in conn.execute(select(as_json))]
+
+    def filter_text():
+        return sum(1 for quiz, _ in read_text() if any(q["difficulty"] == "hard" for q in quiz))
+
+    def filter_json():
+        with engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(as_json).where(
+                json_array_has_field(as_json.c.quiz_questions, "difficulty", "hard", dialect)
+            )).scalar()
+
+    try:
+        print(f"{rows} rows on {dialect}")
+        print(f"{'operation':<20} {'string (ms)':>12} {'json (ms)':>10}")
+        for name, text_fn, json_fn in [
+            ("write", write_text, write_json),
+            ("read + parse", read_text, read_json),
+            ("filter difficulty", filter_text, filter_json)
+        ]:
+            text_result, text_ms = timed(text_fn)
+            json_result, json_ms = timed(json_fn)
+            assert text_result == json_result
+            print(f"{name:<20} {text_ms:>12.1f} {json_ms:>10.1f}")
+    finally:
+        metadata.drop_all(engine)
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--url", default="sqlite:///:memory:", help="Database to benchmark (default: in-memory SQLite)")
+    args = parser.parse_args()
+    run(args.url, args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark the material history endpoint.
+
+Seeds 1k and 10k materials (each with generated data) for one user in a
+SQLite database and reports the number of SQL statements and the latency of
+GET /materials/get-history.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_history
+    python -m benchmarks.bench_history --materials 1000 --repeat 5
+"""
+import argparse
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, insert
+
+DEFAULT_MATERIAL_COUNTS = [1000, 10000]
+
+
+def seed_materials(db, user_id: int, count: int, with_generated: bool = True, content_chars: int = 500):
+    """Bulk insert `count` text materials (and their generated data) for a user."""
+    from app import models
+
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    first_id = (db.query(models.Material.id).order_by(models.Material.id.desc()).limit(1).scalar() or 0) + 1
+    content = ("Seeded study material about gradient descent and entropy. " * (content_chars // 58 + 1))[:content_chars]
+
+    db.execute(insert(models.Material), [
+        {
+            "id": first_id + i,
+            "title": f"Material {i}",
+            "content": content,
+            "raw_char_count": len(content),
+            "char_count": len(content),
+            "file_type": "text",
+            "user_id": user_id,
+            "uploaded_at": start + timedelta(minutes=i)
+        }
+        for i in range(count)
+    ])
+    if with_generated:
+        db.execute(insert(models.GeneratedData), [
+            {
+                "material_id": first_id + i,
+                "summary": f"Summary of material {i}",
+                "quiz_questions": [{"question": f"Question {i}?"}],
+                "key_concepts": [f"Concept {i}"]
+            }
+            for i in range(count)
+        ])
+    db.commit()
+
+
+@contextmanager
+def count_queries(engine):
+    """Count SQL statements executed on `engine` inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def run(material_counts, repeat: int):
+    import os
+    import tempfile
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    from app import auth, models
+    from app.database import Base, get_async_db, to_async_url
+    from app.main import app
+
+    print(f"{'materials':>10} {'queries':>8} {'best (ms)':>10}")
+
+    for count in material_counts:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_history_'), 'bench.db')}"
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+        async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine)()
+        user = models.User(email="bench@example.com", username="bench", hashed_password="x")
+        db.add(user)
+        db.commit()
+        seed_materials(db, user.id, count)
+        AsyncBenchSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with AsyncBenchSession() as session:
+                yield session
+
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.dependency_overrides[auth.get_current_user] = lambda: user
+        try:
+            with TestClient(app) as client:
+                best = None
+                for _ in range(repeat):
+                    with count_queries(async_engine.sync_engine) as statements:
+                        start = time.perf_counter()
+                        response = client.get("/materials/get-history")
+                        elapsed = time.perf_counter() - start
+                    assert response.status_code == 200 and len(response.json()) == count
+                    best = elapsed if best is None else min(best, elapsed)
+        finally:
+            app.dependency_overrides.clear()
+            db.close()
+            engine.dispose()
+
+        print(f"{count:>10} {len(statements):>8} {best * 1000:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materials", type=int, nargs="*", default=DEFAULT_MATERIAL_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.materials, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark login throughput and latency at a given bcrypt cost.
+
+Creates users whose passwords are hashed at each cost, then runs a login
+storm: `--concurrency` clients log in as different users as fast as they can
+for `--duration` seconds, all in one event loop. A probe requests GET /health
+throughout; its latency shows whether hashing is blocking the event loop.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --rounds 10 12 --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.bench_search import percentile
+
+DEFAULT_ROUNDS = [10, 12]
+PASSWORD = "correct horse battery staple"
+
+
+async def login_storm(app, emails, concurrency: int, duration: float):
+    """Return (login latencies, health probe latencies, errors) in ms."""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + duration
+    logins, probes = [], []
+    counts = {"errors": 0}
+
+    async def client_loop(client, index):
+        while time.perf_counter() < deadline:
+            email = emails[index % len(emails)]
+            start = time.perf_counter()
+            response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+            logins.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                counts["errors"] += 1
+            index += concurrency
+
+    async def probe_loop(client):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await client.get("/health")
+            probes.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.05)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await asyncio.gather(probe_loop(client), *(client_loop(client, i) for i in range(concurrency)))
+    return logins, probes, counts["errors"]
+
+
+def run(rounds_list, concurrency: int, duration: float, users: int):
+    import os
+    import tempfile
+
+    os.environ.setdefault("JWT_SECRET", "bench-login")
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app import models
+    from app.database import Base, get_async_db, get_read_db, to_async_url
+    from app.main import app
+    from app.services.password_hashing import password_hasher
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_login_'), 'bench.db')}"
+    engine = create_engine(url)
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    AsyncBenchSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncBenchSession() as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
+    configured_rounds = password_hasher.rounds
+    print(f"{concurrency} concurrent clients, {users} users, {password_hasher.workers} hashing workers, {duration:.0f}s per cost\n")
+    print(f"{'cost':>4} {'logins/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'/health p99':>12} {'errors':>7}")
+    try:
+        for rounds in rounds_list:
+            password_hasher.rounds = rounds
+            Base.metadata.drop_all(bind=engine)
+            Base.metadata.create_all(bind=engine)
+            hashed = password_hasher.hash(PASSWORD)
+            emails = [f"user{i}@example.com" for i in range(users)]
+            with engine.begin() as connection:
+                connection.execute(insert(models.User), [
+                    {"email": email, "username": f"user{i}", "hashed_password": hashed}
+                    for i, email in enumerate(emails)
+                ])
+
+            start = time.perf_counter()
+            logins, probes, errors = asyncio.run(login_storm(app, emails, concurrency, duration))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{rounds:>4} {len(logins) / elapsed:>9.1f} {percentile(logins, 0.5):>9.1f}"
+                f" {percentile(logins, 0.99):>9.1f} {percentile(probes, 0.99):>12.1f} {errors:>7}"
+            )
+    finally:
+        password_hasher.rounds = configured_rounds
+        password_hasher.shutdown()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="*", default=DEFAULT_ROUNDS)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+    run(args.rounds, args.concurrency, args.duration, args.users)
+
+
+if __name__ == "__main__":
+    main()
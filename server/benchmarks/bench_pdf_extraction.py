@@ -0,0 +1,70 @@
+"""
+Benchmark page-parallel PDF extraction.
+
+Builds synthetic 50-, 500- and 2000-page PDFs and reports pages/sec for each
+worker count up to the machine's core count.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_pdf_extraction
+    python -m benchmarks.bench_pdf_extraction --pages 500 --repeat 3
+"""
+import argparse
+import os
+import time
+
+from app.services import pdf_extraction
+from benchmarks.synthetic_pdf import build_pdf, textbook_pages
+
+DEFAULT_PAGE_COUNTS = [50, 500, 2000]
+
+
+def worker_counts(max_workers: int):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def run(page_counts, repeat: int, max_workers: int):
+    # Always shard, so small documents show the parallel overhead too
+    pdf_extraction.PDF_PARALLEL_MIN_PAGES = 1
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'pages':>6} {'workers':>8} {'best (s)':>10} {'pages/sec':>12}")
+
+    for num_pages in page_counts:
+        pdf_bytes = build_pdf(textbook_pages(num_pages))
+        baseline = None
+        for workers in worker_counts(max_workers):
+            # A pool of this size; started before timing, as the app's is at startup
+            pdf_extraction.pdf_extraction_pool = pdf_extraction.PdfExtractionPool(workers)
+            if workers > 1:
+                pdf_extraction.extract_pdf_pages(pdf_bytes, max_workers=workers)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                page_count, _pages = pdf_extraction.extract_pdf_pages(pdf_bytes, max_workers=workers)
+                timings.append(time.perf_counter() - start)
+            pdf_extraction.pdf_extraction_pool.shutdown()
+            best = min(timings)
+            baseline = baseline or best
+            print(
+                f"{page_count:>6} {workers:>8} {best:>10.3f} {page_count / best:>12.1f}"
+                f"   x{baseline / best:.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="*", default=DEFAULT_PAGE_COUNTS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    run(args.pages, args.repeat, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Benchmark full-text search over materials.
+
+Seeds a corpus (100k materials by default, spread over users with hundreds
+of uploads each) with generated study notes, builds the search index, and
+reports the latency of GET /materials/search for one user against the
+client-side alternative: GET /materials/get-history and filtering the JSON.
+
+Uses a temporary SQLite (FTS5) database unless --url points at Postgres,
+in which case the tables are created there (use a scratch database).
+
+Usage (from the server directory):
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --materials 10000 --users 20 --repeat 20
+    python -m benchmarks.bench_search --url postgresql://localhost/bench_search
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert
+
+DEFAULT_MATERIALS = 100_000
+DEFAULT_USERS = 200
+BATCH_SIZE = 2000
+
+TOPICS = [
+    "gradient descent", "entropy", "photosynthesis", "supply and demand", "the french revolution",
+    "eigenvalues", "natural selection", "plate tectonics", "recursion", "the krebs cycle",
+    "game theory", "quantum tunnelling", "cognitive dissonance", "the industrial revolution", "bayesian inference"
+]
+FILLER = [
+    "The lecture explains", "A common mistake is to assume", "In the exam, expect questions on",
+    "The textbook derives", "Worked examples show", "Students often confuse", "The key idea behind"
+]
+# (label, query) pairs: a frequent topic, a rare word, several words and a miss
+QUERIES = [
+    ("common topic", "entropy"),
+    ("rare word", "tunnelling"),
+    ("two words", "gradient descent"),
+    ("no match", "xylophone"),
+]
+
+
+def material_text(rng: random.Random, chars: int = 1500):
+    """Title, summary, concepts and content of one generated material."""
+    topics = rng.sample(TOPICS, 3)
+    sentences = []
+    while sum(len(sentence) for sentence in sentences) < chars:
+        sentences.append(f"{rng.choice(FILLER)} {rng.choice(topics)} and how it relates to {rng.choice(topics)}.")
+    return (
+        f"Notes on {topics[0]}",
+        f"An overview of {topics[0]} with links to {topics[1]}.",
+        [topic.title() for topic in topics],
+        " ".join(sentences)
+    )
+
+
+def seed_corpus(db, materials: int, users: int, seed: int = 0):
+    """Bulk insert users and their materials with generated data; returns the user ids."""
+    from app import models
+
+    rng = random.Random(seed)
+    db.execute(insert(models.User), [
+        {"id": i + 1, "email": f"user{i}@example.com", "username": f"user{i}", "hashed_password": "x"}
+        for i in range(users)
+    ])
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for first in range(0, materials, BATCH_SIZE):
+        material_rows, generated_rows = [], []
+        for material_id in range(first + 1, min(first + BATCH_SIZE, materials) + 1):
+            title, summary, concepts, content = material_text(rng)
+            material_rows.append({
+                "id": material_id,
+                "title": title,
+                "content": content,
+                "raw_char_count": len(content),
+                "char_count": len(content),
+                "file_type": "text",
+                "user_id": material_id % users + 1,
+                "uploaded_at": start + timedelta(minutes=material_id)
+            })
+            generated_rows.append({"material_id": material_id, "summary": summary, "key_concepts": concepts})
+        db.execute(insert(models.Material), material_rows)
+        db.execute(insert(models.GeneratedData), generated_rows)
+        db.commit()
+    return list(range(1, users + 1))
+
+
+def percentile(samples, fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(url: str, materials: int, users: int, repeat: int):
+    import os
+    import tempfile
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    from app import auth, models
+    from app.database import Base, get_async_db, get_read_db, to_async_url
+    from app.main import app
+    from scripts.reindex_search import reindex
+
+    url = url or f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_search_'), 'bench.db')}"
+    engine = create_engine(url)
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    AsyncBenchSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncBenchSession() as session:
+            yield session
+
+    try:
+        start = time.perf_counter()
+        user_ids = seed_corpus(db, materials, users)
+        print(f"Seeded {materials} materials for {users} users in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        reindex(db, batch_size=BATCH_SIZE)
+        print(f"Built the search index in {time.perf_counter() - start:.1f}s ({engine.dialect.name})")
+
+        user = db.get(models.User, user_ids[0])
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.dependency_overrides[get_read_db] = override_get_async_db
+        app.dependency_overrides[auth.get_current_user] = lambda: user
+
+        with TestClient(app) as client:
+            print(f"\n{'query':<14} {'hits':>6} {'search p50':>11} {'p95 (ms)':>9} {'history+filter p50':>19} {'p95 (ms)':>9}")
+            for label, q in QUERIES:
+                search_times, history_times = [], []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    response = client.get("/materials/search", params={"q": q, "limit": 20})
+                    search_times.append((time.perf_counter() - start) * 1000)
+                    assert response.status_code == 200
+
+                    start = time.perf_counter()
+                    history = client.get("/materials/get-history").json()
+                    words = q.lower().split()
+                    hits = [
+                        item for item in history
+                        if all(word in (item["material"]["title"] + " " + item["material"]["content"]).lower() for word in words)
+                    ]
+                    history_times.append((time.perf_counter() - start) * 1000)
+                print(
+                    f"{label:<14} {len(hits):>6} {statistics.median(search_times):>11.1f} {percentile(search_times, 0.95):>9.1f}"
+                    f" {statistics.median(history_times):>19.1f} {percentile(history_times, 0.95):>9.1f}"
+                )
+    finally:
+        app.dependency_overrides.clear()
+        db.close()
+        if not url.startswith("sqlite"):
+            Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--materials", type=int, default=DEFAULT_MATERIALS)
+    parser.add_argument("--users", type=int, default=DEFAULT_USERS)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--url", help="Database to benchmark (default: a temporary SQLite file)")
+    args = parser.parse_args()
+    run(args.url, args.materials, args.users, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark concurrent uploads to storage.
+
+Serves the storage stand-in (benchmarks.storage_stand_in) with uvicorn on a
+local port in a separate process, with a fixed per-request latency standing in for the network,
+and uploads files from a number of concurrent callers in one event loop:
+
+- sync client: a shared blocking httpx.Client called through the threadpool,
+  as the supabase SDK client was
+- async client: SupabaseStorageService on its pooled httpx.AsyncClient
+
+Usage (from the server directory):
+    python -m benchmarks.bench_storage
+    python -m benchmarks.bench_storage --concurrency 1 16 64 128 --uploads 512 --latency 0.05
+"""
+import argparse
+import asyncio
+import socket
+import time
+
+DEFAULT_CONCURRENCY = [1, 16, 64, 128]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve(latency: float, port: int):
+    """Start the stand-in in its own process (so it does not share our GIL) and wait until it accepts connections."""
+    import subprocess
+    import sys
+
+    code = (
+        "import uvicorn\n"
+        "from benchmarks.storage_stand_in import create_storage_app\n"
+        f"uvicorn.run(create_storage_app(latency={latency!r}), host='127.0.0.1', port={port}, log_level='warning')\n"
+    )
+    server = subprocess.Popen([sys.executable, "-c", code])
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server
+        except OSError:
+            time.sleep(0.05)
+
+
+async def drive(upload, uploads: int, concurrency: int) -> float:
+    """Run `uploads` uploads with at most `concurrency` in flight; returns uploads per second."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await upload(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(uploads)))
+    return uploads / (time.perf_counter() - start)
+
+
+async def measure(storage, url: str, api_key: str, body: bytes, concurrency_levels, uploads: int):
+    import httpx
+    from fastapi.concurrency import run_in_threadpool
+
+    sync_client = httpx.Client(base_url=f"{url}/storage/v1", headers={"Authorization": f"Bearer {api_key}"})
+
+    async def sync_upload(i):
+        response = await run_in_threadpool(
+            sync_client.post, f"/object/bucket/sync/{time.perf_counter_ns()}-{i}.pdf",
+            content=body, headers={"Content-Type": "application/pdf"}
+        )
+        response.raise_for_status()
+
+    async def async_upload(i):
+        await storage.upload_file(body, f"{i}.pdf", "application/pdf", user_id=1)
+
+    print(f"{'clients':>8} {'sync client (uploads/s)':>24} {'async client (uploads/s)':>25}")
+    try:
+        for concurrency in concurrency_levels:
+            sync_rate = await drive(sync_upload, uploads, concurrency)
+            async_rate = await drive(async_upload, uploads, concurrency)
+            print(f"{concurrency:>8} {sync_rate:>24.1f} {async_rate:>25.1f}")
+    finally:
+        sync_client.close()
+        await storage.aclose()
+
+
+def run(concurrency_levels, uploads: int, latency: float, size_kb: int):
+    from app.services import supabase_storage as storage_module
+    from benchmarks.storage_stand_in import stand_in_storage
+
+    # The service logs every upload
+    storage_module.print = lambda *args, **kwargs: None
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = serve(latency, port)
+    storage = stand_in_storage(url=url)
+    print(f"{uploads} uploads of {size_kb} KB per run, {latency * 1000:.0f} ms server latency\n")
+    try:
+        asyncio.run(measure(storage, url, "stand-in-key", b"x" * size_kb * 1024, concurrency_levels, uploads))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="*", default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--uploads", type=int, default=256)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds the stand-in waits per request")
+    parser.add_argument("--size-kb", type=int, default=64)
+    args = parser.parse_args()
+    run(args.concurrency, args.uploads, args.latency, args.size_kb)
+
+
+if __name__ == "__main__":
+    main()
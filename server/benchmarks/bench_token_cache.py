@@ -0,0 +1,65 @@
+"""
+Microbenchmark the verified-token cache.
+
+Times app.auth.decode_token, the per-request work of verify_token, for a set
+of tokens presented round robin (one per active user), with the token cache
+disabled and enabled, from one thread and from several threads at once.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_token_cache
+    python -m benchmarks.bench_token_cache --tokens 500 --calls 200000 --threads 8
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def time_calls(decode, tokens, calls: int, threads: int) -> float:
+    """Wall seconds to run `calls` decodes split over `threads` threads."""
+    per_thread = calls // threads
+
+    def worker(offset):
+        for i in range(per_thread):
+            assert decode(tokens[(offset + i) % len(tokens)]) is not None
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return time.perf_counter() - start
+
+
+def run(token_count: int, calls: int, threads: int):
+    os.environ.setdefault("JWT_SECRET", "bench-token-cache")
+    from app import auth
+
+    tokens = [auth.create_access_token(data={"sub": str(user_id)}) for user_id in range(1, token_count + 1)]
+    max_entries = auth.token_cache.max_entries
+    print(f"{calls} verifications of {token_count} tokens ({auth.JWT_ALGORITHM})\n")
+    print(f"{'cache':<9} {'threads':>7} {'us/request':>11} {'requests/s':>11} {'hit rate':>9}")
+    try:
+        for label, size in (("disabled", 0), ("enabled", max_entries)):
+            for thread_count in sorted({1, threads}):
+                auth.token_cache.max_entries = size
+                auth.token_cache.reset()
+                seconds = time_calls(auth.decode_token, tokens, calls, thread_count)
+                print(
+                    f"{label:<9} {thread_count:>7} {seconds / calls * 1e6:>11.1f} {calls / seconds:>11.0f}"
+                    f" {auth.token_cache.stats()['hit_rate']:>9.1%}"
+                )
+    finally:
+        auth.token_cache.max_entries = max_entries
+        auth.token_cache.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=50_000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+    run(args.tokens, args.calls, args.threads)
+
+
+if __name__ == "__main__":
+    main()
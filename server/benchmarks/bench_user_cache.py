@@ -0,0 +1,94 @@
+"""
+Benchmark the authenticated user cache.
+
+Sends authenticated requests from several users (round robin) with the user
+cache disabled and enabled, and reports the users-table queries per request,
+the cache hit rate and the request latency. GET /auth/me does no other work,
+so its latency is mostly authentication.
+
+Usage (from the server directory):
+    python -m benchmarks.bench_user_cache
+    python -m benchmarks.bench_user_cache --users 50 --requests 2000
+"""
+import argparse
+import statistics
+import time
+
+from benchmarks.bench_history import count_queries
+
+
+def run(users: int, requests: int):
+    import os
+    import tempfile
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import NullPool
+
+    from app import auth, models
+    from app.database import Base, get_async_db, get_read_db, to_async_url
+    from app.main import app
+    from app.services.user_cache import user_cache, user_cache_stats
+
+    url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='bench_user_cache_'), 'bench.db')}"
+    engine = create_engine(url)
+    async_engine = create_async_engine(to_async_url(url), poolclass=NullPool)
+    Base.metadata.create_all(bind=engine)
+    AsyncBenchSession = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with AsyncBenchSession() as session:
+            yield session
+
+    db = sessionmaker(bind=engine)()
+    accounts = [
+        models.User(email=f"user{i}@example.com", username=f"user{i}", hashed_password="x")
+        for i in range(users)
+    ]
+    db.add_all(accounts)
+    db.commit()
+    tokens = [auth.create_access_token(data={"sub": str(account.id)}) for account in accounts]
+    db.close()
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_read_db] = override_get_async_db
+    max_entries = user_cache.max_entries
+    try:
+        with TestClient(app) as client:
+            print(f"{requests} requests from {users} users (TTL {user_cache.ttl_seconds:.0f}s)\n")
+            print(f"{'cache':<9} {'users queries/req':>18} {'hit rate':>9} {'p50 (ms)':>9} {'mean (ms)':>10}")
+            for label, size in (("disabled", 0), ("enabled", max_entries)):
+                user_cache.max_entries = size
+                user_cache.reset()
+                timings = []
+                with count_queries(async_engine.sync_engine) as statements:
+                    for i in range(requests):
+                        headers = {"Authorization": f"Bearer {tokens[i % users]}"}
+                        start = time.perf_counter()
+                        response = client.get("/auth/me", headers=headers)
+                        timings.append((time.perf_counter() - start) * 1000)
+                        assert response.status_code == 200
+                users_queries = sum(1 for statement in statements if "FROM users" in statement)
+                print(
+                    f"{label:<9} {users_queries / requests:>18.3f} {user_cache_stats()['hit_rate']:>9.1%}"
+                    f" {statistics.median(timings):>9.2f} {statistics.mean(timings):>10.2f}"
+                )
+    finally:
+        user_cache.max_entries = max_entries
+        user_cache.reset()
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.users, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Local stand-in for the Supabase Storage REST API, for tests and benchmarks.
+
+Implements the object endpoints the app uses (upload, remove, signed URLs)
+over an in-memory bucket, with an optional per-request latency to model a
+remote server. Use it in process through httpx.ASGITransport, or serve it
+with uvicorn for real connections.
+"""
+import asyncio
+import secrets
+from typing import List
+
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class SignRequest(BaseModel):
+    expiresIn: int
+
+
+class SignManyRequest(BaseModel):
+    expiresIn: int
+    paths: List[str]
+
+
+class RemoveRequest(BaseModel):
+    prefixes: List[str]
+
+
+def create_storage_app(latency: float = 0.0, api_key: str = "stand-in-key") -> FastAPI:
+    """Storage API under /storage/v1; objects are kept in `app.state.objects` by (bucket, path)."""
+    app = FastAPI()
+    app.state.objects = {}
+    app.state.requests = 0
+    app.state.in_flight = 0
+    app.state.max_in_flight = 0
+
+    @app.middleware("http")
+    async def simulate_server(request: Request, call_next):
+        if request.headers.get("authorization") != f"Bearer {api_key}":
+            return JSONResponse({"error": "Unauthorized"}, status_code=401)
+        app.state.requests += 1
+        app.state.in_flight += 1
+        app.state.max_in_flight = max(app.state.max_in_flight, app.state.in_flight)
+        try:
+            if latency:
+                await asyncio.sleep(latency)
+            return await call_next(request)
+        finally:
+            app.state.in_flight -= 1
+
+    def signed_url(bucket: str, path: str) -> str:
+        return f"/object/sign/{bucket}/{path}?token={secrets.token_urlsafe(8)}"
+
+    @app.post("/storage/v1/object/sign/{bucket}/{path:path}")
+    def sign(bucket: str, path: str, body: SignRequest):
+        if (bucket, path) not in app.state.objects:
+            raise HTTPException(status_code=400, detail="Object not found")
+        return {"signedURL": signed_url(bucket, path)}
+
+    @app.post("/storage/v1/object/sign/{bucket}")
+    def sign_many(bucket: str, body: SignManyRequest):
+        return [
+            {"path": path, "signedURL": signed_url(bucket, path), "error": None}
+            if (bucket, path) in app.state.objects else
+            {"path": path, "signedURL": None, "error": "Either the object does not exist or you do not have access to it"}
+            for path in body.paths
+        ]
+
+    @app.post("/storage/v1/object/{bucket}/{path:path}")
+    async def upload(bucket: str, path: str, request: Request, x_upsert: str = Header("false")):
+        if (bucket, path) in app.state.objects and x_upsert != "true":
+            raise HTTPException(status_code=400, detail="The resource already exists")
+        app.state.objects[(bucket, path)] = await request.body()
+        return {"Key": f"{bucket}/{path}"}
+
+    @app.delete("/storage/v1/object/{bucket}")
+    def remove(bucket: str, body: RemoveRequest):
+        removed = [path for path in body.prefixes if app.state.objects.pop((bucket, path), None) is not None]
+        return [{"name": path, "bucket_id": bucket} for path in removed]
+
+    return app
+
+
+def stand_in_storage(app: FastAPI = None, url: str = "http://storage.test", api_key: str = "stand-in-key", transport=None):
+    """
+    A SupabaseStorageService configured against the stand-in: `app` in
+    process, else `transport`, else over the network at `url`.
+    """
+    import httpx
+
+    from app.services.supabase_storage import SupabaseStorageService
+
+    storage = SupabaseStorageService(transport=httpx.ASGITransport(app=app) if app is not None else transport)
+    storage.supabase_url = url
+    storage.supabase_service_role_key = api_key
+    storage.bucket_name = "bucket"
+    storage.storage_url = f"{url}/storage/v1/object/public/bucket"
+    return storage
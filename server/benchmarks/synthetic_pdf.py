@@ -0,0 +1,74 @@
+"""
+Synthetic PDF builder for benchmarks and tests.
+"""
+from typing import List, Optional
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def build_pdf(page_texts: List[Optional[str]]) -> bytes:
+    """
+    Build a minimal PDF with one page per entry in page_texts.
+
+    Each entry is rendered line by line in Helvetica. A None or empty entry
+    produces a page without a content stream.
+    """
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    next_id = 4
+
+    for text in page_texts:
+        page_id = next_id
+        next_id += 1
+        kids.append(f"{page_id} 0 R")
+
+        resources = "/Resources << /Font << /F1 3 0 R >> >> /MediaBox [0 0 612 792]"
+        if text:
+            content_id = next_id
+            next_id += 1
+            ops = " ".join(f"({_escape(line)}) Tj T*" for line in text.split("\n"))
+            stream = f"BT /F1 11 Tf 14 TL 72 720 Td {ops} ET".encode("latin-1")
+            objects[content_id] = (
+                b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream"
+            )
+            objects[page_id] = f"<< /Type /Page /Parent 2 0 R {resources} /Contents {content_id} 0 R >>".encode()
+        else:
+            objects[page_id] = f"<< /Type /Page /Parent 2 0 R {resources} >>".encode()
+
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n".encode() + objects[obj_id] + b"\nendobj\n"
+
+    xref_offset = len(out)
+    size = max(objects) + 1
+    out += f"xref\n0 {size}\n".encode()
+    out += b"0000000000 65535 f \n"
+    for obj_id in range(1, size):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {size} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF".encode()
+    return bytes(out)
+
+
+def textbook_pages(num_pages: int, lines_per_page: int = 40, blank_every: int = 25) -> List[Optional[str]]:
+    """Generate textbook-like page texts, with an occasional blank page."""
+    pages = []
+    for page_num in range(num_pages):
+        if blank_every and page_num % blank_every == blank_every - 1:
+            pages.append(None)
+            continue
+        lines = [
+            f"Chapter {page_num // 20 + 1}, section {page_num}: line {line} covers "
+            f"gradient descent, entropy and regularization in model training."
+            for line in range(lines_per_page)
+        ]
+        pages.append("\n".join(lines))
+    return pages
@@ -0,0 +1,66 @@
+"""
+Alembic environment for the Study Assistant database.
+
+Run from the server directory:
+    alembic upgrade head
+    alembic -x url=sqlite:///local.db upgrade head
+"""
+import os
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+from app import models
+
+load_dotenv()
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+
+def get_override_url():
+    """URL passed as `alembic -x url=...`, e.g. to migrate a local SQLite database."""
+    return context.get_x_argument(as_dictionary=True).get("url") or config.get_main_option("sqlalchemy.url")
+
+
+def get_url():
+    return get_override_url() or os.getenv("DATABASE_URL")
+
+
+def run_migrations_offline():
+    """Emit SQL to stdout instead of connecting to the database."""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """Run migrations with the application's engine, so SSL settings match the app."""
+    if get_override_url():
+        connectable = create_engine(get_override_url())
+    else:
+        from app.database import engine as connectable
+
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
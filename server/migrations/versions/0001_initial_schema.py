@@ -0,0 +1,64 @@
+"""Initial schema: users, materials and generated_data
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 09:00:00
+
+Existing databases created with init_db.py already have these tables; mark
+them as migrated with `alembic stamp 0001` before running `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+
+    op.create_table(
+        "materials",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("file_type", sa.String(), nullable=False),
+        sa.Column("file_url", sa.String(), nullable=True),
+        sa.Column("uploaded_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=False),
+    )
+    op.create_index("ix_materials_id", "materials", ["id"])
+
+    op.create_table(
+        "generated_data",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("material_id", sa.Integer(), sa.ForeignKey("materials.id"), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("quiz_questions", sa.Text(), nullable=True),
+        sa.Column("key_concepts", sa.Text(), nullable=True),
+        sa.Column("generated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index("ix_generated_data_id", "generated_data", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("generated_data")
+    op.drop_table("materials")
+    op.drop_table("users")
@@ -0,0 +1,33 @@
+"""Add material_pages for per-page storage
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "material_pages",
+        sa.Column("material_id", sa.Integer(), sa.ForeignKey("materials.id"), primary_key=True),
+        sa.Column("page_no", sa.Integer(), primary_key=True),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("char_count", sa.Integer(), nullable=False),
+        sa.Column("hash", sa.String(length=64), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("material_pages")
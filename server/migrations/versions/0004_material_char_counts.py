@@ -0,0 +1,28 @@
+"""Add raw and normalized character counts to materials
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("materials", sa.Column("raw_char_count", sa.Integer(), nullable=True))
+    op.add_column("materials", sa.Column("char_count", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("materials", "char_count")
+    op.drop_column("materials", "raw_char_count")
@@ -0,0 +1,34 @@
+"""Add progressive ingestion status and preliminary generated data
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "materials",
+        sa.Column("ingestion_status", sa.String(), server_default="complete", nullable=False),
+    )
+    op.add_column(
+        "generated_data",
+        sa.Column("is_preliminary", sa.Boolean(), server_default=sa.false(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("generated_data", "is_preliminary")
+    op.drop_column("materials", "ingestion_status")
@@ -0,0 +1,56 @@
+"""Add query indexes, one generated_data row per material and cascading deletes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Matches the names Postgres gives the unnamed foreign keys created in 0001/0002,
+# and lets batch mode find them on SQLite
+NAMING_CONVENTION = {"fk": "%(table_name)s_%(column_0_name)s_fkey"}
+
+
+def _replace_material_fk(table: str, ondelete: Union[str, None]) -> None:
+    with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+        batch_op.drop_constraint(f"{table}_material_id_fkey", type_="foreignkey")
+        batch_op.create_foreign_key(
+            f"{table}_material_id_fkey", "materials", ["material_id"], ["id"], ondelete=ondelete
+        )
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_materials_user_id_uploaded_at",
+        "materials",
+        ["user_id", sa.text("uploaded_at DESC"), sa.text("id DESC")],
+    )
+
+    # Keep the newest generated_data row per material before enforcing uniqueness
+    op.execute(
+        "DELETE FROM generated_data WHERE id NOT IN "
+        "(SELECT MAX(id) FROM generated_data GROUP BY material_id)"
+    )
+    op.create_index("ix_generated_data_material_id", "generated_data", ["material_id"], unique=True)
+
+    _replace_material_fk("generated_data", "CASCADE")
+    _replace_material_fk("material_pages", "CASCADE")
+
+
+def downgrade() -> None:
+    _replace_material_fk("material_pages", None)
+    _replace_material_fk("generated_data", None)
+    op.drop_index("ix_generated_data_material_id", table_name="generated_data")
+    op.drop_index("ix_materials_user_id_uploaded_at", table_name="materials")
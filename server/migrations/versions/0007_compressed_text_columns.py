@@ -0,0 +1,100 @@
+"""Store material content and generated quiz/concept JSON as compressed binary
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 10:00:00
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (table, column, nullable)
+COLUMNS = [
+    ("materials", "content", False),
+    ("generated_data", "quiz_questions", True),
+    ("generated_data", "key_concepts", True),
+]
+
+# Header bytes written by app.services.text_compression
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+
+
+def _rewrite(table: str, column: str, transform) -> None:
+    """Replace every non-null value of a column with transform(value), in id-ordered batches."""
+    conn = op.get_bind()
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.text(f"SELECT id, {column} FROM {table} WHERE id > :last_id AND {column} IS NOT NULL ORDER BY id LIMIT 500"),
+            {"last_id": last_id},
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for row_id, value in rows:
+            conn.execute(
+                sa.text(f"UPDATE {table} SET {column} = :value WHERE id = :id"),
+                {"value": transform(value), "id": row_id},
+            )
+
+
+def _to_bytes(value) -> bytes:
+    return value.encode("utf-8") if isinstance(value, str) else bytes(value)
+
+
+def _decompress(value) -> bytes:
+    """UTF-8 bytes of a stored value, without its header."""
+    data = _to_bytes(value)
+    return zlib.decompress(data[1:]) if data[0] == FORMAT_ZLIB else data[1:]
+
+
+def upgrade() -> None:
+    # The listing reads content_length from char_count once content is binary
+    op.execute("UPDATE materials SET char_count = length(content) WHERE char_count IS NULL")
+
+    # Existing values become uncompressed (FORMAT_RAW) rows; the
+    # scripts.compress_text_columns job compresses them afterwards in batches
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, column, nullable in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.Text(),
+                type_=sa.LargeBinary(),
+                existing_nullable=nullable,
+                postgresql_using=f"decode('00', 'hex') || convert_to({column}, 'UTF8')",
+            )
+        if sqlite:
+            # Batch mode copies the old text as header-less blobs
+            _rewrite(table, column, lambda value: bytes([FORMAT_RAW]) + _to_bytes(value))
+
+
+def downgrade() -> None:
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table, column, nullable in COLUMNS:
+        if sqlite:
+            # Stored as plain text, which batch mode copies into the TEXT column unchanged
+            _rewrite(table, column, lambda value: _decompress(value).decode("utf-8"))
+        else:
+            # Every value becomes a raw row so the type change can strip the header in SQL
+            _rewrite(table, column, lambda value: bytes([FORMAT_RAW]) + _decompress(value))
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(
+                column,
+                existing_type=sa.LargeBinary(),
+                type_=sa.Text(),
+                existing_nullable=nullable,
+                postgresql_using=f"convert_from(substring({column} from 2), 'UTF8')",
+            )
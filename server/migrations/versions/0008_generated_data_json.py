@@ -0,0 +1,100 @@
+"""Store quiz questions and key concepts as JSONB (JSON on SQLite) with GIN indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 10:00:00
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+COLUMNS = ["quiz_questions", "key_concepts"]
+
+# Header bytes written by app.services.text_compression (see 0007)
+FORMAT_RAW = 0x00
+FORMAT_ZLIB = 0x01
+
+JSON_DOCUMENT = sa.JSON(none_as_null=True).with_variant(postgresql.JSONB(none_as_null=True), "postgresql")
+
+
+def _decode_stored(value):
+    """Parse a compressed JSON string from 0007; unparseable values become NULL."""
+    data = bytes(value)
+    text = (zlib.decompress(data[1:]) if data[0] == FORMAT_ZLIB else data[1:]).decode("utf-8")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _encode_stored(value) -> bytes:
+    return bytes([FORMAT_RAW]) + json.dumps(value).encode("utf-8")
+
+
+def _copy_column(source: str, source_type, target: str, target_type, transform) -> None:
+    """Copy generated_data.source into target through transform(), in id-ordered batches."""
+    conn = op.get_bind()
+    table = sa.table(
+        "generated_data",
+        sa.column("id", sa.Integer()),
+        sa.column(source, source_type),
+        sa.column(target, target_type),
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            sa.select(table.c.id, table.c[source])
+            .where(table.c.id > last_id, table.c[source].isnot(None))
+            .order_by(table.c.id)
+            .limit(500)
+        ).fetchall()
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        for row_id, value in rows:
+            conn.execute(table.update().where(table.c.id == row_id).values({target: transform(value)}))
+
+
+def _swap_columns(old_type, new_type, transform) -> None:
+    for column in COLUMNS:
+        op.add_column("generated_data", sa.Column(f"{column}_new", new_type, nullable=True))
+        _copy_column(column, old_type, f"{column}_new", new_type, transform)
+        with op.batch_alter_table("generated_data") as batch_op:
+            batch_op.drop_column(column)
+            batch_op.alter_column(f"{column}_new", new_column_name=column)
+
+
+def upgrade() -> None:
+    # Compressed strings cannot be converted in SQL, so values are parsed in Python
+    _swap_columns(sa.LargeBinary(), JSON_DOCUMENT, _decode_stored)
+
+    if op.get_bind().dialect.name == "postgresql":
+        for column in COLUMNS:
+            op.create_index(
+                f"ix_generated_data_{column}",
+                "generated_data",
+                [column],
+                postgresql_using="gin",
+                postgresql_ops={column: "jsonb_path_ops"},
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        for column in COLUMNS:
+            op.drop_index(f"ix_generated_data_{column}", table_name="generated_data")
+
+    _swap_columns(JSON_DOCUMENT, sa.LargeBinary(), _encode_stored)
@@ -0,0 +1,46 @@
+"""Full-text search: materials.search_vector with a GIN index (FTS5 table on SQLite)
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 10:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR = sa.Text().with_variant(postgresql.TSVECTOR(), "postgresql")
+
+
+def upgrade() -> None:
+    # The index starts empty: content is compressed, so documents are built in
+    # Python by the scripts.reindex_search job afterwards
+    op.add_column("materials", sa.Column("search_vector", SEARCH_VECTOR, nullable=True))
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_index("ix_materials_search_vector", "materials", ["search_vector"], postgresql_using="gin")
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS materials_fts "
+            "USING fts5(title, concepts, summary, content, tokenize='porter unicode61')"
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_index("ix_materials_search_vector", table_name="materials")
+    else:
+        op.execute("DROP TABLE IF EXISTS materials_fts")
+
+    with op.batch_alter_table("materials") as batch_op:
+        batch_op.drop_column("search_vector")
@@ -0,0 +1 @@
+# Maintenance jobs for the Study Assistant backend
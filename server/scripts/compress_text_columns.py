@@ -0,0 +1,103 @@
+"""
+Compress existing rows of the CompressedText columns in the background.
+
+Migration 0007 converts materials.content to binary but leaves existing
+values uncompressed. This job walks each table in primary-key order, a small
+batch per transaction, and rewrites values that are not yet compressed, so it
+can run against a live database and be stopped and restarted at any point.
+
+Usage (from the server directory):
+    python -m scripts.compress_text_columns
+    python -m scripts.compress_text_columns --batch-size 200 --pause 0.1
+"""
+import argparse
+import time
+
+from sqlalchemy import LargeBinary, select, type_coerce, update
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def compressed_columns():
+    """(model, column) pairs stored with CompressedText."""
+    from app import models
+    from app.services.text_compression import CompressedText
+
+    pairs = []
+    for model in (models.Material, models.GeneratedData):
+        for column in model.__table__.columns:
+            if isinstance(column.type, CompressedText):
+                pairs.append((model, column))
+    return pairs
+
+
+def compress_column(db, model, column, batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0.0) -> dict:
+    """Rewrite the not-yet-compressed values of one column; returns row counts."""
+    from app.services.text_compression import FORMAT_RAW, TEXT_COMPRESSION_MIN_BYTES, decompress_text
+
+    # Read the stored bytes as they are, bypassing the column's decompression
+    stored = type_coerce(column, LargeBinary()).label("stored")
+    counts = {"scanned": 0, "rewritten": 0}
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(model.id, stored)
+            .where(model.id > last_id, column.isnot(None))
+            .order_by(model.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+        counts["scanned"] += len(rows)
+
+        for row in rows:
+            # Only raw values large enough to be compressed need rewriting
+            data = bytes(row.stored)
+            if data[0] != FORMAT_RAW or len(data) - 1 < TEXT_COMPRESSION_MIN_BYTES:
+                continue
+            # Assigning the text re-encodes it through CompressedText, which
+            # compresses it if it is above the size threshold
+            db.execute(
+                update(model).where(model.id == row.id).values({column.key: decompress_text(data)})
+            )
+            counts["rewritten"] += 1
+        db.commit()
+        if pause:
+            time.sleep(pause)
+    return counts
+
+
+def run(batch_size: int, pause: float):
+    from app.database import SessionLocal
+    from app.services.text_compression import compression_metrics
+
+    db = SessionLocal()
+    try:
+        for model, column in compressed_columns():
+            start = time.perf_counter()
+            counts = compress_column(db, model, column, batch_size, pause)
+            print(
+                f"✅ {model.__tablename__}.{column.key}: {counts['rewritten']} of {counts['scanned']} rows "
+                f"rewritten in {time.perf_counter() - start:.1f}s"
+            )
+    finally:
+        db.close()
+
+    stats = compression_metrics.stats()
+    print(
+        f"📦 {stats['raw_bytes']} -> {stats['stored_bytes']} bytes (ratio {stats['compression_ratio']}), "
+        f"encode {stats['encode_cpu_ms']} ms CPU, decode {stats['decode_cpu_ms']} ms CPU"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+    run(args.batch_size, args.pause)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Bring the database schema up to date: `alembic upgrade head`, after first
+stamping databases that predate Alembic.
+
+Databases whose tables were created by the old import-time create_all (or
+init_db.py) have the initial schema but no alembic_version row, so a plain
+`alembic upgrade head` would try to create the tables again and fail. Those
+are stamped at 0001 before upgrading. This is what the container runs on
+startup.
+
+Usage (from the server directory):
+    python -m scripts.migrate
+    python -m scripts.migrate --url sqlite:///local.db
+"""
+import argparse
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Revision matching the schema create_all produced before migrations existed
+UNVERSIONED_BASELINE = "0001"
+
+
+def alembic_config(url: str = None) -> Config:
+    config = Config(os.path.join(SERVER_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(SERVER_DIR, "migrations"))
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def needs_baseline_stamp(connection) -> bool:
+    """True when application tables exist but no migration has been recorded."""
+    from app import models
+
+    tables = set(inspect(connection).get_table_names())
+    if not tables & set(models.Base.metadata.tables):
+        return False  # Empty database: upgrade creates everything
+    if "alembic_version" not in tables:
+        return True
+    return connection.execute(text("SELECT count(*) FROM alembic_version")).scalar() == 0
+
+
+def migrate(url: str = None):
+    if url:
+        engine = create_engine(url)
+    else:
+        from app.database import engine
+
+    with engine.connect() as connection:
+        stamp = needs_baseline_stamp(connection)
+
+    config = alembic_config(url)
+    if stamp:
+        print(f"⚠ Existing tables without a migration version, stamping {UNVERSIONED_BASELINE}")
+        command.stamp(config, UNVERSIONED_BASELINE)
+    command.upgrade(config, "head")
+    print("✅ Database schema is up to date")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Database URL (defaults to DATABASE_URL)")
+    args = parser.parse_args()
+    migrate(args.url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Build full-text search entries for materials that do not have one.
+
+Migration 0009 adds the search index empty, and rows written with Core bulk
+inserts (e.g. the benchmark seeds) bypass the ORM listeners that maintain it.
+This job walks materials in primary-key order, a small batch per transaction,
+so it can run against a live database and be stopped and restarted at any
+point. --all rebuilds every entry, e.g. after changing SEARCH_LANGUAGE.
+
+Usage (from the server directory):
+    python -m scripts.reindex_search
+    python -m scripts.reindex_search --batch-size 200 --pause 0.1
+    python -m scripts.reindex_search --all
+"""
+import argparse
+import time
+
+from sqlalchemy import select
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def reindex(db, batch_size: int = DEFAULT_BATCH_SIZE, pause: float = 0.0, missing_only: bool = True) -> int:
+    """Index materials in batches; returns how many were indexed."""
+    from app import models
+    from app.services.material_search import index_materials, unindexed_filter
+
+    indexed = 0
+    last_id = 0
+    while True:
+        query = select(models.Material.id).where(models.Material.id > last_id)
+        if missing_only:
+            query = query.where(unindexed_filter(db.get_bind().dialect.name))
+        ids = db.execute(query.order_by(models.Material.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        last_id = ids[-1]
+        indexed += index_materials(db.connection(), ids)
+        db.commit()
+        if pause:
+            time.sleep(pause)
+    return indexed
+
+
+def run(batch_size: int, pause: float, missing_only: bool):
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        indexed = reindex(db, batch_size, pause, missing_only)
+        print(f"✅ Indexed {indexed} materials for search in {time.perf_counter() - start:.1f}s")
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between batches")
+    parser.add_argument("--all", action="store_true", help="Rebuild entries that already exist too")
+    args = parser.parse_args()
+    run(args.batch_size, args.pause, missing_only=not args.all)
+
+
+if __name__ == "__main__":
+    main()
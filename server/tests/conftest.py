@@ -1,26 +1,50 @@
 """
 Pytest configuration and fixtures for testing.
 """
+import os
+import tempfile
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
+
+# Tests create their own schema; keep the app's startup from creating tables in DATABASE_URL
+os.environ.setdefault("APP_ENV", "test")
+# The minimum bcrypt cost, so registering and logging in stay fast
+os.environ.setdefault("PASSWORD_HASH_ROUNDS", "4")
+# Opens the internal /metrics endpoint (see the metrics_headers fixture)
+os.environ.setdefault("METRICS_TOKEN", "test-metrics-token")
 
 from app.main import app
-from app.database import Base, get_db
+from app.database import Base, get_db, get_async_db, to_async_url
 from app import models
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# File-based SQLite database, shared by the sync engine used for fixtures and
+# background tasks and the async (aiosqlite) engine used by the request handlers
+TEST_DB_PATH = os.path.join(tempfile.mkdtemp(prefix="study_assistant_tests_"), "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
 )
+async_engine = create_async_engine(to_async_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def configure_sqlite(dbapi_connection, connection_record):
+    """Enforce foreign keys (and ON DELETE CASCADE) like Postgres does; WAL lets readers and writers overlap."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
 
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
 
 
 @pytest.fixture(scope="function")
@@ -35,6 +59,36 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture(autouse=True)
+def extraction_cache_dir(tmp_path, monkeypatch):
+    """Keep the PDF extraction cache in a per-test directory."""
+    from app.services.extraction_cache import extraction_cache
+    
+    monkeypatch.setattr(extraction_cache, "directory", str(tmp_path / "extraction_cache"))
+    monkeypatch.setattr(extraction_cache, "_total_bytes", None)
+    return extraction_cache.directory
+
+
+@pytest.fixture(autouse=True)
+def empty_in_process_state():
+    """
+    Start and end every test with empty in-process caches and full rate limit
+    buckets: each test's database reuses user ids, so entries would leak.
+    """
+    from app.auth import token_cache
+    from app.database import recent_writers
+    from app.services.rate_limit import rate_limiter
+    from app.services.supabase_storage import supabase_storage
+    from app.services.user_cache import user_cache
+    
+    resettable = (user_cache, token_cache, supabase_storage.signed_url_cache, recent_writers, rate_limiter)
+    for state in resettable:
+        state.reset()
+    yield
+    for state in resettable:
+        state.reset()
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """Create a test client with database session override."""
@@ -44,7 +98,12 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with TestingAsyncSessionLocal() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -90,3 +149,9 @@ def authenticated_client(client, test_user_data, registered_user):
     )
     assert login_response.status_code == 200
     return client
+
+
+@pytest.fixture
+def metrics_headers():
+    """Headers that open the internal /metrics endpoint."""
+    return {"X-Metrics-Token": os.environ["METRICS_TOKEN"]}
@@ -306,3 +306,151 @@ class TestPasswordSecurity:
         me_response = client.get("/auth/me")
         assert "password" not in me_response.json()
         assert "hashed_password" not in me_response.json()
+
+
+class TestTokenCache:
+    """Tests for caching verified tokens."""
+    
+    def test_repeat_token_skips_verification(self, monkeypatch):
+        """Test a token is verified once and then served from the cache."""
+        from unittest.mock import MagicMock
+        from app import auth
+        
+        token = auth.create_access_token(data={"sub": "7"})
+        decode = MagicMock(wraps=auth.jwt.decode)
+        monkeypatch.setattr(auth.jwt, "decode", decode)
+        
+        results = [auth.decode_token(token) for _ in range(5)]
+        
+        assert decode.call_count == 1
+        assert all(result.user_id == 7 for result in results)
+        assert auth.token_cache.stats()["hits"] == 4
+    
+    def test_entry_expires_with_token(self, monkeypatch):
+        """Test the cached entry lives until the token's exp, not the cache TTL."""
+        from datetime import timedelta
+        from app import auth
+        from app.services.ttl_cache import TTLCache
+        
+        now = [0.0]
+        monkeypatch.setattr(auth, "token_cache", TTLCache(10, 1800, clock=lambda: now[0]))
+        token = auth.create_access_token(data={"sub": "7"}, expires_delta=timedelta(seconds=60))
+        auth.decode_token(token)
+        
+        now[0] = 55
+        assert auth.token_cache.get(auth.token_digest(token)) is not None
+        now[0] = 65
+        assert auth.token_cache.get(auth.token_digest(token)) is None
+    
+    def test_invalid_tokens_are_not_cached(self):
+        from datetime import timedelta
+        from app import auth
+        
+        expired = auth.create_access_token(data={"sub": "7"}, expires_delta=timedelta(seconds=-1))
+        
+        assert auth.decode_token("invalid_token_here") is None
+        assert auth.decode_token(expired) is None
+        assert len(auth.token_cache) == 0
+    
+    def test_concurrent_verification(self):
+        """Test many threads verifying the same tokens agree and share entries."""
+        from concurrent.futures import ThreadPoolExecutor
+        from app import auth
+        
+        tokens = [auth.create_access_token(data={"sub": str(user_id)}) for user_id in range(1, 5)]
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(auth.decode_token, tokens * 200))
+        
+        assert [result.user_id for result in results] == [1, 2, 3, 4] * 200
+        assert len(auth.token_cache) == 4
+
+
+class TestPasswordHashing:
+    """Tests for bcrypt hashing and the legacy hash upgrade."""
+    
+    @staticmethod
+    def legacy_hash(password):
+        import hashlib
+        salt = "0123456789abcdef0123456789abcdef"
+        return f"{salt}:{hashlib.sha256((password + salt).encode()).hexdigest()}"
+    
+    def add_legacy_user(self, db_session, test_user_data):
+        from app.models import User
+        
+        user = User(
+            email=test_user_data["email"],
+            username=test_user_data["username"],
+            hashed_password=self.legacy_hash(test_user_data["password"])
+        )
+        db_session.add(user)
+        db_session.commit()
+        return user
+    
+    def test_registered_password_uses_bcrypt(self, client, db_session, test_user_data, registered_user):
+        from app.models import User
+        from app.services.password_hashing import password_hasher
+        
+        user = db_session.get(User, registered_user["id"])
+        
+        assert user.hashed_password.startswith(f"$2b${password_hasher.rounds:02d}$")
+    
+    def test_legacy_hash_upgraded_on_login(self, client, db_session, test_user_data):
+        user = self.add_legacy_user(db_session, test_user_data)
+        
+        response = client.post("/auth/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"]
+        })
+        
+        assert response.status_code == status.HTTP_200_OK
+        db_session.refresh(user)
+        assert user.hashed_password.startswith("$2b$")
+        # And the upgraded hash still logs in
+        response = client.post("/auth/login", json={
+            "email": test_user_data["email"], "password": test_user_data["password"]
+        })
+        assert response.status_code == status.HTTP_200_OK
+    
+    def test_legacy_hash_kept_on_wrong_password(self, client, db_session, test_user_data):
+        user = self.add_legacy_user(db_session, test_user_data)
+        legacy = user.hashed_password
+        
+        response = client.post("/auth/login", json={"email": test_user_data["email"], "password": "wrong"})
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        db_session.refresh(user)
+        assert user.hashed_password == legacy
+    
+    def test_hashing_runs_on_dedicated_executor(self, client, test_user_data, monkeypatch):
+        import threading
+        from app.services import password_hashing
+        
+        threads = []
+        hashpw = password_hashing.bcrypt.hashpw
+        
+        def recording_hashpw(*args):
+            threads.append(threading.current_thread().name)
+            return hashpw(*args)
+        
+        monkeypatch.setattr(password_hashing.bcrypt, "hashpw", recording_hashpw)
+        client.post("/auth/register", json=test_user_data)
+        
+        assert len(threads) == 1 and threads[0].startswith("password-hash")
+    
+    def test_needs_rehash_when_cost_changes(self):
+        from app.services.password_hashing import PasswordHasher
+        
+        hashed = PasswordHasher(rounds=4).hash("secret")
+        
+        assert not PasswordHasher(rounds=4).needs_rehash(hashed)
+        assert PasswordHasher(rounds=5).needs_rehash(hashed)
+        assert PasswordHasher(rounds=4).needs_rehash(self.legacy_hash("secret"))
+    
+    def test_long_multibyte_password(self, client, test_user_data):
+        """Test passwords over bcrypt's 72-byte limit still register and log in."""
+        user_data = {**test_user_data, "password": "пароль" * 12}
+        assert client.post("/auth/register", json=user_data).status_code == status.HTTP_200_OK
+        
+        response = client.post("/auth/login", json={"email": user_data["email"], "password": user_data["password"]})
+        
+        assert response.status_code == status.HTTP_200_OK
@@ -0,0 +1,117 @@
+"""
+Tests for the PDF extraction cache.
+"""
+import os
+import time
+from io import BytesIO
+from unittest.mock import patch, MagicMock
+from fastapi import status
+
+from app.services import extraction_cache as cache_module
+from app.services.extraction_cache import ExtractionCache
+from app.services.pdf_extraction import iter_pdf_pages
+from benchmarks.synthetic_pdf import build_pdf
+
+
+RESULT = (3, [(0, "First page"), (2, "Third page")])
+
+
+class TestExtractionCache:
+    """Tests for the disk-backed extraction cache."""
+
+    def test_miss_then_hit(self, tmp_path):
+        """Test a stored result is returned and counted as a hit."""
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=1024 * 1024, use_db=False)
+
+        assert cache.get("abc") is None
+        cache.put("abc", RESULT)
+
+        assert cache.get("abc") == RESULT
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_get_or_extract_runs_extractor_once(self, tmp_path):
+        """Test the extractor only runs on a cache miss."""
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=1024 * 1024, use_db=False)
+        extract = MagicMock(return_value=RESULT)
+
+        assert cache.get_or_extract("abc", extract, b"pdf") == RESULT
+        assert cache.get_or_extract("abc", extract, b"pdf") == RESULT
+
+        extract.assert_called_once_with(b"pdf")
+
+    def test_extractor_version_is_part_of_key(self, tmp_path, monkeypatch):
+        """Test a new extractor version does not reuse old entries."""
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=1024 * 1024, use_db=False)
+        cache.put("abc", RESULT)
+
+        monkeypatch.setattr(cache_module, "EXTRACTOR_VERSION", "pypdf2-test/2")
+
+        assert cache.get("abc") is None
+
+    def test_lru_eviction(self, tmp_path):
+        """Test the least recently used entry is evicted when over the size limit."""
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=1024 * 1024, use_db=False)
+        cache.put("old", RESULT)
+        cache.put("recent", RESULT)
+        entry_size = os.path.getsize(cache._path(cache.cache_key("old")))
+
+        # Make "old" the least recently used, then shrink the cache to two entries
+        past = time.time() - 60
+        os.utime(cache._path(cache.cache_key("old")), (past, past))
+        cache.get("recent")
+        cache.max_bytes = entry_size * 2
+        cache.put("newest", RESULT)
+
+        assert cache.get("old") is None
+        assert cache.get("recent") == RESULT
+        assert cache.get("newest") == RESULT
+        assert cache.stats()["evictions"] == 1
+
+    def test_rewriting_an_entry_keeps_the_size(self, tmp_path):
+        """Test storing the same digest again does not grow the tracked size."""
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=10**6, use_db=False)
+        result = (1, [(0, "Same page " * 50)])
+
+        cache.put("abc", result)
+        size = cache.stats()["size_bytes"]
+        for _ in range(3):
+            cache.put("abc", result)
+
+        assert cache.stats()["size_bytes"] == size == cache._scan_size()
+
+    def test_db_tier(self, tmp_path, db_session, monkeypatch):
+        """Test entries written to the DB are found after the local file is gone."""
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(cache_module.database, "SessionLocal", TestingSessionLocal)
+        cache = ExtractionCache(directory=str(tmp_path), max_bytes=1024 * 1024, use_db=True)
+        cache.put("abc", RESULT)
+        os.remove(cache._path(cache.cache_key("abc")))
+
+        assert cache.get("abc") == RESULT
+        assert cache.stats()["db_hits"] == 1
+
+
+class TestUploadUsesExtractionCache:
+    """Tests for the extraction cache in the upload path."""
+
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_reupload_skips_extraction(self, mock_storage, authenticated_client, metrics_headers):
+        """Test uploading the same PDF twice only extracts it once."""
+        mock_storage.upload_file.return_value = "https://example.com/cached.pdf"
+        pdf_content = build_pdf(["Cached page one", "Cached page two"])
+
+        with patch('app.services.progressive_ingestion.iter_pdf_pages', wraps=iter_pdf_pages) as mock_extract:
+            for _ in range(2):
+                response = authenticated_client.post(
+                    "/materials/upload-material",
+                    files={"file": ("cached.pdf", BytesIO(pdf_content), "application/pdf")},
+                    params={"title": "Cached PDF"}
+                )
+                assert response.status_code == status.HTTP_200_OK
+                assert "Cached page two" in response.json()["content"]
+
+        assert mock_extract.call_count == 1
+        stats = authenticated_client.get("/metrics", headers=metrics_headers).json()["extraction_cache"]
+        assert stats["hits"] >= 1
@@ -0,0 +1,121 @@
+"""
+Tests for the single-statement GeneratedData upsert.
+"""
+import threading
+from unittest.mock import patch
+
+import pytest
+from fastapi import status
+from sqlalchemy.dialects import postgresql
+
+from app.services.generated_data import upsert_generated_data_sync, upsert_statement
+
+
+@pytest.fixture
+def material(db_session):
+    from app import models
+
+    user = models.User(email="u@example.com", username="u", hashed_password="x")
+    db_session.add(user)
+    db_session.commit()
+    material = models.Material(title="Entropy", content="Text", file_type="text", user_id=user.id)
+    db_session.add(material)
+    db_session.commit()
+    return material
+
+
+class TestUpsertStatement:
+    """Tests for the generated SQL."""
+
+    def test_postgres_statement(self):
+        """Test Postgres gets ON CONFLICT (material_id) DO UPDATE of only the given column, with RETURNING."""
+        sql = str(upsert_statement("postgresql", 1, {"summary": "S"}).compile(dialect=postgresql.dialect()))
+
+        assert "ON CONFLICT (material_id) DO UPDATE SET summary = excluded.summary" in sql
+        assert "quiz_questions = " not in sql
+        assert "RETURNING" in sql
+
+    def test_rejects_unknown_columns(self):
+        """Test columns outside the generated artifacts cannot be upserted."""
+        with pytest.raises(ValueError):
+            upsert_statement("sqlite", 1, {"material_id": 2})
+
+
+class TestUpsertGeneratedData:
+    """Tests for upserting through a session."""
+
+    def test_insert_then_partial_update(self, db_session, material):
+        """Test the first call inserts and later calls only change their own columns."""
+        first = upsert_generated_data_sync(db_session, material.id, summary="Summary", key_concepts=["Entropy"])
+        db_session.commit()
+        second = upsert_generated_data_sync(db_session, material.id, quiz_questions=[{"question": "Q?"}])
+        db_session.commit()
+
+        assert second.id == first.id
+        assert second.summary == "Summary"
+        assert second.key_concepts == ["Entropy"]
+        assert second.quiz_questions == [{"question": "Q?"}]
+
+    def test_concurrent_writers_share_one_row(self, db_session, material):
+        """Test writers racing on a new material end up with one row holding both results."""
+        from app import models
+        from tests.conftest import TestingSessionLocal
+
+        barrier = threading.Barrier(2)
+        errors = []
+
+        def write(**values):
+            db = TestingSessionLocal()
+            try:
+                barrier.wait()
+                upsert_generated_data_sync(db, material.id, **values)
+                db.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+
+        threads = [
+            threading.Thread(target=write, kwargs={"summary": "Summary"}),
+            threading.Thread(target=write, kwargs={"key_concepts": ["Entropy"]})
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        rows = db_session.query(models.GeneratedData).filter_by(material_id=material.id).all()
+        assert len(rows) == 1
+        assert rows[0].summary == "Summary"
+        assert rows[0].key_concepts == ["Entropy"]
+
+
+class TestLLMWrites:
+    """Tests for the LLM endpoints' writes."""
+
+    @patch('app.routers.llm.gemini_service')
+    def test_endpoint_writes_with_one_statement(self, mock_service, authenticated_client, db_session):
+        """Test generating an artifact issues one upsert and no select on generated_data."""
+        from app import models
+        from benchmarks.bench_history import count_queries
+        from tests.conftest import async_engine
+
+        user = db_session.query(models.User).first()
+        material = models.Material(title="Entropy", content="Entropy measures disorder. " * 10, file_type="text", user_id=user.id)
+        material.generated_data = models.GeneratedData(summary="Old summary", key_concepts=["Entropy"])
+        db_session.add(material)
+        db_session.commit()
+        mock_service.generate_summary.return_value = "New summary"
+
+        with count_queries(async_engine.sync_engine) as statements:
+            response = authenticated_client.post(f"/llm/generate-summary/{material.id}")
+
+        assert response.status_code == status.HTTP_200_OK
+        generated_statements = [s for s in statements if "generated_data" in s]
+        assert len(generated_statements) == 1
+        assert generated_statements[0].startswith("INSERT INTO generated_data")
+
+        db_session.expire_all()
+        assert material.generated_data.summary == "New summary"
+        assert material.generated_data.key_concepts == ["Entropy"]
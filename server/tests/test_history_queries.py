@@ -0,0 +1,57 @@
+"""
+Query count and latency tests for the material history endpoint.
+"""
+import time
+import pytest
+from fastapi import status
+
+from benchmarks.bench_history import count_queries, seed_materials
+from tests.conftest import async_engine
+
+
+@pytest.fixture
+def seeded_history(authenticated_client, db_session, request):
+    """Seed the authenticated user with `request.param` materials and generated data."""
+    from app import models
+
+    user = db_session.query(models.User).first()
+    seed_materials(db_session, user.id, request.param)
+    return request.param
+
+
+class TestHistoryQueries:
+    """Tests that get-history does not issue one query per material."""
+
+    @pytest.mark.parametrize(
+        "seeded_history",
+        [1000, pytest.param(10000, marks=pytest.mark.slow)],
+        indirect=True
+    )
+    def test_query_count_is_constant(self, seeded_history, authenticated_client):
+        """Test history loads with a fixed number of queries and within the latency budget."""
+        with count_queries(async_engine.sync_engine) as statements:
+            start = time.perf_counter()
+            response = authenticated_client.get("/materials/get-history")
+            elapsed = time.perf_counter() - start
+
+        assert response.status_code == status.HTTP_200_OK
+        history = response.json()
+        assert len(history) == seeded_history
+        assert all(item["generated_data"] is not None for item in history)
+        # User lookup and one joined history query, whatever the number of materials
+        assert len(statements) == 2
+        assert elapsed < seeded_history / 200  # 5s per 1k materials, far above the expected time
+
+    def test_materials_without_generated_data(self, authenticated_client, db_session):
+        """Test materials without generated data are returned with None."""
+        from app import models
+
+        user = db_session.query(models.User).first()
+        seed_materials(db_session, user.id, 3, with_generated=False)
+
+        response = authenticated_client.get("/materials/get-history")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [item["generated_data"] for item in response.json()] == [None, None, None]
+        # Newest first
+        assert [item["material"]["title"] for item in response.json()] == ["Material 2", "Material 1", "Material 0"]
@@ -0,0 +1,127 @@
+"""
+Tests for app startup: no import-time side effects, concurrent lifespan initialization.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from app import lifespan
+from app.lifespan import StartupTimings, initialize_components, startup_components
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestImport:
+    """Tests for importing app.main."""
+
+    def test_import_has_no_side_effects(self):
+        """Test importing the app creates no service clients and loads neither SDK."""
+        check = (
+            "import sys\n"
+            "from app.main import app\n"
+            "from app.services.gemini_service import gemini_service\n"
+            "from app.services.supabase_storage import supabase_storage\n"
+            "assert not gemini_service._initialized and not supabase_storage._initialized\n"
+            "assert 'google.generativeai' not in sys.modules and 'supabase' not in sys.modules\n"
+        )
+        result = subprocess.run([sys.executable, "-c", check], cwd=SERVER_DIR, capture_output=True, text=True)
+
+        assert result.returncode == 0, result.stderr
+
+
+class TestLifespan:
+    """Tests for the lifespan startup."""
+
+    def test_components_run_concurrently(self, monkeypatch):
+        """Test initializers overlap and each gets its own timing."""
+        monkeypatch.setattr(lifespan, "startup_timings", StartupTimings())
+
+        start = time.perf_counter()
+        asyncio.run(initialize_components({
+            "slow_a": lambda: time.sleep(0.2),
+            "slow_b": lambda: time.sleep(0.2)
+        }))
+
+        assert time.perf_counter() - start < 0.35
+        components = lifespan.startup_timings.stats()["components"]
+        assert set(components) == {"slow_a", "slow_b"}
+        assert all(timing["ms"] >= 200 and timing["status"] == "ok" for timing in components.values())
+
+    def test_failed_component_is_reported(self, monkeypatch):
+        """Test a failing initializer is recorded without stopping the others."""
+        monkeypatch.setattr(lifespan, "startup_timings", StartupTimings())
+
+        def broken():
+            raise RuntimeError("no route to host")
+
+        asyncio.run(initialize_components({"broken": broken, "fine": lambda: None}))
+
+        components = lifespan.startup_timings.stats()["components"]
+        assert components["broken"]["status"] == "error"
+        assert components["broken"]["error"] == "RuntimeError"  # The message stays in the logs
+        assert components["fine"]["status"] == "ok"
+
+    def test_schema_created_only_in_development(self, monkeypatch):
+        monkeypatch.setattr(lifespan, "APP_ENV", "production")
+        assert "database_schema" not in startup_components()
+
+        monkeypatch.setattr(lifespan, "APP_ENV", "development")
+        assert "database_schema" in startup_components()
+
+    def test_engine_errors_reported_in_timings(self, monkeypatch):
+        from app import database
+
+        monkeypatch.setattr(database, "engine_errors", {"replica_async": ValueError("bad replica URL")})
+
+        asyncio.run(initialize_components({"database_engines": lifespan.check_database_engines}))
+
+        engines = lifespan.startup_timings.stats()["components"]["database_engines"]
+        assert engines["status"] == "error"
+        assert engines["error"] == "RuntimeError"
+        assert "bad replica URL" not in str(lifespan.startup_timings.stats())
+
+    def test_timings_on_metrics(self, client, metrics_headers):
+        """Test the startup run by the test client is reported on /metrics."""
+        startup = client.get("/metrics", headers=metrics_headers).json()["startup"]
+
+        assert {"gemini", "storage"} <= set(startup["components"])
+        assert startup["startup_ms"] is not None
+
+
+class TestMigrateScript:
+    """Tests for the startup migration script."""
+
+    def _version(self, url):
+        from sqlalchemy import create_engine, text
+
+        with create_engine(url).connect() as connection:
+            return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+    def test_unversioned_database_is_stamped_then_upgraded(self, tmp_path):
+        """Test tables from the old create_all are stamped at 0001 instead of being created again."""
+        from alembic import command
+        from alembic.script import ScriptDirectory
+        from sqlalchemy import create_engine, text
+        from scripts.migrate import alembic_config, migrate
+
+        url = f"sqlite:///{tmp_path / 'legacy.db'}"
+        config = alembic_config(url)
+        command.upgrade(config, "0001")
+        with create_engine(url).begin() as connection:
+            connection.execute(text("DROP TABLE alembic_version"))
+
+        migrate(url)
+
+        assert self._version(url) == ScriptDirectory.from_config(config).get_current_head()
+
+    def test_empty_database_is_upgraded(self, tmp_path):
+        from alembic.script import ScriptDirectory
+        from scripts.migrate import alembic_config, migrate
+
+        url = f"sqlite:///{tmp_path / 'fresh.db'}"
+
+        migrate(url)
+
+        assert self._version(url) == ScriptDirectory.from_config(alembic_config(url)).get_current_head()
@@ -132,6 +132,67 @@ class TestGenerateSummary:
         assert updated_data.summary == "New updated summary."
 
 
+class TestPageRangeProcessing:
+    """Tests for LLM operations on a page range."""
+    
+    @pytest.fixture
+    def pdf_material(self, authenticated_client):
+        """Upload a three-page PDF."""
+        from io import BytesIO
+        from benchmarks.synthetic_pdf import build_pdf
+        
+        pdf_content = build_pdf([
+            "Photosynthesis converts light energy into chemical energy in plants.",
+            "The Calvin cycle fixes carbon dioxide into sugars using ATP and NADPH.",
+            "Cellular respiration releases the energy stored in glucose molecules."
+        ])
+        with patch('app.routers.materials.supabase_storage', autospec=True) as mock_storage:
+            mock_storage.upload_file.return_value = "https://example.com/bio.pdf"
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                files={"file": ("bio.pdf", BytesIO(pdf_content), "application/pdf")},
+                params={"title": "Biology"}
+            )
+        return response.json()
+    
+    @patch('app.routers.llm.gemini_service')
+    def test_summary_uses_only_requested_pages(self, mock_service, authenticated_client, pdf_material, db_session):
+        """Test a page-range summary sees only those pages and is not stored."""
+        from app import models
+        
+        mock_service.generate_summary.return_value = "Summary of the Calvin cycle."
+        
+        response = authenticated_client.post(
+            f"/llm/generate-summary/{pdf_material['id']}?start_page=2&end_page=3"
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["page_range"] == {"start_page": 2, "end_page": 3}
+        content = mock_service.generate_summary.call_args[0][0]
+        assert "Calvin cycle" in content
+        assert "Cellular respiration" in content
+        assert "Photosynthesis" not in content
+        assert "--- Page 3 ---" in content
+        assert db_session.query(models.GeneratedData).count() == 0
+    
+    def test_page_range_invalid(self, authenticated_client, pdf_material):
+        """Test end_page before start_page is rejected."""
+        response = authenticated_client.post(
+            f"/llm/extract-concepts/{pdf_material['id']}?start_page=3&end_page=1"
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_page_range_without_pages(self, authenticated_client, sample_material):
+        """Test text materials have no stored pages to process."""
+        response = authenticated_client.post(
+            f"/llm/generate-quiz/{sample_material['id']}?start_page=1&end_page=2"
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "too short" in response.json()["detail"].lower()
+
+
 class TestGenerateQuiz:
     """Tests for quiz generation endpoint."""
     
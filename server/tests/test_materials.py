@@ -1,6 +1,7 @@
 """
 Tests for materials routes.
 """
+import os
 import pytest
 from fastapi import status
 from io import BytesIO
@@ -31,13 +32,12 @@ class TestUploadMaterial:
         assert "id" in result
         assert "uploaded_at" in result
     
-    @patch('app.routers.materials.supabase_storage')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
     def test_upload_pdf_file_success(self, mock_storage, authenticated_client):
         """Test successful PDF file upload."""
         # Create a minimal valid PDF
         pdf_content = b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n3 0 obj\n<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> /MediaBox [0 0 612 792] /Contents 4 0 R >>\nendobj\n4 0 obj\n<< /Length 44 >>\nstream\nBT /F1 12 Tf 100 700 Td (Test PDF) Tj ET\nendstream\nendobj\nxref\n0 5\n0000000000 65535 f\n0000000009 00000 n\n0000000058 00000 n\n0000000115 00000 n\n0000000317 00000 n\ntrailer\n<< /Size 5 /Root 1 0 R >>\nstartxref\n408\n%%EOF"
         
-        mock_storage.supabase = MagicMock()
         mock_storage.upload_file.return_value = "https://example.com/test.pdf"
         
         with patch('app.routers.materials.auto_process_with_llm') as mock_llm:
@@ -76,10 +76,10 @@ class TestUploadMaterial:
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
     
-    @patch('app.routers.materials.supabase_storage')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
     def test_upload_pdf_storage_not_configured(self, mock_storage, authenticated_client):
         """Test PDF upload fails when storage is not configured."""
-        mock_storage.supabase = None
+        mock_storage.is_configured.return_value = False
         
         # Create a minimal valid PDF
         pdf_content = b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n2 0 obj\n<< /Type /Pages /Kids [3 0 R] /Count 1 >>\nendobj\n3 0 obj\n<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 << /Type /Font /Subtype /Type1 /BaseFont /Helvetica >> >> >> /MediaBox [0 0 612 792] /Contents 4 0 R >>\nendobj\n4 0 obj\n<< /Length 44 >>\nstream\nBT /F1 12 Tf 100 700 Td (Test PDF) Tj ET\nendstream\nendobj\nxref\n0 5\n0000000000 65535 f\n0000000009 00000 n\n0000000058 00000 n\n0000000115 00000 n\n0000000317 00000 n\ntrailer\n<< /Size 5 /Root 1 0 R >>\nstartxref\n408\n%%EOF"
@@ -92,7 +92,118 @@ class TestUploadMaterial:
         
         assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
         assert "storage service" in response.json()["detail"].lower()
+    
+    def test_upload_file_too_large(self, authenticated_client):
+        """Test upload fails with 413 once the streamed size exceeds the limit."""
+        with patch('app.services.upload_spool.MAX_UPLOAD_SIZE', 1024):
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                files={"file": ("big.txt", BytesIO(b"a" * 4096), "text/plain")},
+                params={"title": "Too Big"}
+            )
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        assert "too large" in response.json()["detail"].lower()
+    
+    def test_upload_chunked_body_too_large(self, authenticated_client):
+        """Test chunked uploads without a Content-Length are rejected while streaming."""
+        boundary = "spoolboundary"
+        
+        def body():
+            yield (
+                f"--{boundary}\r\n"
+                'Content-Disposition: form-data; name="file"; filename="big.txt"\r\n'
+                "Content-Type: text/plain\r\n\r\n"
+            ).encode()
+            for _ in range(8):
+                yield b"a" * 512
+            yield f"\r\n--{boundary}--\r\n".encode()
+        
+        with patch('app.services.upload_spool.MAX_UPLOAD_SIZE', 1024):
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                content=body(),
+                headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+                params={"title": "Chunked"}
+            )
+        
+        assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    
+    def test_upload_missing_file_field(self, authenticated_client):
+        """Test a multipart body without the file field is rejected."""
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"other": ("notes.txt", BytesIO(b"hello"), "text/plain")},
+            params={"title": "No File"}
+        )
+        
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_upload_pdf_spooled_to_disk(self, mock_storage, authenticated_client):
+        """Test PDFs above the spool memory limit are extracted and uploaded from a temp file."""
+        from benchmarks.synthetic_pdf import build_pdf
+        
+        pdf_content = build_pdf(["Spooled page one", "Spooled page two"])
+        uploaded = {}
+        
+        def fake_upload(file_content, **kwargs):
+            uploaded["is_file"] = hasattr(file_content, "name") and os.path.exists(file_content.name)
+            uploaded["path"] = file_content.name
+            uploaded["body"] = file_content.read()
+            return "https://example.com/spooled.pdf"
+        
+        mock_storage.upload_file.side_effect = fake_upload
+        
+        with patch('app.services.upload_spool.UPLOAD_SPOOL_MEMORY', 64):
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                files={"file": ("spooled.pdf", BytesIO(pdf_content), "application/pdf")},
+                params={"title": "Spooled PDF"}
+            )
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert "Spooled page two" in response.json()["content"]
+        assert uploaded["is_file"]
+        assert uploaded["body"] == pdf_content
+        assert not os.path.exists(uploaded["path"])  # Spool file removed after the request
 
+    
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_upload_pdf_extraction_failure_removes_uploaded_file(self, mock_storage, authenticated_client, db_session):
+        """Test the stored object is deleted when text extraction fails."""
+        from app import models
+        
+        mock_storage.upload_file.return_value = "https://example.com/broken.pdf"
+        
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"file": ("broken.pdf", BytesIO(b"%PDF-1.4 not really a pdf"), "application/pdf")},
+            params={"title": "Broken PDF"}
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        mock_storage.delete_file.assert_called_once_with("https://example.com/broken.pdf")
+        assert db_session.query(models.Material).count() == 0
+    
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_upload_pdf_storage_failure(self, mock_storage, authenticated_client, db_session):
+        """Test a failed storage upload returns 500 without creating a material."""
+        from app import models
+        from benchmarks.synthetic_pdf import build_pdf
+        
+        mock_storage.upload_file.side_effect = RuntimeError("storage unavailable")
+        
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"file": ("test.pdf", BytesIO(build_pdf(["Some text"])), "application/pdf")},
+            params={"title": "Test PDF"}
+        )
+        
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert "storage unavailable" in response.json()["detail"]
+        mock_storage.delete_file.assert_not_called()
+        assert db_session.query(models.Material).count() == 0
 
 class TestUploadText:
     """Tests for direct text upload endpoint."""
@@ -216,6 +327,25 @@ class TestGetUserHistory:
         assert "First Material" in titles
         assert "Second Material" in titles
     
+    def test_get_history_returns_structured_generated_data(self, authenticated_client, db_session):
+        """Test quiz questions and key concepts come back as JSON arrays, not strings."""
+        from app import models
+        
+        user = db_session.query(models.User).first()
+        material = models.Material(title="Structured", content="Text", file_type="text", user_id=user.id)
+        material.generated_data = models.GeneratedData(
+            quiz_questions=[{"question": "What is entropy?", "difficulty": "medium"}],
+            key_concepts=["Entropy"]
+        )
+        db_session.add(material)
+        db_session.commit()
+        
+        response = authenticated_client.get("/materials/get-history")
+        
+        generated = response.json()[0]["generated_data"]
+        assert generated["quiz_questions"] == [{"question": "What is entropy?", "difficulty": "medium"}]
+        assert generated["key_concepts"] == ["Entropy"]
+    
     def test_get_history_without_authentication(self, client):
         """Test getting history fails without authentication."""
         response = client.get("/materials/get-history")
@@ -264,6 +394,122 @@ class TestGetUserHistory:
         assert history[0]["material"]["title"] == "User 2 Material"
 
 
+class TestListMaterials:
+    """Tests for the keyset-paginated material listing."""
+    
+    @pytest.fixture
+    def seeded(self, authenticated_client, db_session):
+        """Seed 45 materials with generated data for the authenticated user."""
+        from app import models
+        from benchmarks.bench_history import seed_materials
+        
+        user = db_session.query(models.User).first()
+        seed_materials(db_session, user.id, 45)
+        return 45
+    
+    def test_list_paginates_with_cursor(self, authenticated_client, seeded):
+        """Test pages follow each other newest first without gaps or duplicates."""
+        titles = []
+        cursor = None
+        pages = 0
+        while True:
+            params = {"limit": 20}
+            if cursor:
+                params["cursor"] = cursor
+            response = authenticated_client.get("/materials", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            result = response.json()
+            titles.extend(item["title"] for item in result["items"])
+            pages += 1
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert pages == 3
+        assert titles == [f"Material {i}" for i in range(44, -1, -1)]
+    
+    def test_list_items_are_lightweight(self, authenticated_client, seeded):
+        """Test list items carry sizes and flags instead of content and generated text."""
+        from benchmarks.bench_history import count_queries
+        from tests.conftest import async_engine
+        
+        with count_queries(async_engine.sync_engine) as statements:
+            response = authenticated_client.get("/materials", params={"limit": 1})
+        
+        item = response.json()["items"][0]
+        assert set(item) == {
+            "id", "title", "file_type", "uploaded_at", "content_length", "ingestion_status",
+            "has_summary", "has_quiz", "has_key_concepts", "question_count"
+        }
+        assert item["content_length"] == 500
+        assert item["question_count"] == 1
+        assert item["has_summary"] and item["has_quiz"] and item["has_key_concepts"]
+        assert not any("materials.content AS" in statement for statement in statements)
+    
+    def test_list_filters_by_concept_and_difficulty(self, authenticated_client, db_session):
+        """Test the concept and difficulty filters look inside the generated JSON."""
+        from app import models
+        
+        user = db_session.query(models.User).first()
+        for title, concepts, difficulties in [
+            ("Thermodynamics", ["Entropy", "Heat"], ["easy", "hard"]),
+            ("Optics", ["Refraction"], ["easy"]),
+            ("Notes", None, None)
+        ]:
+            material = models.Material(title=title, content="Text", file_type="text", user_id=user.id)
+            material.generated_data = models.GeneratedData(
+                key_concepts=concepts,
+                quiz_questions=[{"question": "Q?", "difficulty": d} for d in difficulties] if difficulties else None
+            )
+            db_session.add(material)
+        db_session.commit()
+        
+        def titles(**params):
+            response = authenticated_client.get("/materials", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            return sorted(item["title"] for item in response.json()["items"])
+        
+        assert titles(concept="Entropy") == ["Thermodynamics"]
+        assert titles(difficulty="easy") == ["Optics", "Thermodynamics"]
+        assert titles(difficulty="hard", concept="Refraction") == []
+        assert titles(concept="Gravity") == []
+    
+    def test_list_breaks_timestamp_ties_by_id(self, authenticated_client):
+        """Test materials uploaded within the same second are neither skipped nor repeated."""
+        for i in range(5):
+            authenticated_client.post("/materials/upload-text", json={
+                "title": f"Same second {i}",
+                "content": "This is a test material with enough content to be valid for upload."
+            })
+        
+        ids = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            result = authenticated_client.get("/materials", params=params).json()
+            ids.extend(item["id"] for item in result["items"])
+            cursor = result["next_cursor"]
+            if cursor is None:
+                break
+        
+        assert len(ids) == 5
+        assert len(set(ids)) == 5
+    
+    def test_list_invalid_cursor(self, authenticated_client):
+        """Test a malformed cursor is rejected."""
+        response = authenticated_client.get("/materials", params={"cursor": "not-a-cursor"})
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_list_without_authentication(self, client):
+        """Test listing fails without authentication."""
+        response = client.get("/materials")
+        
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
 class TestGetMaterial:
     """Tests for getting specific material by ID."""
     
@@ -335,13 +581,86 @@ class TestGetMaterial:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+class TestGetMaterialPages:
+    """Tests for paginated page-range access."""
+    
+    @pytest.fixture
+    def pdf_material(self, authenticated_client):
+        """Upload a five-page PDF with one blank page."""
+        from benchmarks.synthetic_pdf import build_pdf
+        
+        pdf_content = build_pdf(["Page one text", "Page two text", None, "Page four text", "Page five text"])
+        with patch('app.routers.materials.supabase_storage', autospec=True) as mock_storage:
+            mock_storage.upload_file.return_value = "https://example.com/pages.pdf"
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                files={"file": ("pages.pdf", BytesIO(pdf_content), "application/pdf")},
+                params={"title": "Paged PDF"}
+            )
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+    
+    def test_pages_stored_at_ingestion(self, pdf_material, db_session):
+        """Test non-empty pages are stored with 1-based page numbers and hashes."""
+        import hashlib
+        from app import models
+        
+        pages = db_session.query(models.MaterialPage).filter(
+            models.MaterialPage.material_id == pdf_material["id"]
+        ).order_by(models.MaterialPage.page_no).all()
+        
+        assert [page.page_no for page in pages] == [1, 2, 4, 5]
+        assert pages[0].char_count == len(pages[0].text)
+        assert pages[0].hash == hashlib.sha256(pages[0].text.encode()).hexdigest()
+    
+    def test_get_pages_paginated(self, authenticated_client, pdf_material):
+        """Test page ranges are returned in batches with a next_page marker."""
+        response = authenticated_client.get(
+            f"/materials/{pdf_material['id']}/pages", params={"start_page": 2, "limit": 2}
+        )
+        
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert result["total_pages"] == 4
+        assert [page["page_no"] for page in result["pages"]] == [2, 4]
+        assert "Page four text" in result["pages"][1]["text"]
+        assert result["next_page"] == 5
+        
+        response = authenticated_client.get(
+            f"/materials/{pdf_material['id']}/pages", params={"start_page": result["next_page"], "limit": 2}
+        )
+        assert [page["page_no"] for page in response.json()["pages"]] == [5]
+        assert response.json()["next_page"] is None
+    
+    def test_get_pages_end_page(self, authenticated_client, pdf_material):
+        """Test end_page bounds the returned range."""
+        response = authenticated_client.get(
+            f"/materials/{pdf_material['id']}/pages", params={"start_page": 1, "end_page": 2}
+        )
+        
+        assert [page["page_no"] for page in response.json()["pages"]] == [1, 2]
+    
+    def test_get_pages_invalid_range(self, authenticated_client, pdf_material):
+        """Test end_page before start_page is rejected."""
+        response = authenticated_client.get(
+            f"/materials/{pdf_material['id']}/pages", params={"start_page": 4, "end_page": 2}
+        )
+        
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+    
+    def test_get_pages_not_found(self, authenticated_client):
+        """Test pages of a non-existent material."""
+        response = authenticated_client.get("/materials/99999/pages")
+        
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 class TestDeleteMaterial:
     """Tests for deleting materials."""
     
-    @patch('app.routers.materials.supabase_storage')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
     def test_delete_material_success(self, mock_storage, authenticated_client):
         """Test successfully deleting a material."""
-        mock_storage.supabase = MagicMock()
         mock_storage.delete_file.return_value = True
         
         # Upload a material first
@@ -411,13 +730,132 @@ class TestDeleteMaterial:
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
 
 
+class TestBulkDeleteMaterials:
+    """Tests for deleting many materials at once."""
+    
+    @staticmethod
+    def add_materials(db_session, count, file_url=None):
+        from datetime import datetime, timedelta, timezone
+        from app import models
+        
+        user = db_session.query(models.User).first()
+        materials = [
+            models.Material(
+                title=f"Material {i}", content="Content", file_type="pdf" if file_url else "text",
+                file_url=file_url and f"{file_url}/{i}.pdf", user_id=user.id,
+                uploaded_at=datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=i)
+            )
+            for i in range(count)
+        ]
+        db_session.add_all(materials)
+        db_session.commit()
+        for material in materials:
+            material.generated_data = models.GeneratedData(summary="Summary")
+        db_session.commit()
+        return [material.id for material in materials]
+    
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_bulk_delete_by_ids(self, mock_storage, authenticated_client, db_session):
+        """Test rows go in one DELETE, files in one batched call, with a result per id."""
+        from sqlalchemy import func, select
+        from app import models
+        from app.services.material_search import materials_fts
+        from benchmarks.bench_history import count_queries
+        from tests.conftest import async_engine
+        
+        mock_storage.delete_files.side_effect = lambda urls: {url: not url.endswith("/1.pdf") for url in urls}
+        ids = self.add_materials(db_session, 3, file_url="https://storage.example.com/bucket")
+        
+        with count_queries(async_engine.sync_engine) as statements:
+            response = authenticated_client.post("/materials/bulk-delete", json={"ids": ids + [99999]})
+        
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert result["deleted"] == 3
+        assert result["has_more"] is False
+        assert {r["id"]: (r["status"], r["file_deleted"]) for r in result["results"]} == {
+            ids[0]: ("deleted", True),
+            ids[1]: ("deleted", False),
+            ids[2]: ("deleted", True),
+            99999: ("not_found", None)
+        }
+        assert len([s for s in statements if s.startswith("DELETE FROM materials ")]) == 1
+        mock_storage.delete_files.assert_called_once()
+        
+        db_session.expire_all()
+        assert db_session.query(models.Material).count() == 0
+        assert db_session.query(models.GeneratedData).count() == 0
+        assert db_session.execute(select(func.count()).select_from(materials_fts)).scalar() == 0
+    
+    def test_bulk_delete_by_date(self, authenticated_client, db_session):
+        """Test a date range deletes only the materials uploaded inside it."""
+        from app import models
+        
+        ids = self.add_materials(db_session, 4)
+        
+        response = authenticated_client.post("/materials/bulk-delete", json={
+            "uploaded_after": "2024-01-02T00:00:00Z",
+            "uploaded_before": "2024-01-04T00:00:00Z"
+        })
+        
+        assert response.status_code == status.HTTP_200_OK
+        assert [r["id"] for r in response.json()["results"]] == ids[1:3]
+        assert [m.id for m in db_session.query(models.Material).order_by(models.Material.id)] == [ids[0], ids[3]]
+    
+    def test_bulk_delete_date_filter_is_limited(self, authenticated_client, db_session):
+        """Test a date filter deletes oldest first up to the limit and reports more."""
+        ids = self.add_materials(db_session, 3)
+        
+        with patch('app.routers.materials.BULK_DELETE_LIMIT', 2):
+            response = authenticated_client.post("/materials/bulk-delete", json={"uploaded_before": "2030-01-01T00:00:00Z"})
+        
+        assert [r["id"] for r in response.json()["results"]] == ids[:2]
+        assert response.json()["has_more"] is True
+    
+    def test_bulk_delete_other_users_materials(self, authenticated_client, db_session):
+        """Test another user's materials are reported as not found and kept."""
+        from app import models
+        
+        other = models.User(email="other@example.com", username="other", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        material = models.Material(title="Theirs", content="Content", file_type="text", user_id=other.id)
+        db_session.add(material)
+        db_session.commit()
+        
+        response = authenticated_client.post("/materials/bulk-delete", json={"ids": [material.id]})
+        
+        assert response.json()["results"] == [{"id": material.id, "status": "not_found", "file_deleted": None}]
+        assert db_session.query(models.Material).count() == 1
+    
+    def test_bulk_delete_requires_a_selection(self, authenticated_client):
+        """Test an empty request is rejected instead of deleting everything."""
+        assert authenticated_client.post("/materials/bulk-delete", json={}).status_code == status.HTTP_400_BAD_REQUEST
+        assert authenticated_client.post("/materials/bulk-delete", json={"ids": []}).status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_storage_removes_in_batches(self):
+        """Test delete_files sends one remove request per batch and maps removed paths back to URLs."""
+        import asyncio
+        from benchmarks.storage_stand_in import create_storage_app, stand_in_storage
+        
+        server = create_storage_app()
+        storage = stand_in_storage(server)
+        server.state.objects.update({("bucket", "a.pdf"): b"a", ("bucket", "c.pdf"): b"c"})
+        urls = [f"{storage.storage_url}/{name}" for name in ("a.pdf", "b.pdf", "c.pdf")] + ["https://elsewhere/d.pdf"]
+        
+        results = asyncio.run(storage.delete_files(urls, batch_size=2))
+        
+        assert server.state.requests == 2
+        assert results == {urls[0]: True, urls[1]: False, urls[2]: True, urls[3]: False}
+        assert server.state.objects == {}
+
+
 class TestGetDownloadUrl:
     """Tests for getting download URL."""
     
-    @patch('app.routers.materials.supabase_storage')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
     def test_get_download_url_success(self, mock_storage, authenticated_client):
         """Test successfully getting download URL."""
-        mock_storage.supabase = MagicMock()
         mock_storage.upload_file.return_value = "https://example.com/test.pdf"
         mock_storage.generate_presigned_url.return_value = "https://example.com/test.pdf?signed=true"
         
@@ -472,3 +910,31 @@ class TestGetDownloadUrl:
         response = client.get("/materials/download/1")
         
         assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    
+    def test_download_urls_sign_page_in_one_request(self, authenticated_client, db_session, registered_user, monkeypatch):
+        """Test a listing page's download URLs are signed with one storage call, then served from the cache."""
+        from app import models
+        from benchmarks.storage_stand_in import create_storage_app, stand_in_storage
+        
+        server = create_storage_app()
+        storage = stand_in_storage(server)
+        monkeypatch.setattr('app.routers.materials.supabase_storage', storage)
+        materials = [
+            models.Material(title=name, content="Text", file_type="pdf", user_id=registered_user["id"],
+                            file_url=f"{storage.storage_url}/{name}" if name != "text" else None)
+            for name in ("a.pdf", "b.pdf", "text")
+        ]
+        db_session.add_all(materials)
+        db_session.commit()
+        server.state.objects.update({("bucket", "a.pdf"): b"a", ("bucket", "b.pdf"): b"b"})
+        ids = [material.id for material in materials] + [99999]
+        
+        response = authenticated_client.get("/materials/download-urls", params={"ids": ids})
+        again = authenticated_client.get("/materials/download-urls", params={"ids": ids})
+        
+        assert response.status_code == status.HTTP_200_OK
+        items = response.json()["items"]
+        assert [item["id"] for item in items] == ids[:2]
+        assert all(item["download_url"].startswith(f"{storage.api_url}/object/sign/bucket/") for item in items)
+        assert again.json() == response.json()
+        assert server.state.requests == 1
@@ -0,0 +1,90 @@
+"""
+Tests for the PDF extraction engine.
+"""
+import io
+import pytest
+import PyPDF2
+
+from app.services import pdf_extraction
+from benchmarks.synthetic_pdf import build_pdf, textbook_pages
+
+
+def legacy_extract(pdf_bytes):
+    """The original serial extraction loop from upload_material."""
+    content = ""
+    pdf_reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
+    for page_num, page in enumerate(pdf_reader.pages):
+        page_text = page.extract_text()
+        if page_text.strip():
+            content += page_text
+            if page_num < len(pdf_reader.pages) - 1:
+                content += "\n\n--- Page {} ---\n\n".format(page_num + 2)
+    return content
+
+
+class TestPdfExtraction:
+    """Tests for sharded PDF text extraction."""
+
+    def test_matches_legacy_output(self):
+        """Test serial extraction keeps the existing page separator format."""
+        pdf_bytes = build_pdf(["First page text", None, "Third page text", "Last page"])
+
+        assert pdf_extraction.extract_pdf_text(pdf_bytes, max_workers=1) == legacy_extract(pdf_bytes)
+
+    def test_blank_pages_are_skipped(self):
+        """Test pages without content are not returned."""
+        pdf_bytes = build_pdf(["Page one", None, "", "Page four"])
+
+        page_count, pages = pdf_extraction.extract_pdf_pages(pdf_bytes, max_workers=1)
+
+        assert page_count == 4
+        assert [page_num for page_num, _ in pages] == [0, 3]
+
+    def test_parallel_matches_serial(self, monkeypatch):
+        """Test sharded extraction across processes reassembles pages in order."""
+        monkeypatch.setattr(pdf_extraction, "PDF_PARALLEL_MIN_PAGES", 1)
+        pdf_bytes = build_pdf(textbook_pages(30, lines_per_page=3, blank_every=7))
+
+        serial = pdf_extraction.extract_pdf_text(pdf_bytes, max_workers=1)
+        parallel = pdf_extraction.extract_pdf_text(pdf_bytes, max_workers=3)
+
+        assert parallel == serial
+        assert parallel == legacy_extract(pdf_bytes)
+
+    def test_extractions_share_one_bounded_pool(self, monkeypatch, tmp_path):
+        """Test concurrent extractions reuse the shared non-fork pool, and byte sources leave no temporary files."""
+        import threading
+
+        monkeypatch.setattr(pdf_extraction, "PDF_PARALLEL_MIN_PAGES", 1)
+        monkeypatch.setattr(pdf_extraction.tempfile, "tempdir", str(tmp_path))
+        pool = pdf_extraction.PdfExtractionPool(workers=2)
+        monkeypatch.setattr(pdf_extraction, "pdf_extraction_pool", pool)
+        pdf_bytes = build_pdf(textbook_pages(12, lines_per_page=2))
+        results = []
+
+        try:
+            threads = [
+                threading.Thread(target=lambda: results.append(pdf_extraction.extract_pdf_text(pdf_bytes, max_workers=4)))
+                for _ in range(3)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert results == [legacy_extract(pdf_bytes)] * 3
+            assert pool.executor._mp_context.get_start_method() != "fork"
+            assert len(pool.executor._processes) <= 2
+            assert list(tmp_path.iterdir()) == []
+        finally:
+            pool.shutdown()
+
+    @pytest.mark.parametrize("page_count,num_shards", [(10, 3), (3, 8), (1, 1)])
+    def test_split_shards_covers_all_pages(self, page_count, num_shards):
+        """Test shards are contiguous and cover the whole page range."""
+        shards = pdf_extraction._split_shards(page_count, num_shards)
+
+        assert shards[0][0] == 0
+        assert shards[-1][1] == page_count
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            assert end == start
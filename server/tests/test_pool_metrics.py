@@ -0,0 +1,198 @@
+"""
+Tests for pool configuration and pool metrics.
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database import pool_options, to_async_url
+from app.services.pool_metrics import (
+    PoolMetrics, TimedAsyncQueuePool, TimedNullPool, TimedQueuePool, instrument_engine, pool_metrics
+)
+
+
+@pytest.fixture
+def database_url():
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='pool_'), 'pool.db')}"
+
+
+@pytest.fixture
+def registry():
+    """Keep engines instrumented by a test out of the app's /metrics."""
+    names = set(pool_metrics)
+    yield pool_metrics
+    for name in set(pool_metrics) - names:
+        del pool_metrics[name]
+
+
+class TestPoolOptions:
+    """Tests for the DB_POOL_MODE settings."""
+
+    def test_queue_mode(self):
+        """Test queue mode sizes a timed QueuePool, async-adapted for async engines."""
+        options = pool_options(mode="queue")
+
+        assert options["poolclass"] is TimedQueuePool
+        assert {"pool_size", "max_overflow", "pool_timeout", "pool_recycle"} <= set(options)
+        assert pool_options(is_async=True, mode="queue")["poolclass"] is TimedAsyncQueuePool
+
+    def test_null_mode(self):
+        """Test null mode has no pool sizing, leaving pooling to pgbouncer."""
+        options = pool_options(mode="null")
+
+        assert options["poolclass"] is TimedNullPool
+        assert "pool_size" not in options
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError):
+            pool_options(mode="static")
+
+
+class TestPoolMetrics:
+    """Tests for checkout timing and connection tracking."""
+
+    def test_histogram_buckets(self):
+        """Test waits land in the first bucket whose bound they do not exceed."""
+        metrics = PoolMetrics("test", slow_checkout_ms=10_000)
+        metrics.record_checkout(0.0005)
+        metrics.record_checkout(0.004)
+        metrics.record_checkout(60)
+
+        stats = metrics.stats()
+        buckets = stats["checkout_wait_ms"]["buckets"]
+        assert buckets["le_1ms"] == 1
+        assert buckets["le_5ms"] == 1
+        assert buckets["inf"] == 1
+        assert stats["checkouts"] == 3
+        assert stats["checkout_wait_ms"]["max"] == 60_000
+
+    def test_counts_checkouts_and_connections(self, database_url, registry):
+        """Test checkouts, checked-out count and open connection age on a QueuePool."""
+        engine = create_engine(database_url, poolclass=TimedQueuePool, pool_size=2)
+        metrics = instrument_engine(engine, "test_queue")
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                assert metrics.stats()["pool"]["checkedout"] == 1
+
+            stats = registry["test_queue"].stats()
+            assert stats["checkouts"] == 1
+            assert stats["pool"]["checkedout"] == 0
+            assert stats["connections"]["open"] == 1
+            assert stats["connections"]["max_age_seconds"] >= 0
+        finally:
+            engine.dispose()
+        assert metrics.stats()["connections"]["closed"] == 1
+
+    def test_slow_and_failed_checkouts_are_logged(self, database_url, registry, capsys):
+        """Test a caller blocked on an exhausted pool is counted and logged, including a timeout."""
+        engine = create_engine(database_url, poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.3)
+        metrics = instrument_engine(engine, "test_exhausted", slow_checkout_ms=50)
+        held = engine.connect()
+        released = threading.Timer(0.15, held.close)
+        try:
+            released.start()
+            with engine.connect():
+                pass
+            held = engine.connect()
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        finally:
+            released.cancel()
+            held.close()
+            engine.dispose()
+
+        stats = metrics.stats()
+        assert stats["slow_checkouts"] == 2
+        assert stats["failed_checkouts"] == 1
+        assert stats["checkout_wait_ms"]["max"] >= 300
+        assert capsys.readouterr().out.count("Slow database checkout on 'test_exhausted' pool") == 2
+
+    def test_null_pool_closes_on_checkin(self, database_url, registry):
+        """Test NullPool checkouts are timed and leave no open connections."""
+        engine = create_engine(database_url, **pool_options(mode="null"))
+        metrics = instrument_engine(engine, "test_null")
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+
+        stats = metrics.stats()
+        assert stats["checkouts"] == 3
+        assert stats["connections"]["open"] == 0
+        assert stats["connections"]["opened"] == stats["connections"]["closed"] == 3
+        assert "checkedout" not in stats["pool"]
+        engine.dispose()
+
+    def test_connect_time_is_not_checkout_wait(self, database_url, registry, capsys):
+        """Test opening a connection on every NullPool checkout is reported as connect time, not as a slow checkout."""
+        engine = create_engine(database_url, **pool_options(mode="null"))
+        metrics = instrument_engine(engine, "test_slow_connect", slow_checkout_ms=50)
+
+        @event.listens_for(engine, "connect", insert=True)
+        def slow_server(dbapi_connection, connection_record):
+            time.sleep(0.1)
+
+        for _ in range(2):
+            with engine.connect():
+                pass
+        engine.dispose()
+
+        stats = metrics.stats()
+        assert stats["connect_ms"]["count"] == 2
+        assert stats["connect_ms"]["mean"] >= 100
+        assert stats["checkout_wait_ms"]["max"] < 50
+        assert stats["slow_checkouts"] == 0
+        assert "Slow database checkout" not in capsys.readouterr().out
+
+    def test_async_engine(self, database_url, registry):
+        """Test an async engine's checkouts are timed too, and dispose keeps the metrics."""
+        engine = create_async_engine(to_async_url(database_url), poolclass=TimedAsyncQueuePool)
+        metrics = instrument_engine(engine, "test_async")
+
+        async def query():
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        async def scenario():
+            await query()
+            await engine.dispose()
+            await query()
+            await engine.dispose()
+
+        asyncio.run(scenario())
+        assert metrics.stats()["checkouts"] == 2
+        assert metrics.pool is engine.sync_engine.pool
+
+
+class TestMetricsEndpoint:
+    """Tests for pool metrics on /metrics."""
+
+    def test_pools_are_exported(self, client, metrics_headers):
+        response = client.get("/metrics", headers=metrics_headers)
+
+        pools = response.json()["db_pools"]
+        assert "primary" in pools
+        assert "checkout_wait_ms" in pools["primary"]
+
+
+class TestMetricsAccess:
+    """Tests for access to the internal /metrics endpoint."""
+
+    def test_token_required(self, authenticated_client):
+        """Test a signed-in user without the metrics token is refused."""
+        assert authenticated_client.get("/metrics").status_code == 401
+        assert authenticated_client.get("/metrics", headers={"X-Metrics-Token": "wrong"}).status_code == 401
+
+    def test_disabled_without_token_setting(self, client, metrics_headers, monkeypatch):
+        from app import main
+
+        monkeypatch.setattr(main, "METRICS_TOKEN", None)
+
+        assert client.get("/metrics", headers=metrics_headers).status_code == 404
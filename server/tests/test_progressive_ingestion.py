@@ -0,0 +1,234 @@
+"""
+Tests for progressive ingestion of large PDFs.
+"""
+from io import BytesIO
+from unittest.mock import patch
+from fastapi import status
+
+from app.routers import materials as materials_router
+from app.services import progressive_ingestion
+from app.services.progressive_ingestion import notify_at_token_budget, stream_pdf_pages
+from benchmarks.synthetic_pdf import build_pdf, textbook_pages
+
+
+def numbered_pages(count: int, chars: int = 400):
+    return [(i, f"Page {i} " + "x" * chars) for i in range(count)]
+
+
+class TestNotifyAtTokenBudget:
+    """Tests for the token budget pipeline stage."""
+
+    def test_notifies_once_with_leading_pages(self):
+        """Test the callback gets the leading pages once the budget is reached."""
+        calls = []
+
+        pages = list(notify_at_token_budget(numbered_pages(10), token_budget=250, on_budget=calls.append))
+
+        assert pages == numbered_pages(10)
+        assert len(calls) == 1
+        assert "Page 0" in calls[0] and "Page 2" in calls[0]
+        assert "Page 3" not in calls[0]
+
+    def test_small_documents_do_not_notify(self):
+        """Test documents below the budget skip the preliminary stage."""
+        calls = []
+
+        list(notify_at_token_budget(numbered_pages(2), token_budget=10_000, on_budget=calls.append))
+
+        assert calls == []
+
+    def test_notifies_before_later_pages_are_read(self):
+        """Test the callback runs while later pages are still pending."""
+        seen = []
+
+        def pages():
+            for page in numbered_pages(10):
+                seen.append(page[0])
+                yield page
+
+        def on_budget(text):
+            assert seen == [0, 1, 2]
+
+        list(notify_at_token_budget(pages(), token_budget=250, on_budget=on_budget))
+
+
+class TestStreamPdfPages:
+    """Tests for streaming extraction through the cache."""
+
+    def test_caches_complete_extraction(self):
+        """Test a fully streamed PDF is cached and replayed on the next call."""
+        pdf_bytes = build_pdf(["First page", None, "Third page"])
+
+        page_count, pages = stream_pdf_pages(pdf_bytes, "digest-1")
+        first = list(pages)
+
+        with patch.object(progressive_ingestion, "iter_pdf_pages") as mock_iter:
+            cached_count, cached_pages = stream_pdf_pages(pdf_bytes, "digest-1")
+            assert list(cached_pages) == first
+            mock_iter.assert_not_called()
+
+        assert page_count == cached_count == 3
+        assert [page_num for page_num, _ in first] == [0, 2]
+
+
+class TestProgressiveUpload:
+    """Tests for the progressive upload path."""
+
+    @patch('app.routers.materials.PROGRESSIVE_TOKEN_BUDGET', 500)
+    @patch('app.routers.materials.PROGRESSIVE_INGESTION_MIN_PAGES', 5)
+    @patch('app.routers.materials.gemini_service')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_large_pdf_is_ingested_progressively(self, mock_storage, mock_gemini, authenticated_client, db_session, monkeypatch):
+        """Test a preliminary summary is built from the leading pages and refined afterwards."""
+        from app import database, models
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+        mock_storage.upload_file.return_value = "https://example.com/textbook.pdf"
+        mock_gemini.is_configured.return_value = True
+        mock_gemini.generate_summary.side_effect = lambda content, max_length=300: f"Summary of {len(content)} characters"
+        mock_gemini.extract_concepts.return_value = ["Gradient descent"]
+        mock_gemini.generate_quiz.return_value = [{"question": "What is entropy?"}]
+
+        stored = {}
+        original = materials_router.preliminary_llm_background
+
+        def record_preliminary(material_id, content, abandoned=None):
+            original(material_id, content, abandoned)
+            session = TestingSessionLocal()
+            stored["preliminary"] = session.query(models.GeneratedData).filter(
+                models.GeneratedData.material_id == material_id
+            ).one().is_preliminary
+            stored["status"] = session.get(models.Material, material_id).ingestion_status
+            session.close()
+
+        monkeypatch.setattr(materials_router, "preliminary_llm_background", record_preliminary)
+        pdf_content = build_pdf(textbook_pages(12, lines_per_page=10, blank_every=0))
+
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"file": ("textbook.pdf", BytesIO(pdf_content), "application/pdf")},
+            params={"title": "Textbook"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert result["ingestion_status"] == "extracting"
+        assert result["content"] == ""
+
+        # The preliminary result was stored while the material was still extracting
+        assert stored == {"preliminary": True, "status": "extracting"}
+        preliminary_content = mock_gemini.generate_summary.call_args_list[0].args[0]
+        refined_content = mock_gemini.generate_summary.call_args_list[1].args[0]
+        assert len(preliminary_content) < len(refined_content)
+
+        db_session.expire_all()
+        material = db_session.get(models.Material, result["id"])
+        assert material.ingestion_status == "complete"
+        assert material.file_url == "https://example.com/textbook.pdf"
+        assert len(material.pages) == 12
+        generated = db_session.query(models.GeneratedData).filter(
+            models.GeneratedData.material_id == material.id
+        ).all()
+        assert len(generated) == 1
+        assert generated[0].is_preliminary is False
+        assert generated[0].quiz_questions == [{"question": "What is entropy?"}]
+
+    @patch('app.routers.materials.PROGRESSIVE_INGESTION_MIN_PAGES', 5)
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_small_pdf_uses_direct_path(self, mock_storage, authenticated_client):
+        """Test PDFs below the page threshold are extracted before responding, opening the PDF once."""
+        from app.services import pdf_extraction
+
+        mock_storage.upload_file.return_value = "https://example.com/short.pdf"
+
+        with patch.object(pdf_extraction, "_open_reader", wraps=pdf_extraction._open_reader) as mock_open:
+            response = authenticated_client.post(
+                "/materials/upload-material",
+                files={"file": ("short.pdf", BytesIO(build_pdf(["Short page one", "Short page two"])), "application/pdf")},
+                params={"title": "Short"}
+            )
+
+        assert mock_open.call_count == 1
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["ingestion_status"] == "complete"
+        assert "Short page two" in response.json()["content"]
+
+    @patch('app.routers.materials.PROGRESSIVE_TOKEN_BUDGET', 500)
+    @patch('app.routers.materials.PROGRESSIVE_INGESTION_MIN_PAGES', 5)
+    @patch('app.routers.materials.gemini_service')
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_failed_ingestion_discards_preliminary_results(self, mock_storage, mock_gemini, authenticated_client, db_session, monkeypatch):
+        """Test preliminary results are not kept for a material whose ingestion failed."""
+        from app import database, models
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+        mock_storage.upload_file.side_effect = RuntimeError("storage unavailable")
+        mock_gemini.is_configured.return_value = True
+        mock_gemini.generate_summary.return_value = "Preliminary summary"
+        mock_gemini.extract_concepts.return_value = ["Gradient descent"]
+        pdf_content = build_pdf(textbook_pages(12, lines_per_page=10, blank_every=0))
+
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"file": ("textbook.pdf", BytesIO(pdf_content), "application/pdf")},
+            params={"title": "Textbook"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        db_session.expire_all()
+        assert db_session.get(models.Material, response.json()["id"]).ingestion_status == "failed"
+        assert db_session.query(models.GeneratedData).count() == 0
+
+    @patch('app.routers.materials.gemini_service')
+    def test_partial_refinement_keeps_preliminary_flag(self, mock_gemini, authenticated_client, db_session, monkeypatch):
+        """Test a refinement that fails for one artifact leaves the row marked preliminary."""
+        from app import database, models
+        from app.services.generated_data import upsert_generated_data_sync
+        from tests.conftest import TestingSessionLocal
+
+        monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+        user = db_session.query(models.User).first()
+        sample_material = models.Material(title="Textbook", content="Refined content", file_type="pdf", user_id=user.id)
+        db_session.add(sample_material)
+        db_session.commit()
+        upsert_generated_data_sync(
+            db_session, sample_material.id,
+            summary="Preliminary summary", key_concepts=["Preliminary"], is_preliminary=True
+        )
+        db_session.commit()
+        mock_gemini.is_configured.return_value = True
+        mock_gemini.generate_summary.side_effect = RuntimeError("model overloaded")
+        mock_gemini.extract_concepts.return_value = ["Refined"]
+        mock_gemini.generate_quiz.return_value = [{"question": "What is entropy?"}]
+
+        materials_router.auto_process_with_llm_background(sample_material.id, "Refined content " * 10, db_session=None)
+
+        db_session.expire_all()
+        generated = db_session.query(models.GeneratedData).filter(
+            models.GeneratedData.material_id == sample_material.id
+        ).one()
+        assert generated.summary == "Preliminary summary"
+        assert generated.key_concepts == ["Refined"]
+        assert generated.is_preliminary is True
+
+    @patch('app.routers.llm.gemini_service')
+    def test_llm_rejects_material_still_extracting(self, mock_gemini, authenticated_client, db_session):
+        """Test LLM endpoints return 409 until extraction has finished."""
+        from app import models
+
+        user = db_session.query(models.User).first()
+        material = models.Material(
+            title="Extracting",
+            content="",
+            file_type="pdf",
+            ingestion_status="extracting",
+            user_id=user.id
+        )
+        db_session.add(material)
+        db_session.commit()
+
+        response = authenticated_client.post(f"/llm/generate-summary/{material.id}")
+
+        assert response.status_code == status.HTTP_409_CONFLICT
@@ -0,0 +1,121 @@
+"""
+EXPLAIN QUERY PLAN tests proving the hot material queries use their indexes.
+"""
+import pytest
+from sqlalchemy import event, text
+
+from benchmarks.bench_history import seed_materials
+from tests.conftest import async_engine, engine
+
+
+@pytest.fixture
+def seeded_users(authenticated_client, db_session):
+    """Seed 1k materials for the authenticated user and 1k for another user."""
+    from app import models
+
+    user = db_session.query(models.User).first()
+    other = models.User(email="other@example.com", username="otheruser", hashed_password="x")
+    db_session.add(other)
+    db_session.commit()
+    seed_materials(db_session, other.id, 1000)
+    seed_materials(db_session, user.id, 1000)
+    db_session.execute(text("ANALYZE"))
+    return user
+
+
+def capture_selects(client, url):
+    """Run a request and return the (statement, parameters) of every SELECT it issued."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(url)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    return captured
+
+
+def query_plan(statement, parameters) -> str:
+    with engine.connect() as conn:
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+    return "\n".join(row[-1] for row in rows)
+
+
+def plan_for(captured, table: str) -> str:
+    statements = [(s, p) for s, p in captured if f"FROM {table}" in s]
+    assert statements, f"no query on {table}"
+    return query_plan(*statements[-1])
+
+
+class TestQueryPlans:
+    """Tests that history, listing and detail queries are served by indexes."""
+
+    def test_history_uses_user_uploaded_index(self, seeded_users, authenticated_client):
+        """Test get-history seeks by user and reads in index order without a sort."""
+        plan = plan_for(capture_selects(authenticated_client, "/materials/get-history"), "materials")
+
+        assert "ix_materials_user_id_uploaded_at" in plan
+        assert "TEMP B-TREE" not in plan
+        assert "ix_generated_data_material_id" in plan
+
+    def test_listing_uses_user_uploaded_index(self, seeded_users, authenticated_client):
+        """Test the keyset listing (first and later pages) avoids scans and sorts."""
+        first = capture_selects(authenticated_client, "/materials?limit=20")
+        plan = plan_for(first, "materials")
+        assert "ix_materials_user_id_uploaded_at" in plan
+        assert "TEMP B-TREE" not in plan
+
+        cursor = authenticated_client.get("/materials?limit=20").json()["next_cursor"]
+        plan = plan_for(capture_selects(authenticated_client, f"/materials?limit=20&cursor={cursor}"), "materials")
+        assert "ix_materials_user_id_uploaded_at" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_detail_uses_generated_data_index(self, seeded_users, authenticated_client, db_session):
+        """Test the detail route looks up generated data by the unique material_id index."""
+        from app import models
+
+        material_id = db_session.query(models.Material.id).filter(
+            models.Material.user_id == seeded_users.id
+        ).first()[0]
+
+        plan = plan_for(capture_selects(authenticated_client, f"/materials/{material_id}"), "generated_data")
+
+        assert "USING INDEX ix_generated_data_material_id (material_id=?)" in plan
+
+
+class TestConstraints:
+    """Tests for the one-row-per-material constraint and cascading deletes."""
+
+    def test_generated_data_is_unique_per_material(self, seeded_users, db_session):
+        """Test a second generated_data row for a material is rejected."""
+        from sqlalchemy.exc import IntegrityError
+        from app import models
+
+        material_id = db_session.query(models.GeneratedData.material_id).first()[0]
+        db_session.add(models.GeneratedData(material_id=material_id, summary="Duplicate"))
+
+        with pytest.raises(IntegrityError):
+            db_session.commit()
+        db_session.rollback()
+
+    def test_delete_cascades_to_children(self, authenticated_client, db_session):
+        """Test deleting a material removes its generated data and pages in the database."""
+        from app import models
+
+        user = db_session.query(models.User).first()
+        material = models.Material(title="Cascade", content="Text", file_type="pdf", user_id=user.id)
+        material.generated_data = models.GeneratedData(summary="Summary")
+        material.pages = [models.MaterialPage(page_no=1, text="Text", char_count=4, hash="0" * 64)]
+        db_session.add(material)
+        db_session.commit()
+
+        response = authenticated_client.delete(f"/materials/{material.id}")
+
+        assert response.status_code == 200
+        assert db_session.query(models.GeneratedData).count() == 0
+        assert db_session.query(models.MaterialPage).count() == 0
@@ -0,0 +1,177 @@
+"""
+Tests for the per-user LLM rate limits.
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import rate_limit
+from app.services.rate_limit import MemoryBucketBackend, RateLimiter, RedisBucketBackend, TOKEN_BUCKET_SCRIPT
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RedisStandIn:
+    """
+    Local stand-in for a Redis server running TOKEN_BUCKET_SCRIPT: keeps the
+    same hash fields and returns the same reply shape (strings for numbers).
+    """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.hashes = {}
+        self.calls = 0
+
+    async def eval(self, script, numkeys, *keys_and_args):
+        assert script == TOKEN_BUCKET_SCRIPT and numkeys == 1
+        self.calls += 1
+        key, capacity, rate, cost = keys_and_args[0], *map(float, keys_and_args[1:])
+        now = self.clock()
+        state = self.hashes.get(key, {})
+        tokens = float(state.get("tokens", capacity))
+        updated_at = float(state.get("updated_at", now))
+        tokens, allowed, retry_after = rate_limit._refill_and_take(tokens, updated_at, now, capacity, rate, cost)
+        self.hashes[key] = {"tokens": str(tokens), "updated_at": str(now)}
+        return [int(allowed), str(tokens), str(retry_after)]
+
+
+def check(limiter, user_id=1, cost=1.0, endpoint="generate_quiz"):
+    asyncio.run(limiter.check(user_id, endpoint, cost))
+
+
+class TestTokenBucket:
+    """Tests for the limiter with the in-process backend."""
+
+    def test_limits_after_capacity_and_refills(self):
+        clock = FakeClock()
+        limiter = RateLimiter(MemoryBucketBackend(clock), capacity=5, refill_per_minute=60, enabled=True)
+
+        for _ in range(5):
+            check(limiter)
+        with pytest.raises(HTTPException) as excinfo:
+            check(limiter, cost=2)
+
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.headers["Retry-After"] == "2"
+
+        clock.now += 2
+        check(limiter, cost=2)
+
+    def test_buckets_are_per_user(self):
+        limiter = RateLimiter(MemoryBucketBackend(FakeClock()), capacity=3, refill_per_minute=60, enabled=True)
+
+        check(limiter, user_id=1, cost=3)
+        check(limiter, user_id=2, cost=3)
+        with pytest.raises(HTTPException):
+            check(limiter, user_id=1)
+
+    def test_oversized_request_costs_whole_bucket(self):
+        limiter = RateLimiter(MemoryBucketBackend(FakeClock()), capacity=3, refill_per_minute=60, enabled=True)
+
+        check(limiter, cost=50)
+        with pytest.raises(HTTPException):
+            check(limiter)
+
+    def test_forgets_refilled_buckets_when_full(self):
+        clock = FakeClock()
+        backend = MemoryBucketBackend(clock, max_tracked=2)
+        limiter = RateLimiter(backend, capacity=3, refill_per_minute=60, enabled=True)
+
+        check(limiter, user_id=1)
+        check(limiter, user_id=2)
+        clock.now += 10
+        check(limiter, user_id=3)
+
+        assert list(backend._buckets) == ["user:3"]
+
+    def test_endpoint_costs_scale_with_request(self):
+        class FakeRequest:
+            def __init__(self, **params):
+                self.query_params = params
+
+        assert rate_limit.quiz_cost(FakeRequest(num_mcq="50")) > rate_limit.quiz_cost(FakeRequest())
+        assert rate_limit.summary_cost(FakeRequest(max_length="1000")) > rate_limit.summary_cost(FakeRequest())
+        assert rate_limit.analysis_cost(FakeRequest()) > rate_limit.quiz_cost(FakeRequest())
+
+
+class TestRedisBackend:
+    """Tests for the shared backend, against a local stand-in."""
+
+    def test_workers_share_buckets(self):
+        redis = RedisStandIn(FakeClock())
+        workers = [
+            RateLimiter(RedisBucketBackend(redis), capacity=4, refill_per_minute=60, enabled=True)
+            for _ in range(2)
+        ]
+
+        check(workers[0], cost=2)
+        check(workers[1], cost=2)
+        with pytest.raises(HTTPException) as excinfo:
+            check(workers[0], cost=1)
+
+        assert excinfo.value.headers["Retry-After"] == "1"
+        assert set(redis.hashes) == {"ratelimit:user:1"}
+
+    def test_backend_failure_allows_requests(self):
+        class BrokenRedis:
+            async def eval(self, *args):
+                raise ConnectionError("connection refused")
+
+        limiter = RateLimiter(RedisBucketBackend(BrokenRedis()), capacity=1, refill_per_minute=60, enabled=True)
+
+        check(limiter, cost=1)
+        check(limiter, cost=1)
+
+        assert limiter.stats()["backend_errors"] == 2
+
+
+@pytest.fixture
+def sample_material(authenticated_client):
+    with patch('app.routers.materials.auto_process_with_llm'):
+        response = authenticated_client.post("/materials/upload-text", json={
+            "title": "Rate limits",
+            "content": "Token buckets refill at a fixed rate and allow short bursts up to their capacity. " * 3
+        })
+    return response.json()
+
+
+class TestLlmEndpoints:
+    """Tests for the limits on the LLM routes."""
+
+    @patch('app.routers.llm.gemini_service')
+    def test_large_quizzes_are_limited(self, mock_service, authenticated_client, sample_material, monkeypatch, metrics_headers):
+        mock_service.generate_quiz.return_value = [{"type": "mcq", "question": "?"}]
+        monkeypatch.setattr(rate_limit.rate_limiter, "capacity", 10)
+        monkeypatch.setattr(rate_limit.rate_limiter, "enabled", True)
+        path = f"/llm/generate-quiz/{sample_material['id']}?num_mcq=50"
+
+        assert authenticated_client.post(path).status_code == 200
+        response = authenticated_client.post(path)
+
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+        assert mock_service.generate_quiz.call_count == 1
+
+        stats = authenticated_client.get("/metrics", headers=metrics_headers).json()["rate_limit"]["endpoints"]["generate_quiz"]
+        assert stats["allowed"] == 1 and stats["limited"] == 1
+    
+    @patch('app.routers.llm.gemini_service')
+    def test_rejected_requests_cost_nothing(self, mock_service, authenticated_client, sample_material, monkeypatch, metrics_headers):
+        mock_service.generate_quiz.return_value = [{"type": "mcq", "question": "?"}]
+        monkeypatch.setattr(rate_limit.rate_limiter, "capacity", 10)
+        monkeypatch.setattr(rate_limit.rate_limiter, "enabled", True)
+        
+        assert authenticated_client.post("/llm/generate-quiz/99999?num_mcq=500").status_code == 404
+        assert authenticated_client.post(f"/llm/generate-quiz/{sample_material['id']}?num_mcq=500").status_code == 400
+        assert authenticated_client.post(f"/llm/generate-quiz/{sample_material['id']}?num_mcq=40").status_code == 200
+        
+        stats = authenticated_client.get("/metrics", headers=metrics_headers).json()["rate_limit"]["endpoints"]["generate_quiz"]
+        assert stats == {"allowed": 1, "limited": 0, "cost_allowed": 5.5, "cost_limited": 0.0}
@@ -0,0 +1,132 @@
+"""
+Tests for routing read-only endpoints to a read replica, using a second
+SQLite database as the replica.
+"""
+import os
+import tempfile
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app import database, models
+from app.database import Base, PRIMARY_STICKY_COOKIE, to_async_url
+
+
+class Replica:
+    """A second database standing in for a streaming replica; replicate() catches it up."""
+
+    def __init__(self, primary_session):
+        self.primary = primary_session
+        self.url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='replica_'), 'replica.db')}"
+        self.engine = create_engine(self.url, connect_args={"check_same_thread": False})
+        self.async_engine = create_async_engine(to_async_url(self.url), poolclass=NullPool)
+        Base.metadata.create_all(bind=self.engine)
+        self.sessionmaker = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)
+
+    def replicate(self):
+        """Copy every row of the primary into the replica."""
+        with self.engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+            for table in Base.metadata.sorted_tables:
+                rows = [dict(row._mapping) for row in self.primary.execute(select(table))]
+                if rows:
+                    conn.execute(insert(table), rows)
+
+    def execute(self, statement):
+        with self.engine.begin() as conn:
+            return conn.execute(statement)
+
+
+@pytest.fixture
+def replica(authenticated_client, db_session, monkeypatch):
+    """Configure a replica (caught up with the primary) and clear the login's sticky window."""
+    replica = Replica(db_session)
+    replica.replicate()
+    monkeypatch.setattr(database, "AsyncReadSessionLocal", replica.sessionmaker)
+    authenticated_client.cookies.delete(PRIMARY_STICKY_COOKIE)
+    database.recent_writers.clear()
+    yield replica
+    replica.engine.dispose()
+
+
+def upload(client, title):
+    with patch('app.routers.materials.auto_process_with_llm_background'):
+        response = client.post("/materials/upload-text", json={
+            "title": title,
+            "content": "Replication lag is the delay before a replica sees a write on the primary."
+        })
+    assert response.status_code == status.HTTP_200_OK
+    return response
+
+
+class TestReadReplica:
+    """Tests for get_read_db routing and read-your-writes stickiness."""
+
+    def test_reads_are_served_by_the_replica(self, authenticated_client, replica):
+        """Test history, detail and /auth/me read from the replica."""
+        user_id = replica.execute(select(models.User.id)).scalar()
+        replica.execute(insert(models.Material).values(
+            id=500, title="Only on replica", content="Text", file_type="text", user_id=user_id
+        ))
+        replica.execute(models.User.__table__.update().values(username="replica-name"))
+
+        history = authenticated_client.get("/materials/get-history").json()
+        assert [item["material"]["title"] for item in history] == ["Only on replica"]
+        assert authenticated_client.get("/materials/500").status_code == status.HTTP_200_OK
+        assert authenticated_client.get("/auth/me").json()["username"] == "replica-name"
+
+    def test_writes_go_to_the_primary(self, authenticated_client, replica, db_session):
+        """Test a write lands on the primary and not on the replica."""
+        upload(authenticated_client, "Written")
+
+        assert db_session.query(models.Material).filter_by(title="Written").count() == 1
+        assert replica.execute(select(models.Material.title)).scalars().all() == []
+
+    def test_reads_stick_to_primary_after_a_write(self, authenticated_client, replica):
+        """Test the writer sees its own write before the replica has it."""
+        response = upload(authenticated_client, "Fresh upload")
+        assert PRIMARY_STICKY_COOKIE in response.cookies
+
+        history = authenticated_client.get("/materials/get-history").json()
+        assert [item["material"]["title"] for item in history] == ["Fresh upload"]
+
+    def test_reads_stick_to_primary_without_the_cookie(self, authenticated_client, replica):
+        """Test the window follows the user when the browser does not send the cookie back (cross-site frontend)."""
+        upload(authenticated_client, "Fresh upload")
+        authenticated_client.cookies.delete(PRIMARY_STICKY_COOKIE)
+
+        history = authenticated_client.get("/materials/get-history").json()
+        assert [item["material"]["title"] for item in history] == ["Fresh upload"]
+
+    def test_reads_return_to_replica_after_the_window(self, authenticated_client, replica):
+        """Test reads go back to the replica once the sticky window has passed."""
+        upload(authenticated_client, "Fresh upload")
+        # A cookie whose deadline has passed (browsers also drop it after max_age),
+        # and a user window that has expired
+        authenticated_client.cookies.set(PRIMARY_STICKY_COOKIE, str(time.time() - 1))
+        database.recent_writers.clear()
+
+        assert authenticated_client.get("/materials/get-history").json() == []
+
+        replica.replicate()
+        history = authenticated_client.get("/materials/get-history").json()
+        assert [item["material"]["title"] for item in history] == ["Fresh upload"]
+
+    def test_failed_writes_do_not_pin_reads(self, authenticated_client, replica):
+        """Test a rejected write does not move reads to the primary."""
+        response = authenticated_client.post("/materials/upload-text", json={"title": "Empty", "content": " "})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert PRIMARY_STICKY_COOKIE not in response.cookies
+
+    def test_no_sticky_cookie_without_replica(self, authenticated_client):
+        """Test writes do not set the sticky cookie when no replica is configured."""
+        response = upload(authenticated_client, "Primary only")
+
+        assert PRIMARY_STICKY_COOKIE not in response.cookies
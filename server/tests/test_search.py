@@ -0,0 +1,201 @@
+"""
+Tests for full-text search over materials (FTS5 on the SQLite test database).
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from fastapi import status
+from sqlalchemy.dialects import postgresql
+
+from app import models
+from app.services.generated_data import upsert_generated_data_sync
+from app.services.material_search import fts_query, search_statement
+
+
+def upload(client, title, content):
+    with patch('app.routers.materials.auto_process_with_llm_background'):
+        response = client.post("/materials/upload-text", json={"title": title, "content": content})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()["id"]
+
+
+def search(client, q, **params):
+    response = client.get("/materials/search", params={"q": q, **params})
+    assert response.status_code == status.HTTP_200_OK
+    return response.json()
+
+
+PADDING = " The rest of this text only pads the material past the minimum length."
+
+
+class TestSearchEndpoint:
+    """Tests for GET /materials/search."""
+
+    def test_matches_content_with_stemming(self, authenticated_client):
+        """Test content matches another form of the same word and unrelated materials are left out."""
+        upload(authenticated_client, "Optimisation", "Gradient descent is learning by small steps." + PADDING)
+        upload(authenticated_client, "Thermodynamics", "Entropy never decreases in an isolated system." + PADDING)
+
+        result = search(authenticated_client, "learn")
+
+        assert [item["title"] for item in result["items"]] == ["Optimisation"]
+        assert result["next_offset"] is None
+
+    def test_all_words_must_match(self, authenticated_client):
+        upload(authenticated_client, "Optimisation", "Gradient descent is learning by small steps." + PADDING)
+
+        assert search(authenticated_client, "gradient entropy")["items"] == []
+
+    def test_snippet_is_highlighted_and_escaped(self, authenticated_client):
+        """Test matches are wrapped in <mark> and the stored text cannot inject markup."""
+        upload(authenticated_client, "Markup", "Use <script>alert(1)</script> to discuss entropy safely." + PADDING)
+
+        snippet = search(authenticated_client, "entropy")["items"][0]["snippet"]
+
+        assert "<mark>entropy</mark>" in snippet
+        assert "&lt;script&gt;" in snippet
+        assert "<script>" not in snippet
+
+    def test_generated_summary_and_concepts_are_searchable(self, authenticated_client, db_session):
+        """Test summaries and concepts written by the LLM upsert are indexed, and title matches rank first."""
+        first = upload(authenticated_client, "Lecture 1", "Notes from the first lecture of the term." + PADDING)
+        upload(authenticated_client, "Backpropagation", "Notes from the second lecture of the term." + PADDING)
+
+        upsert_generated_data_sync(db_session, first, summary="An introduction to backpropagation.", key_concepts=["Chain rule"])
+        db_session.commit()
+
+        assert [item["title"] for item in search(authenticated_client, "backpropagation")["items"]] == [
+            "Backpropagation", "Lecture 1"
+        ]
+        assert [item["id"] for item in search(authenticated_client, "chain rule")["items"]] == [first]
+
+    def test_only_own_materials(self, authenticated_client, db_session):
+        """Test other users' materials never appear in results."""
+        other = models.User(email="other@example.com", username="other", hashed_password="x")
+        db_session.add(other)
+        db_session.commit()
+        db_session.add(models.Material(title="Entropy", content="Entropy" + PADDING, file_type="text", user_id=other.id))
+        db_session.commit()
+
+        assert search(authenticated_client, "entropy")["items"] == []
+
+    def test_pagination(self, authenticated_client):
+        """Test pages follow each other through next_offset without repeats."""
+        for i in range(5):
+            upload(authenticated_client, f"Entropy {i}", "Entropy notes." + PADDING)
+
+        first = search(authenticated_client, "entropy", limit=3)
+        second = search(authenticated_client, "entropy", limit=3, offset=first["next_offset"])
+
+        assert first["next_offset"] == 3
+        assert second["next_offset"] is None
+        ids = [item["id"] for item in first["items"] + second["items"]]
+        assert len(set(ids)) == 5
+
+    def test_updated_and_deleted_materials(self, authenticated_client, db_session):
+        """Test content changes are re-indexed and deleted materials drop out."""
+        material_id = upload(authenticated_client, "Draft", "Placeholder text." + PADDING)
+        material = db_session.get(models.Material, material_id)
+        material.content = "Entropy notes." + PADDING
+        db_session.commit()
+
+        assert [item["id"] for item in search(authenticated_client, "entropy")["items"]] == [material_id]
+        assert search(authenticated_client, "placeholder")["items"] == []
+
+        authenticated_client.delete(f"/materials/{material_id}")
+        assert search(authenticated_client, "entropy")["items"] == []
+
+    def test_reindex_uses_written_values(self, authenticated_client, db_session):
+        """Test a write re-indexes from the loaded title and content, reading content back only when it is not loaded."""
+        from sqlalchemy.orm import defer
+        from benchmarks.bench_history import count_queries
+        from tests.conftest import engine
+
+        material_id = upload(authenticated_client, "Draft", "Thermodynamics notes." + PADDING)
+        material = db_session.get(models.Material, material_id)
+        with count_queries(engine) as statements:
+            material.title = "Entropy chapter"
+            db_session.commit()
+
+        assert not [statement for statement in statements if statement.startswith("SELECT") and "materials.content" in statement]
+        assert [item["id"] for item in search(authenticated_client, "entropy thermodynamics")["items"]] == [material_id]
+
+        db_session.expunge_all()
+        material = db_session.get(models.Material, material_id, options=[defer(models.Material.content)])
+        material.title = "Enthalpy chapter"
+        db_session.commit()
+
+        assert [item["id"] for item in search(authenticated_client, "enthalpy thermodynamics")["items"]] == [material_id]
+
+    def test_query_without_words(self, authenticated_client):
+        """Test punctuation-only queries are rejected rather than passed to the search syntax."""
+        response = authenticated_client.get("/materials/search", params={"q": '"*) -'})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, client):
+        response = client.get("/materials/search", params={"q": "entropy"})
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+class TestSearchStatements:
+    """Tests for the generated search SQL."""
+
+    def test_fts_query_quotes_words(self):
+        assert fts_query('entropy OR "heat* -death') == '"entropy" "OR" "heat" "death"'
+
+    def test_postgres_statement(self):
+        """Test Postgres matches and ranks with the tsvector column."""
+        sql = str(search_statement("postgresql", 1, "entropy").compile(dialect=postgresql.dialect()))
+
+        assert "materials.search_vector @@ websearch_to_tsquery" in sql
+        assert "ts_rank_cd(materials.search_vector" in sql
+
+    def test_postgres_snippets_use_bounded_source(self, monkeypatch):
+        """Test headlines are built from a capped prefix of the stored content, not the whole document."""
+        from app.services import material_search
+        from app.services.text_compression import compress_text
+
+        monkeypatch.setattr(material_search, "SEARCH_SNIPPET_MAX_CHARS", 50)
+        statements = []
+
+        class Result:
+            def __init__(self, rows):
+                self.rows = rows
+
+            def all(self):
+                return self.rows
+
+        class FakeSession:
+            async def execute(self, statement):
+                statements.append(statement)
+                if len(statements) == 1:
+                    prefix = compress_text("entropy " * 10000, min_bytes=0)[:201]
+                    return Result([SimpleNamespace(id=1, content_prefix=prefix, summary=None)])
+                return Result([(1, "headline")])
+
+        snippets = asyncio.run(material_search._postgres_snippets(FakeSession(), "entropy", [1]))
+
+        fetch = str(statements[0].compile(dialect=postgresql.dialect()))
+        documents = statements[1].get_final_froms()[0]
+        assert snippets == {1: "headline"}
+        assert "substr(materials.content" in fetch and "substr(generated_data.summary" in fetch
+        assert [len(doc) for _, doc in documents._data[0]] == [50]
+
+
+class TestReindexScript:
+    """Tests for indexing materials written without the ORM."""
+
+    def test_reindexes_bulk_inserted_materials(self, authenticated_client, db_session):
+        from benchmarks.bench_history import seed_materials
+        from scripts.reindex_search import reindex
+
+        user = db_session.query(models.User).first()
+        seed_materials(db_session, user.id, 3)
+        assert search(authenticated_client, "gradient")["items"] == []
+
+        assert reindex(db_session, batch_size=2) == 3
+        assert reindex(db_session, batch_size=2) == 0
+        assert len(search(authenticated_client, "gradient")["items"]) == 3
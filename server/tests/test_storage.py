@@ -0,0 +1,220 @@
+"""
+Tests for the async storage service, against a local storage stand-in.
+"""
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.services import supabase_storage as storage_module
+from app.services.supabase_storage import SupabaseStorageService
+from app.services.ttl_cache import TTLCache
+from benchmarks.storage_stand_in import create_storage_app, stand_in_storage
+
+
+@pytest.fixture
+def server():
+    return create_storage_app()
+
+
+@pytest.fixture
+def storage(server):
+    return stand_in_storage(server)
+
+
+class TestStorageService:
+    """Tests for the storage methods."""
+
+    def test_upload_bytes_and_stream(self, server, storage, tmp_path):
+        path = tmp_path / "notes.pdf"
+        path.write_bytes(b"%PDF streamed")
+
+        async def upload_both():
+            with open(path, "rb") as stream:
+                streamed = await storage.upload_file(stream, "notes.pdf", "application/pdf", user_id=3)
+            in_memory = await storage.upload_file(b"%PDF bytes", "notes.pdf", "application/pdf", user_id=3)
+            await storage.aclose()
+            return streamed, in_memory
+
+        streamed, in_memory = asyncio.run(upload_both())
+
+        assert streamed.startswith(f"{storage.storage_url}/user_3/") and streamed.endswith(".pdf")
+        stored = {url: server.state.objects[("bucket", url.replace(f"{storage.storage_url}/", ""))] for url in (streamed, in_memory)}
+        assert stored == {streamed: b"%PDF streamed", in_memory: b"%PDF bytes"}
+
+    def test_upload_error_raises(self, storage):
+        storage.supabase_service_role_key = "wrong-key"
+
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(storage.upload_file(b"x", "a.pdf", "application/pdf", user_id=1))
+
+        assert excinfo.value.status_code == 500
+        assert "401" in excinfo.value.detail
+
+    def test_timeout_raises(self):
+        def timeout(request):
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        storage = stand_in_storage(None, transport=httpx.MockTransport(timeout))
+
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(storage.upload_file(b"x", "a.pdf", "application/pdf", user_id=1))
+
+        assert excinfo.value.status_code == 500
+        assert "timed out" in excinfo.value.detail
+
+    def test_unconfigured_upload_is_503(self, monkeypatch):
+        for name in ("SUPABASE_URL", "SUPABASE_STORAGE_URL"):
+            monkeypatch.delenv(name, raising=False)
+
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(SupabaseStorageService().upload_file(b"x", "a.pdf", "application/pdf", user_id=1))
+
+        assert excinfo.value.status_code == 503
+
+    def test_presigned_url(self, server, storage):
+        server.state.objects[("bucket", "user_1/a.pdf")] = b"a"
+
+        signed = asyncio.run(storage.generate_presigned_url(f"{storage.storage_url}/user_1/a.pdf"))
+        missing = asyncio.run(storage.generate_presigned_url(f"{storage.storage_url}/user_1/missing.pdf"))
+
+        assert signed.startswith(f"{storage.api_url}/object/sign/bucket/user_1/a.pdf?token=")
+        assert missing == f"{storage.storage_url}/user_1/missing.pdf"
+
+    def test_concurrent_uploads_overlap(self):
+        """Test uploads share the client concurrently: 20 uploads take about one round trip, not 20."""
+        latency = 0.1
+        server = create_storage_app(latency=latency)
+        storage = stand_in_storage(server)
+
+        async def upload_many():
+            uploads = [storage.upload_file(b"x" * 1024, f"{i}.pdf", "application/pdf", user_id=1) for i in range(20)]
+            start = time.perf_counter()
+            urls = await asyncio.gather(*uploads)
+            return urls, time.perf_counter() - start
+
+        urls, elapsed = asyncio.run(upload_many())
+
+        assert len(set(urls)) == 20 and len(server.state.objects) == 20
+        assert server.state.max_in_flight == 20
+        assert elapsed < 5 * latency
+
+    def test_run_storage_sync_from_worker_thread(self, server, storage, monkeypatch):
+        """Test a worker thread runs storage calls on the loop that owns the client."""
+        monkeypatch.setattr(storage_module, "supabase_storage", storage)
+        server.state.objects[("bucket", "a.pdf")] = b"a"
+        results = {}
+
+        async def app_loop():
+            await storage.open()
+            worker = threading.Thread(target=lambda: results.update(
+                deleted=storage_module.run_storage_sync(storage.delete_file(f"{storage.storage_url}/a.pdf")),
+                thread_loop=storage.loop
+            ))
+            worker.start()
+            while worker.is_alive():
+                await asyncio.sleep(0.01)
+            results["app_loop"] = asyncio.get_running_loop()
+            await storage.aclose()
+
+        asyncio.run(app_loop())
+
+        assert results["deleted"] is True
+        assert results["thread_loop"] is results["app_loop"]
+        assert server.state.objects == {}
+
+    def test_run_storage_sync_without_app_loop_leaves_shared_client(self, monkeypatch):
+        """Test threads without an app loop each use a short-lived client and leave the shared one open."""
+        server = create_storage_app(latency=0.05)
+        storage = stand_in_storage(server)
+        monkeypatch.setattr(storage_module, "supabase_storage", storage)
+        shared_client = httpx.AsyncClient()
+        storage._http_client = shared_client
+        urls = []
+
+        def upload(i):
+            urls.append(storage_module.run_storage_sync(storage.upload_file(b"x", f"{i}.pdf", "application/pdf", user_id=1)))
+
+        workers = [threading.Thread(target=upload, args=(i,)) for i in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert len(set(urls)) == 4 and len(server.state.objects) == 4
+        assert storage._http_client is shared_client and not shared_client.is_closed
+        assert storage.loop is None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSignedUrlCache:
+    """Tests for reusing signed URLs."""
+
+    @pytest.fixture
+    def clock(self, storage, monkeypatch):
+        clock = FakeClock()
+        monkeypatch.setattr(storage_module, "SIGNED_URL_MIN_REMAINING_SECONDS", 600)
+        storage.signed_url_cache = TTLCache(100, storage_module.SIGNED_URL_CACHE_MAX_TTL_SECONDS, clock=clock)
+        return clock
+
+    def test_reuses_url_until_too_little_lifetime_left(self, server, storage, clock):
+        server.state.objects[("bucket", "a.pdf")] = b"a"
+        url = f"{storage.storage_url}/a.pdf"
+
+        first = asyncio.run(storage.generate_presigned_url(url))
+        clock.now += 2999
+        again = asyncio.run(storage.generate_presigned_url(url))
+        longer = asyncio.run(storage.generate_presigned_url(url, expiration=7200))
+        clock.now += 1
+        renewed = asyncio.run(storage.generate_presigned_url(url))
+
+        assert again == first and longer != first and renewed not in (first, longer)
+        assert server.state.requests == 3
+
+    def test_failed_signing_is_not_cached(self, server, storage, clock):
+        url = f"{storage.storage_url}/a.pdf"
+
+        assert asyncio.run(storage.generate_presigned_url(url)) == url
+        server.state.objects[("bucket", "a.pdf")] = b"a"
+
+        assert asyncio.run(storage.generate_presigned_url(url)).startswith(f"{storage.api_url}/object/sign/")
+
+    def test_delete_invalidates_cached_urls(self, server, storage, clock):
+        server.state.objects[("bucket", "a.pdf")] = b"a"
+        url = f"{storage.storage_url}/a.pdf"
+
+        async def sign_delete_sign():
+            for expiration in (3600, 7200):
+                await storage.generate_presigned_url(url, expiration=expiration)
+            await storage.delete_file(url)
+            return await storage.generate_presigned_url(url)
+
+        assert asyncio.run(sign_delete_sign()) == url
+        assert len(storage.signed_url_cache) == 0
+
+    def test_batch_signs_misses_in_one_request(self, server, storage, clock):
+        for name in ("a.pdf", "b.pdf", "c.pdf"):
+            server.state.objects[("bucket", name)] = name.encode()
+        urls = [f"{storage.storage_url}/{name}" for name in ("a.pdf", "b.pdf", "c.pdf", "missing.pdf")] + ["https://elsewhere/d.pdf"]
+
+        cached = asyncio.run(storage.generate_presigned_url(urls[0]))
+        signed = asyncio.run(storage.generate_presigned_urls(urls))
+        requests = server.state.requests
+        again = asyncio.run(storage.generate_presigned_urls(urls[:3]))
+
+        assert requests == 2
+        assert signed[urls[0]] == cached
+        assert signed[urls[1]].startswith(f"{storage.api_url}/object/sign/bucket/b.pdf?token=")
+        assert signed[urls[3]] == urls[3] and signed[urls[4]] == urls[4]
+        assert again == {url: signed[url] for url in urls[:3]}
+        assert server.state.requests == requests
@@ -0,0 +1,136 @@
+"""
+Tests for compressed text columns and the background compression job.
+"""
+import pytest
+from sqlalchemy import text
+
+from app.services import text_compression
+from app.services.text_compression import (
+    FORMAT_RAW,
+    FORMAT_ZLIB,
+    CompressionMetrics,
+    compress_text,
+    decompress_text,
+    decompress_text_prefix,
+)
+from scripts.compress_text_columns import compress_column
+
+
+LONG_TEXT = "Gradient descent updates the weights against the gradient of the loss. " * 200
+
+
+@pytest.fixture
+def metrics(monkeypatch):
+    fresh = CompressionMetrics()
+    monkeypatch.setattr(text_compression, "compression_metrics", fresh)
+    return fresh
+
+
+class TestCompressText:
+    """Tests for the header-byte encoding."""
+
+    def test_small_values_are_stored_raw(self, metrics):
+        """Test values under the threshold keep a raw header and round-trip."""
+        data = compress_text("Short note", min_bytes=1024)
+
+        assert data[0] == FORMAT_RAW
+        assert decompress_text(data) == "Short note"
+        assert metrics.stats()["compressed_values"] == 0
+
+    def test_large_values_are_compressed(self, metrics):
+        """Test values over the threshold are zlib-compressed and round-trip."""
+        data = compress_text(LONG_TEXT, min_bytes=1024)
+
+        assert data[0] == FORMAT_ZLIB
+        assert len(data) < len(LONG_TEXT) / 10
+        assert decompress_text(data) == LONG_TEXT
+
+        stats = metrics.stats()
+        assert stats["compressed_values"] == 1
+        assert stats["compression_ratio"] > 10
+        assert stats["decoded_values"] == 1
+
+    def test_unicode_round_trip(self):
+        """Test non-ASCII text survives compression."""
+        value = "Entropie – Ωmega – 学习 " * 100
+
+        assert decompress_text(compress_text(value, min_bytes=0)) == value
+
+    def test_unknown_header_is_rejected(self):
+        """Test a value with an unknown format byte raises instead of returning garbage."""
+        with pytest.raises(ValueError):
+            decompress_text(b"\x7fdata")
+
+    def test_prefix_of_truncated_values(self):
+        """Test a prefix decodes from the leading stored bytes only, compressed or raw."""
+        value = "Entropie – Ωmega – 学习 " * 100
+
+        for stored in (compress_text(value, min_bytes=0), compress_text(value, min_bytes=10 ** 9)):
+            assert decompress_text_prefix(stored[:200], 20) == value[:20]
+            assert decompress_text_prefix(stored, 10 ** 6) == value
+
+
+class TestCompressedColumns:
+    """Tests for the CompressedText columns on the models."""
+
+    def test_content_is_compressed_at_rest(self, db_session):
+        """Test material content is stored compressed and read back as text."""
+        from app import models
+
+        user = models.User(email="c@example.com", username="c", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        material = models.Material(title="Long", content=LONG_TEXT, file_type="text", user_id=user.id)
+        db_session.add(material)
+        db_session.commit()
+
+        stored = db_session.execute(text("SELECT content FROM materials WHERE id = :id"), {"id": material.id}).scalar()
+        assert stored[0] == FORMAT_ZLIB
+        assert len(stored) < len(LONG_TEXT) / 10
+
+        db_session.expire_all()
+        reloaded = db_session.get(models.Material, material.id)
+        assert reloaded.content == LONG_TEXT
+
+    def test_material_endpoint_returns_plain_content(self, authenticated_client):
+        """Test the API returns decompressed content."""
+        response = authenticated_client.post(
+            "/materials/upload-text",
+            json={"title": "Long", "content": LONG_TEXT}
+        )
+        assert response.status_code == 200
+
+        detail = authenticated_client.get(f"/materials/{response.json()['id']}")
+        assert detail.json()["material"]["content"] == LONG_TEXT
+
+
+class TestCompressionJob:
+    """Tests for the background job that compresses existing rows."""
+
+    def test_compresses_legacy_rows(self, db_session):
+        """Test raw rows left by migration 0007 are compressed and stay readable."""
+        from app import models
+
+        user = models.User(email="j@example.com", username="j", hashed_password="x")
+        db_session.add(user)
+        db_session.commit()
+        for i, content in enumerate([LONG_TEXT, "Short legacy row", LONG_TEXT]):
+            db_session.execute(
+                text("INSERT INTO materials (title, content, file_type, user_id) VALUES (:t, :c, 'text', :u)"),
+                {"t": f"Legacy {i}", "c": bytes([FORMAT_RAW]) + content.encode("utf-8"), "u": user.id}
+            )
+        db_session.commit()
+
+        counts = compress_column(db_session, models.Material, models.Material.__table__.c.content, batch_size=2)
+
+        assert counts == {"scanned": 3, "rewritten": 2}
+        stored = db_session.execute(text("SELECT content FROM materials ORDER BY id")).scalars().all()
+        assert [value[0] for value in stored] == [FORMAT_ZLIB, FORMAT_RAW, FORMAT_ZLIB]
+
+        db_session.expire_all()
+        contents = [m.content for m in db_session.query(models.Material).order_by(models.Material.id)]
+        assert contents == [LONG_TEXT, "Short legacy row", LONG_TEXT]
+
+        # A second run has nothing left to do
+        counts = compress_column(db_session, models.Material, models.Material.__table__.c.content)
+        assert counts == {"scanned": 3, "rewritten": 0}
@@ -0,0 +1,143 @@
+"""
+Tests for ingestion-time text normalization.
+"""
+from io import BytesIO
+from unittest.mock import patch
+from fastapi import status
+
+from app.services.pdf_extraction import join_pages, joined_length
+from app.services.text_normalization import collapse_whitespace, normalize_page, normalize_pages, find_boilerplate
+from benchmarks.synthetic_pdf import build_pdf, textbook_pages
+
+
+def page_with_boilerplate(page_num: int) -> str:
+    body = [f"Topic {page_num} line {line} explains mitosis and the cell cycle." for line in range(8)]
+    return "\n".join(
+        ["Intro to Biology   Chapter 2"]
+        + body[:4]
+        + ["The process of photo-", "synthesis converts light into energy."]
+        + body[4:]
+        + [f"Page {page_num + 1} of 5"]
+    )
+
+
+class TestNormalizePage:
+    """Tests for single-page normalization."""
+
+    def test_dehyphenates_line_breaks(self):
+        """Test words split across lines are joined."""
+        assert normalize_page("An exam-\nple sentence.") == "An example sentence."
+
+    def test_keeps_real_hyphens(self):
+        """Test hyphens before a capitalized line or within a line are kept."""
+        text = "Well-known result from 1990-\n2000 and the North-\nSouth divide."
+
+        assert normalize_page(text) == "Well-known result from 1990-\n2000 and the North-\nSouth divide."
+
+    def test_collapses_whitespace_and_blank_lines(self):
+        """Test runs of spaces and blank lines are collapsed."""
+        text = "\n\n  First   line\t here  \n\n\n\nSecond line\n\n"
+
+        assert normalize_page(text) == "First line here\n\nSecond line"
+
+    def test_drops_page_number_lines(self):
+        """Test bare page numbers at the page edges are removed."""
+        text = "Heading\nBody text that matters.\nMore body text.\n- 12 -"
+
+        assert normalize_page(text) == "Heading\nBody text that matters.\nMore body text."
+
+
+class TestCollapseWhitespace:
+    """Tests for the per-call collapse used on text uploads."""
+
+    def test_collapses_raw_text(self):
+        """Test space runs and blank line runs in raw text are collapsed."""
+        assert collapse_whitespace("  Notes\r\n\r\n\r\n\tStep   one \nStep two\n\n") == "Notes\n\nStep one\nStep two"
+
+    def test_leaves_normalized_pdf_text_unchanged(self):
+        """Test content normalized at ingestion is not changed again."""
+        pages, _ = normalize_pages([(i, page_with_boilerplate(i)) for i in range(5)])
+        content = join_pages(pages, 5)
+
+        assert collapse_whitespace(content) == content
+
+    def test_joined_length_matches_join(self):
+        """Test the raw size is computed without building the joined document."""
+        pages = [(0, "First"), (2, "Third  page"), (4, "Last")]
+
+        assert joined_length(pages, 5) == len(join_pages(pages, 5))
+        assert joined_length(pages, 7) == len(join_pages(pages, 7))
+
+
+class TestNormalizePages:
+    """Tests for cross-page boilerplate removal."""
+
+    def test_removes_repeated_headers_and_footers(self):
+        """Test running headers and numbered footers are removed from every page."""
+        pages = [(i, page_with_boilerplate(i)) for i in range(5)]
+
+        normalized, stats = normalize_pages(pages)
+
+        assert len(normalized) == 5
+        for _, text in normalized:
+            assert "Intro to Biology" not in text
+            assert "of 5" not in text
+            assert "photosynthesis converts light" in text
+        assert stats["boilerplate_lines"] == 2
+        assert stats["normalized_chars"] < stats["raw_chars"]
+        assert stats["tokens_saved"] > 0
+
+    def test_few_pages_keep_their_edges(self):
+        """Test boilerplate detection needs enough pages to be confident."""
+        pages = [(i, page_with_boilerplate(i)) for i in range(2)]
+
+        normalized, _ = normalize_pages(pages)
+
+        assert "Intro to Biology Chapter 2" in normalized[0][1]
+
+    def test_repeated_body_lines_are_kept(self):
+        """Test lines that also repeat inside page bodies are not treated as boilerplate."""
+        pages_lines = [text.splitlines() for text in textbook_pages(10, blank_every=0)]
+
+        assert find_boilerplate(pages_lines) == set()
+
+    def test_short_pages_keep_their_body(self):
+        """Test slide-like pages are not removed wholesale."""
+        pages = [(i, f"Slide {i} covers enzyme kinetics.\nRates depend on substrate.") for i in range(5)]
+
+        normalized, _ = normalize_pages(pages)
+
+        assert [text for _, text in normalized] == [
+            f"Slide {i} covers enzyme kinetics.\nRates depend on substrate." for i in range(5)
+        ]
+
+
+class TestUploadNormalization:
+    """Tests for normalization in the PDF upload path."""
+
+    @patch('app.routers.materials.supabase_storage', autospec=True)
+    def test_upload_stores_normalized_text(self, mock_storage, authenticated_client, db_session):
+        """Test uploads store normalized content, pages and both sizes."""
+        from app import models
+
+        mock_storage.upload_file.return_value = "https://example.com/biology.pdf"
+        pdf_content = build_pdf([page_with_boilerplate(i) for i in range(5)])
+
+        response = authenticated_client.post(
+            "/materials/upload-material",
+            files={"file": ("biology.pdf", BytesIO(pdf_content), "application/pdf")},
+            params={"title": "Biology"}
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        result = response.json()
+        assert "Intro to Biology" not in result["content"]
+        assert "photosynthesis" in result["content"]
+        assert result["char_count"] == len(result["content"])
+        assert result["raw_char_count"] > result["char_count"]
+        assert result["tokens_saved"] > 0
+
+        page = db_session.query(models.MaterialPage).filter(
+            models.MaterialPage.material_id == result["id"]
+        ).first()
+        assert "Intro to Biology" not in page.text
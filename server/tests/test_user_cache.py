@@ -0,0 +1,120 @@
+"""
+Tests for the authenticated user cache.
+"""
+from jose import jwt
+
+from app import auth, models
+from app.services.ttl_cache import TTLCache
+from app.services.user_cache import user_cache
+from benchmarks.bench_history import count_queries
+from tests.conftest import async_engine
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def users_queries(statements):
+    return [statement for statement in statements if "FROM users" in statement]
+
+
+class TestTTLCache:
+    """Tests for the TTL-bounded LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1 and cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(max_entries=10, ttl_seconds=60, clock=clock)
+        cache.put("a", 1)
+        cache.put("b", 2, ttl_seconds=10)
+
+        clock.now = 30
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+
+        clock.now = 61
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 2
+        assert len(cache) == 0
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = TTLCache(max_entries=0, ttl_seconds=60)
+        cache.put("a", 1)
+
+        assert cache.get("a") is None
+        assert cache.stats()["enabled"] is False
+
+
+class TestCurrentUserCache:
+    """Tests for get_current_user's use of the cache."""
+
+    def test_token_subject_is_user_id(self, client, test_user_data, registered_user):
+        response = client.post("/auth/login", json={
+            "email": test_user_data["email"],
+            "password": test_user_data["password"]
+        })
+
+        payload = jwt.decode(response.json()["access_token"], auth.JWT_SECRET, algorithms=[auth.JWT_ALGORITHM])
+        assert payload["sub"] == str(registered_user["id"])
+
+    def test_repeat_requests_skip_users_query(self, authenticated_client):
+        """Test the first request loads the user by primary key and later ones hit the cache."""
+        with count_queries(async_engine.sync_engine) as first:
+            assert authenticated_client.get("/auth/me").status_code == 200
+        with count_queries(async_engine.sync_engine) as later:
+            for _ in range(3):
+                assert authenticated_client.get("/auth/me").status_code == 200
+
+        assert len(users_queries(first)) == 1
+        assert "users.id =" in users_queries(first)[0]
+        assert users_queries(later) == []
+        assert user_cache.stats()["hits"] == 3
+
+    def test_legacy_email_token_still_accepted(self, client, test_user_data, registered_user):
+        token = auth.create_access_token(data={"sub": test_user_data["email"]})
+
+        response = client.get("/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+        assert response.status_code == 200
+        assert response.json()["id"] == registered_user["id"]
+
+    def test_user_update_invalidates_cache(self, authenticated_client, db_session, registered_user):
+        assert authenticated_client.get("/auth/me").json()["username"] == "testuser"
+
+        user = db_session.get(models.User, registered_user["id"])
+        user.username = "renamed"
+        db_session.commit()
+
+        assert authenticated_client.get("/auth/me").json()["username"] == "renamed"
+
+    def test_deleted_user_is_rejected(self, authenticated_client, db_session, registered_user):
+        assert authenticated_client.get("/auth/me").status_code == 200
+
+        db_session.delete(db_session.get(models.User, registered_user["id"]))
+        db_session.commit()
+
+        assert authenticated_client.get("/auth/me").status_code == 401
+
+    def test_stats_on_metrics(self, authenticated_client, metrics_headers):
+        for _ in range(2):
+            authenticated_client.get("/auth/me")
+
+        stats = authenticated_client.get("/metrics", headers=metrics_headers).json()["user_cache"]
+
+        assert stats["misses"] == 1
+        assert stats["hits"] == 1
+        assert stats["queries_saved"] == 1